@@ -414,6 +414,19 @@ STRIPE_PRICE_TABLE_ID = env("STRIPE_PRICE_TABLE_ID", default="")
 DYNAMIC_BREADCRUMBS_PATH_MAX_DEPTH = 8
 FORMS_URLFIELD_ASSUME_HTTPS = True
 
+# Calendar feeds
+# ------------------------------------------------------------------------------
+# Bounds in seconds for how long a fetched feed is served without refetching;
+# upstream Cache-Control/Expires headers choose a lifetime within them
+CALENDAR_FEED_MIN_FRESHNESS = env.int("CALENDAR_FEED_MIN_FRESHNESS", default=120)
+CALENDAR_FEED_MAX_FRESHNESS = env.int("CALENDAR_FEED_MAX_FRESHNESS", default=3600)
+# Largest feed body in bytes accepted from hosts without a policy limit,
+# 0 to disable
+CALENDAR_FEED_MAX_BODY_SIZE = env.int(
+    "CALENDAR_FEED_MAX_BODY_SIZE",
+    default=20 * 1024 * 1024,
+)
+
 # django-health-check
 # ------------------------------------------------------------------------------
 # https://github.com/revsys/django-health-check
@@ -1,3 +1,6 @@
+import requests
+
+
 class LocalUrlError(Exception):
     """Raised when a local URL is used in SourceProcessor."""
 
@@ -12,3 +15,27 @@ class CalendarCustomizationError(ValueError):
 
 class CustomizationWithoutCalendarError(CalendarCustomizationError):
     """Raised when calendar customization is attempted without a calendar."""
+
+
+class CacheEnvelopeError(ValueError):
+    """Raised when a cached feed entry cannot be decoded."""
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised when a fetch is skipped because its host's circuit is open."""
+
+
+class HostBusyError(requests.RequestException):
+    """Raised when no connection slot to a host frees up within the timeout."""
+
+
+class CachedFetchError(requests.RequestException):
+    """Raised when a fetch is skipped because the URL failed recently."""
+
+
+class FeedTooLargeError(requests.RequestException):
+    """Raised when a feed exceeds the maximum body size for its host."""
+
+
+class NotICalendarError(requests.RequestException):
+    """Raised when a feed URL returns something other than iCalendar data."""
@@ -0,0 +1,251 @@
+"""
+Compact binary envelopes for raw feed cache entries.
+
+Raw feeds are kept in the cache for a day for every source URL, which makes
+them the largest consumer of cache memory. Many users subscribe to the same
+public feeds, often through different URL variants, so bodies are stored
+once under their content hash and each URL only keeps a small pointer:
+
+    pointer (per URL)
+        magic          4 bytes   b"MCF" + format version
+        fetched_at     8 bytes   float, seconds since the epoch
+        fresh_for      8 bytes   float, freshness lifetime in seconds (NaN
+                                 if unknown)
+        content_hash  32 bytes   SHA-256 of the uncompressed body
+        validators     2 bytes   length, followed by the validators as JSON
+
+    body (per content hash)
+        magic          4 bytes   BODY_MAGIC
+        codec          1 byte    CODEC_ZLIB or CODEC_ZSTD
+        body           rest      compressed body
+
+Entries from older format versions are still read: version 2 pointers,
+which had no freshness lifetime, and version 1 entries, which carried the
+compressed body after the validators.
+
+zstd is used when the optional ``zstandard`` package is installed, zlib
+otherwise. The codec is recorded per body, so both can be read back.
+"""
+
+import hashlib
+import json
+import math
+import struct
+import zlib
+from dataclasses import dataclass
+from dataclasses import field
+
+from mergecalweb.calendars.exceptions import CacheEnvelopeError
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+FORMAT_VERSION = 3
+MAGIC = b"MCF" + bytes([FORMAT_VERSION])
+V2_MAGIC = b"MCF\x02"  # Pointer without a freshness lifetime
+LEGACY_MAGIC = b"MCF\x01"  # Pointer and body in one entry
+BODY_MAGIC = b"MCB\x01"
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_POINTER_HEADER = struct.Struct(">4sdd32sH")
+_V2_POINTER_HEADER = struct.Struct(">4sd32sH")
+_BODY_HEADER = struct.Struct(">4sB")
+_LEGACY_HEADER = struct.Struct(">4sBd32sH")
+
+
+@dataclass(frozen=True)
+class FeedEntry:
+    """
+    A raw feed as stored in the cache.
+
+    ``content`` is None for pointers, whose body is stored separately under
+    ``body_key(content_hash)``. ``fresh_for`` is the freshness lifetime in
+    seconds chosen when the body was fetched, None for older entries.
+    """
+
+    content: bytes | None
+    fetched_at: float
+    validators: dict[str, str] = field(default_factory=dict)
+    content_hash: str = ""
+    fresh_for: float | None = None
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest identifying a feed body."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def body_key(digest: str) -> str:
+    """Cache key of the feed body with the given content hash."""
+    return f"calendar_feed_{digest}"
+
+
+def is_envelope(data: object) -> bool:
+    """Whether a cached value was written by ``pack``."""
+    return isinstance(data, bytes) and data[:3] == MAGIC[:3]
+
+
+def pack(
+    digest: str,
+    fetched_at: float,
+    validators: dict[str, str] | None = None,
+    fresh_for: float | None = None,
+) -> bytes:
+    """
+    Encode the per-URL pointer to a feed body.
+
+    Args:
+        digest: Content hash of the body, see ``content_hash``
+        fetched_at: Time the body was fetched or last revalidated
+        validators: Upstream ``etag``/``last_modified`` values, if any
+        fresh_for: Seconds the body stays fresh after ``fetched_at``
+
+    Returns:
+        The pointer bytes
+    """
+    encoded_validators = json.dumps(validators or {}, separators=(",", ":")).encode()
+    header = _POINTER_HEADER.pack(
+        MAGIC,
+        fetched_at,
+        math.nan if fresh_for is None else fresh_for,
+        bytes.fromhex(digest),
+        len(encoded_validators),
+    )
+    return header + encoded_validators
+
+
+def unpack(data: bytes) -> FeedEntry:
+    """
+    Decode a per-URL entry written by ``pack`` or an older format version.
+
+    Raises:
+        CacheEnvelopeError: If the entry is corrupt, from an unknown format
+            version, or uses a codec that is not available
+    """
+    if data[:4] == LEGACY_MAGIC:
+        return _unpack_legacy(data)
+    if data[:4] == V2_MAGIC:
+        return _unpack_v2(data)
+
+    try:
+        magic, fetched_at, fresh_for, digest, validators_length = (
+            _POINTER_HEADER.unpack_from(data)
+        )
+    except struct.error as e:
+        msg = "Truncated feed cache envelope"
+        raise CacheEnvelopeError(msg) from e
+    if magic != MAGIC:
+        msg = f"Unsupported feed cache envelope version: {magic!r}"
+        raise CacheEnvelopeError(msg)
+
+    validators = _decode_validators(
+        data[_POINTER_HEADER.size : _POINTER_HEADER.size + validators_length],
+    )
+    return FeedEntry(
+        content=None,
+        fetched_at=fetched_at,
+        validators=validators,
+        content_hash=digest.hex(),
+        fresh_for=None if math.isnan(fresh_for) else fresh_for,
+    )
+
+
+def pack_body(content: bytes) -> bytes:
+    """Compress a feed body for storage under its content hash."""
+    if zstandard is not None:
+        codec = CODEC_ZSTD
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    else:
+        codec = CODEC_ZLIB
+        body = zlib.compress(content, ZLIB_LEVEL)
+    return _BODY_HEADER.pack(BODY_MAGIC, codec) + body
+
+
+def unpack_body(data: bytes) -> bytes:
+    """
+    Decompress a feed body written by ``pack_body``.
+
+    Raises:
+        CacheEnvelopeError: If the body is corrupt or uses a codec that is
+            not available
+    """
+    try:
+        magic, codec = _BODY_HEADER.unpack_from(data)
+    except struct.error as e:
+        msg = "Truncated feed cache body"
+        raise CacheEnvelopeError(msg) from e
+    if magic != BODY_MAGIC:
+        msg = f"Unsupported feed cache body version: {magic!r}"
+        raise CacheEnvelopeError(msg)
+    return _decompress(codec, data[_BODY_HEADER.size :])
+
+
+def _unpack_v2(data: bytes) -> FeedEntry:
+    try:
+        _, fetched_at, digest, validators_length = _V2_POINTER_HEADER.unpack_from(
+            data,
+        )
+    except struct.error as e:
+        msg = "Truncated feed cache envelope"
+        raise CacheEnvelopeError(msg) from e
+
+    validators = _decode_validators(
+        data[_V2_POINTER_HEADER.size : _V2_POINTER_HEADER.size + validators_length],
+    )
+    return FeedEntry(
+        content=None,
+        fetched_at=fetched_at,
+        validators=validators,
+        content_hash=digest.hex(),
+    )
+
+
+def _unpack_legacy(data: bytes) -> FeedEntry:
+    try:
+        _, codec, fetched_at, digest, validators_length = _LEGACY_HEADER.unpack_from(
+            data,
+        )
+    except struct.error as e:
+        msg = "Truncated feed cache envelope"
+        raise CacheEnvelopeError(msg) from e
+
+    validators_end = _LEGACY_HEADER.size + validators_length
+    validators = _decode_validators(data[_LEGACY_HEADER.size : validators_end])
+    return FeedEntry(
+        content=_decompress(codec, data[validators_end:]),
+        fetched_at=fetched_at,
+        validators=validators,
+        content_hash=digest.hex(),
+    )
+
+
+def _decode_validators(data: bytes) -> dict[str, str]:
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        msg = "Corrupt feed cache envelope validators"
+        raise CacheEnvelopeError(msg) from e
+
+
+def _decompress(codec: int, body: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        try:
+            return zlib.decompress(body)
+        except zlib.error as e:
+            msg = "Corrupt zlib feed cache body"
+            raise CacheEnvelopeError(msg) from e
+
+    if codec == CODEC_ZSTD and zstandard is not None:
+        try:
+            return zstandard.ZstdDecompressor().decompress(body)
+        except zstandard.ZstdError as e:
+            msg = "Corrupt zstd feed cache body"
+            raise CacheEnvelopeError(msg) from e
+
+    msg = f"Unsupported feed cache codec: {codec}"
+    raise CacheEnvelopeError(msg)
@@ -0,0 +1,128 @@
+"""
+Per-URL change frequency of feed bodies.
+
+Most feeds change a few times a week, yet without guidance from the
+upstream every feed would be refetched as soon as the default freshness
+window ends. Each fetch records whether the body's content hash changed
+since the previous one, and the feed's change interval is estimated from
+that history (changes over observed time, both decaying with
+``HALF_LIFE`` so the estimate follows feeds whose behaviour changes).
+
+The estimate drives the freshness lifetime stored with the next fetch (see
+``freshness.lifetime``): feeds that rarely change are revalidated less
+often, volatile ones as often as the configured floor allows. Since the
+sweeper refreshes feeds when their lifetime runs out, it backs off too.
+
+Updates are read-modify-write without a lock; an observation lost to a
+concurrent update only makes the estimate slightly less precise.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from mergecalweb.core.logging_events import LogEvent
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE = timedelta(days=7)  # Age at which an observation counts half
+# Observation time needed before the estimate is trusted
+MIN_OBSERVATION = timedelta(hours=1)
+# Fraction of the expected change interval a feed stays fresh, so a change
+# is typically picked up within a tenth of the time between changes
+POLL_FRACTION = 0.1
+HISTORY_TTL = timedelta(days=30)
+
+
+def _history_key(url: str) -> str:
+    return f"calendar_changes_{url}"
+
+
+@dataclass(frozen=True)
+class ChangeHistory:
+    """Observed changes of one feed; counts decay with ``HALF_LIFE``."""
+
+    content_hash: str
+    checked_at: float
+    changes: float = 0
+    observed_seconds: float = 0
+
+    @property
+    def change_interval(self) -> float | None:
+        """
+        Expected seconds between changes, None until observed long enough.
+
+        A feed that never changed is assumed to change about once per
+        observed period, so its interval grows as it keeps not changing.
+        """
+        if self.observed_seconds < MIN_OBSERVATION.total_seconds():
+            return None
+        return self.observed_seconds / max(self.changes, 1)
+
+
+def get_history(url: str) -> ChangeHistory | None:
+    """Read the change history of ``url``."""
+    data = cache.get(_history_key(url))
+    return None if data is None else ChangeHistory(**data)
+
+
+def record(url: str, digest: str) -> ChangeHistory:
+    """
+    Record that ``url`` was fetched or revalidated with body ``digest``.
+
+    Returns:
+        The updated history
+    """
+    now = time.time()
+    previous = get_history(url)
+    if previous is None:
+        history = ChangeHistory(content_hash=digest, checked_at=now)
+    else:
+        elapsed = max(now - previous.checked_at, 0)
+        decay = 0.5 ** (elapsed / HALF_LIFE.total_seconds())
+        changed = digest != previous.content_hash
+        history = ChangeHistory(
+            content_hash=digest,
+            checked_at=now,
+            changes=previous.changes * decay + changed,
+            observed_seconds=previous.observed_seconds * decay + elapsed,
+        )
+        if changed:
+            logger.debug(
+                "Calendar feed content changed",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "content-changed",
+                    "url": url[:200],
+                    "seconds_since_check": round(elapsed, 2),
+                    "change_interval_seconds": history.change_interval,
+                },
+            )
+
+    cache.set(
+        _history_key(url),
+        {
+            "content_hash": history.content_hash,
+            "checked_at": history.checked_at,
+            "changes": history.changes,
+            "observed_seconds": history.observed_seconds,
+        },
+        HISTORY_TTL.total_seconds(),
+    )
+    return history
+
+
+def learned_lifetime(url: str) -> float | None:
+    """
+    Freshness lifetime suggested by the change history of ``url``.
+
+    Returns:
+        Seconds, or None if there is not enough history yet
+    """
+    history = get_history(url)
+    if history is None or history.change_interval is None:
+        return None
+    return history.change_interval * POLL_FRACTION
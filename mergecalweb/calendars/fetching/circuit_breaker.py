@@ -0,0 +1,170 @@
+"""
+Per-host circuit breaker for remote calendar fetches.
+
+When a large upstream (an Outlook tenant, a school district server, ...)
+goes down, every merge including one of its feeds would otherwise wait for
+the full fetch timeout, over and over until the outage ends. Failures are
+counted per host in the shared cache, so all web workers and Celery tasks
+see the same state:
+
+- closed: requests go through; failures are counted, and once a host has
+  failed, so are its successes
+- open: once at least ``FAILURE_THRESHOLD`` requests failed within
+  ``FAILURE_WINDOW`` and they make up at least ``FAILURE_RATE`` of the
+  counted requests, requests are rejected without touching the network, so
+  callers fall back to their stale copy or fail fast
+- half-open: once ``RESET_TIMEOUT`` has passed, a single probe request is let
+  through; success closes the circuit, failure opens it again
+
+Only errors that say something about the host count as failures: timeouts,
+connection errors and 5xx/429 responses. A 404 for one feed does not trip
+the circuit for every other feed on the same host, and neither do a few
+slow feeds timing out on a large host whose other feeds keep answering.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+import requests
+from django.core.cache import cache
+
+from mergecalweb.core.logging_events import LogEvent
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 5  # Failures within the window that may open the circuit
+FAILURE_RATE = 0.5  # Share of the counted requests that must have failed
+# Failures, and the successes counted after them, older than this are forgotten
+FAILURE_WINDOW = timedelta(minutes=1)
+RESET_TIMEOUT = timedelta(seconds=60)  # Time open before a probe is allowed
+# Time a probe may take before another caller is allowed to probe
+PROBE_TIMEOUT = timedelta(seconds=60)
+# An open circuit nobody probes is forgotten after this long
+OPEN_STATE_TTL = timedelta(hours=1)
+
+
+def _failures_key(host: str) -> str:
+    return f"calendar_circuit_failures_{host}"
+
+
+def _successes_key(host: str) -> str:
+    return f"calendar_circuit_successes_{host}"
+
+
+def _opened_key(host: str) -> str:
+    return f"calendar_circuit_opened_{host}"
+
+
+def _probe_key(host: str) -> str:
+    return f"calendar_circuit_probe_{host}"
+
+
+def host_for(url: str) -> str:
+    """Host whose circuit guards requests to ``url``."""
+    return urlparse(url).hostname or ""
+
+
+def is_host_failure(error: Exception) -> bool:
+    """Whether a fetch error indicates the host itself is unhealthy."""
+    if isinstance(error, requests.HTTPError):
+        status_code = getattr(error.response, "status_code", None)
+        return status_code is not None and (
+            status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status_code == HTTPStatus.TOO_MANY_REQUESTS
+        )
+    return isinstance(error, requests.Timeout | requests.ConnectionError)
+
+
+def allow_request(host: str) -> bool:
+    """
+    Check whether a request to ``host`` may be sent.
+
+    Returns:
+        True if the circuit is closed, or if it is half-open and this caller
+        was elected to send the probe request
+    """
+    opened_at = cache.get(_opened_key(host))
+    if opened_at is None:
+        return True
+    if time.time() - opened_at < RESET_TIMEOUT.total_seconds():
+        return False
+    # Half-open: let a single probe through to detect recovery
+    return cache.add(_probe_key(host), 1, PROBE_TIMEOUT.total_seconds())
+
+
+def record_success(host: str) -> None:
+    """
+    Count a successful request to ``host``, closing its circuit if open.
+
+    Successes are only counted while the host has recent failures, so
+    healthy hosts cost a single cache read.
+    """
+    state = cache.get_many([_failures_key(host), _opened_key(host)])
+    if not state:
+        # Healthy host, nothing to count or reset
+        return
+
+    if _opened_key(host) not in state:
+        _increment(_successes_key(host))
+        return
+
+    logger.info(
+        "Calendar host recovered, closing circuit",
+        extra={
+            "event": LogEvent.CALENDAR_FETCH,
+            "status": "circuit-closed",
+            "host": host,
+        },
+    )
+    cache.delete_many(
+        [
+            _failures_key(host),
+            _successes_key(host),
+            _opened_key(host),
+            _probe_key(host),
+        ],
+    )
+
+
+def record_failure(host: str) -> None:
+    """Count a failed request to ``host``, opening the circuit if needed."""
+    if cache.get(_opened_key(host)) is not None:
+        # The half-open probe failed - stay open for another reset timeout
+        _open(host, failures=None)
+        return
+
+    failures = _increment(_failures_key(host))
+    if failures < FAILURE_THRESHOLD:
+        return
+    successes = cache.get(_successes_key(host), 0)
+    if failures >= FAILURE_RATE * (failures + successes):
+        _open(host, failures=failures)
+
+
+def _increment(key: str) -> int:
+    """Increment a counter living for ``FAILURE_WINDOW`` from its creation."""
+    cache.add(key, 0, FAILURE_WINDOW.total_seconds())
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter expired between add and incr
+        cache.set(key, 1, FAILURE_WINDOW.total_seconds())
+        return 1
+
+
+def _open(host: str, failures: int | None) -> None:
+    cache.set(_opened_key(host), time.time(), OPEN_STATE_TTL.total_seconds())
+    cache.delete_many([_failures_key(host), _successes_key(host), _probe_key(host)])
+    logger.warning(
+        "Calendar host failing, opening circuit",
+        extra={
+            "event": LogEvent.CALENDAR_FETCH,
+            "status": "circuit-opened",
+            "host": host,
+            "failures": failures,
+            "reset_seconds": RESET_TIMEOUT.total_seconds(),
+        },
+    )
@@ -0,0 +1,315 @@
+"""
+Asyncio crawler for refreshing many calendar feeds from one worker task.
+
+``CalendarFetcher`` serves the request path one feed at a time. Refreshing
+every feed that way would need one blocked worker process per in-flight
+request, so bulk refreshes use this crawler instead: a single
+``httpx.AsyncClient`` keeps hundreds of requests in flight from one task,
+with a per-host limit so no upstream sees more than a handful at once.
+Host policies (see ``domain_configs``) can lower that limit and the request
+timeout, cap the body size and opt out of HTTP/2. Bodies are streamed, so
+oversized feeds and bodies that are not iCalendar are abandoned early (see
+``feed_body``).
+
+Requests use the same headers as ``CalendarFetcher``, conditional on the
+stored validators, and results are cached through it, so the request path
+reads what the crawler wrote. Hosts whose circuit is open (see
+``circuit_breaker``) are skipped, as are uncached feeds that failed recently
+(the fetcher's negative cache, cleared once a feed is stored again), and
+crawl outcomes feed the same circuits and the per-URL latency and change
+histories. Cache I/O runs in threads to keep the event loop free.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+
+import httpx
+
+from mergecalweb.calendars.exceptions import CachedFetchError
+from mergecalweb.calendars.exceptions import FeedTooLargeError
+from mergecalweb.calendars.exceptions import NotICalendarError
+from mergecalweb.calendars.fetching import change_rate
+from mergecalweb.calendars.fetching import circuit_breaker
+from mergecalweb.calendars.fetching import feed_body
+from mergecalweb.calendars.fetching import latency
+from mergecalweb.calendars.fetching.cache_envelope import FeedEntry
+from mergecalweb.calendars.fetching.domain_configs import DomainPolicy
+from mergecalweb.calendars.fetching.domain_configs import get_domain_policy
+from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+from mergecalweb.calendars.fetching.http_client import HTTP2_ENABLED
+from mergecalweb.core.logging_events import LogEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = 200  # Requests in flight across all hosts
+MAX_CONNECTIONS_PER_HOST = 20  # Requests in flight to a single host
+DEFAULT_TIMEOUT = 10
+
+
+@dataclass(frozen=True)
+class CrawlResult:
+    """
+    Outcome of refreshing one feed.
+
+    ``status`` is "updated" (new body), "unchanged" (same body re-sent),
+    "not-modified" (304), "circuit-open" (host failing, not requested),
+    "failed-recently" (uncached feed in the negative cache, not requested) or
+    "error".
+    """
+
+    url: str
+    status: str
+    duration_seconds: float
+    status_code: int | None = None
+    size_bytes: int = 0
+    content_hash: str | None = None
+    error: str | None = None
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "updated"
+
+
+def crawl(
+    urls: list[str],
+    *,
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: int = MAX_CONCURRENCY,
+) -> list[CrawlResult]:
+    """
+    Refresh the cached copies of ``urls`` concurrently.
+
+    Args:
+        urls: Distinct feed URLs to refresh
+        timeout: Per-request timeout in seconds
+        concurrency: Maximum requests in flight
+
+    Returns:
+        One result per URL, in the order of ``urls``
+    """
+    return asyncio.run(_crawl(urls, timeout, concurrency))
+
+
+async def _crawl(
+    urls: list[str],
+    request_timeout: float,
+    concurrency: int,
+) -> list[CrawlResult]:
+    fetcher = CalendarFetcher()
+    entries = await asyncio.to_thread(fetcher.read_entries, urls)
+
+    request_slots = asyncio.Semaphore(concurrency)
+    host_slots: dict[str, asyncio.Semaphore] = {}
+
+    def host_slot(host: str, policy: DomainPolicy) -> asyncio.Semaphore:
+        if host not in host_slots:
+            limit = policy.max_concurrency or MAX_CONNECTIONS_PER_HOST
+            host_slots[host] = asyncio.Semaphore(limit)
+        return host_slots[host]
+
+    async def fetch(
+        clients: dict[bool, httpx.AsyncClient],
+        url: str,
+    ) -> CrawlResult:
+        host = circuit_breaker.host_for(url)
+        policy = get_domain_policy(host)
+        client = clients[HTTP2_ENABLED and policy.http2 is not False]
+        timeout = request_timeout
+        if policy.timeout is not None:
+            timeout = min(timeout, policy.timeout)
+
+        if url not in entries:
+            try:
+                await asyncio.to_thread(fetcher.raise_if_failed_recently, url)
+            except CachedFetchError as e:
+                return _result(url, "failed-recently", time.monotonic(), error=str(e))
+
+        # Wait for the host first, so queued requests to a busy host do not
+        # hold slots other hosts could use
+        async with host_slot(host, policy), request_slots:
+            start_time = time.monotonic()
+            if not await asyncio.to_thread(circuit_breaker.allow_request, host):
+                return _result(url, "circuit-open", start_time)
+            result = await _fetch(
+                client,
+                fetcher,
+                url,
+                entries.get(url),
+                request_timeout=timeout,
+                max_body_size=feed_body.max_body_size(policy),
+            )
+
+        await asyncio.to_thread(_record_outcome, host, result)
+        return result
+
+    async with contextlib.AsyncExitStack() as stack:
+        # Hosts whose policy disables HTTP/2 get their own HTTP/1.1 client
+        clients = {
+            http2: await stack.enter_async_context(
+                httpx.AsyncClient(
+                    http2=http2,
+                    follow_redirects=True,
+                    timeout=request_timeout,
+                    limits=httpx.Limits(
+                        max_connections=concurrency,
+                        max_keepalive_connections=concurrency,
+                    ),
+                ),
+            )
+            for http2 in {HTTP2_ENABLED, False}
+        }
+        return await asyncio.gather(*(fetch(clients, url) for url in urls))
+
+
+async def _fetch(  # noqa: PLR0913
+    client: httpx.AsyncClient,
+    fetcher: CalendarFetcher,
+    url: str,
+    entry: FeedEntry | None,
+    *,
+    request_timeout: float,
+    max_body_size: int | None,
+) -> CrawlResult:
+    start_time = time.monotonic()
+    headers = fetcher.build_headers(url, entry.validators if entry else None)
+
+    try:
+        async with client.stream(
+            "GET",
+            url,
+            headers=headers,
+            timeout=request_timeout,
+        ) as response:
+            if response.status_code >= HTTPStatus.BAD_REQUEST:
+                return _result(
+                    url,
+                    "error",
+                    start_time,
+                    status_code=response.status_code,
+                    error=f"{response.status_code} Error: {response.reason_phrase}",
+                )
+            if response.status_code == HTTPStatus.NOT_MODIFIED:
+                content = None
+            else:
+                content = await _read_body(response, url, max_body_size)
+    except httpx.HTTPError as e:
+        return _result(url, "error", start_time, error=f"{type(e).__name__}: {e}")
+    except (FeedTooLargeError, NotICalendarError) as e:
+        return _result(
+            url,
+            "error",
+            start_time,
+            status_code=response.status_code,
+            error=str(e),
+        )
+
+    validators = fetcher.extract_validators(response.headers)
+    fresh_for = await asyncio.to_thread(
+        fetcher.freshness_lifetime,
+        url,
+        response.headers,
+    )
+    if content is None:
+        if entry is None:
+            # Only conditional requests can be answered with 304
+            return _result(
+                url,
+                "error",
+                start_time,
+                status_code=response.status_code,
+                error="Unexpected 304 for an unconditional request",
+            )
+        await asyncio.to_thread(
+            fetcher.store_not_modified,
+            url,
+            entry,
+            validators,
+            fresh_for,
+        )
+        return _result(
+            url,
+            "not-modified",
+            start_time,
+            status_code=response.status_code,
+            content_hash=entry.content_hash,
+        )
+
+    digest = await asyncio.to_thread(
+        fetcher.store,
+        url,
+        content,
+        validators,
+        fresh_for,
+    )
+    changed = entry is None or entry.content_hash != digest
+    return _result(
+        url,
+        "updated" if changed else "unchanged",
+        start_time,
+        status_code=response.status_code,
+        size_bytes=len(content),
+        content_hash=digest,
+    )
+
+
+async def _read_body(
+    response: httpx.Response,
+    url: str,
+    max_body_size: int | None,
+) -> bytes:
+    """Stream a feed body, abandoning it once it is too large or not a feed."""
+    reader = feed_body.FeedBodyReader(
+        url,
+        max_size=max_body_size,
+        content_length=response.headers.get("Content-Length"),
+    )
+    async for chunk in response.aiter_bytes():
+        reader.feed(chunk)
+    return reader.finish()
+
+
+def _record_outcome(host: str, result: CrawlResult) -> None:
+    """Feed a crawl result into the host's circuit and the URL's history."""
+    if _is_host_failure(result):
+        circuit_breaker.record_failure(host)
+        return
+    circuit_breaker.record_success(host)
+    if result.content_hash is not None:
+        latency.record(result.url, result.duration_seconds)
+        change_rate.record(result.url, result.content_hash)
+
+
+def _is_host_failure(result: CrawlResult) -> bool:
+    if result.status != "error":
+        return False
+    # No status code means the request itself failed (timeout, connection)
+    return result.status_code is None or (
+        result.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        or result.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+def _result(url: str, status: str, start_time: float, **kwargs) -> CrawlResult:
+    result = CrawlResult(
+        url=url,
+        status=status,
+        duration_seconds=round(time.monotonic() - start_time, 3),
+        **kwargs,
+    )
+    logger.debug(
+        "Calendar feed crawled",
+        extra={
+            "event": LogEvent.CALENDAR_FETCH,
+            "status": f"crawl-{status}",
+            "url": url[:200],
+            "status_code": result.status_code,
+            "size_bytes": result.size_bytes,
+            "duration_seconds": result.duration_seconds,
+            "error": result.error,
+        },
+    )
+    return result
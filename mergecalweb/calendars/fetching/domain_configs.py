@@ -1,12 +1,14 @@
 """
-Encrypted configuration for calendar sources that require special handling.
+Encrypted fetch policies for calendar hosts that require special handling.
 
-This module stores encrypted domain-specific configurations for calendar sources
-that need custom headers or other special handling. The configurations are encrypted
-to protect user privacy in the public codebase.
+This module stores encrypted per-host policies for calendar sources that need
+custom headers, or that must be throttled or tuned because of their size or
+behaviour. The configurations are encrypted to protect user privacy in the
+public codebase.
 
 Configuration is encrypted using Fernet symmetric encryption. The encryption key
-must be provided via the CALENDAR_CONFIG_KEY environment variable.
+must be provided via the CALENDAR_CONFIG_KEY environment variable. Configs are
+decrypted on first use, not at import.
 
 Each encrypted config is a JSON object with the following structure:
 {
@@ -14,13 +16,28 @@ Each encrypted config is a JSON object with the following structure:
     "user_agent": "Custom User Agent",  # optional
     "accept": "text/calendar",  # optional
     "additional_headers": {"Header-Name": "value"},  # optional
+    "timeout": 10,  # optional, maximum seconds per request
+    "max_concurrency": 2,  # optional, concurrent requests per process
+    "min_refresh_interval": 900,  # optional, seconds a fetched feed stays fresh
+    "max_body_size": 5242880,  # optional, largest accepted feed in bytes
+    "http2": false,  # optional, whether HTTP/2 may be used
     "notes": "Why this config is needed"  # optional, for documentation
 }
+
+"domain" selects the hosts a policy applies to:
+- "example.com": exactly that host
+- "*.example.com": any subdomain of example.com, but not example.com itself
+- ".example.com": example.com and all of its subdomains
+
+The most specific match wins: an exact host, then the closest parent domain.
 """
 
+import functools
 import json
 import logging
 import os
+from dataclasses import dataclass
+from dataclasses import field
 from typing import Any
 
 from cryptography.fernet import Fernet
@@ -29,12 +46,79 @@ from cryptography.fernet import InvalidToken
 logger = logging.getLogger(__name__)
 
 # Encrypted domain configurations
-# Each entry is an encrypted JSON object containing domain and header overrides
+# Each entry is an encrypted JSON object containing a domain pattern and policy
 ENCRYPTED_CONFIGS: list[str] = [
     "gAAAAABpBtM8JKCSEohrD570Bvn-AQj8OtxDqfKtAOvKfFbnKzadSjqJLsdW0ezyIOPDYmoxdpvkR1MV3HvZSJfQgapZTPWwyMxytZai-I6k8Ma9Ul6GHmdukMvFw15W0pbO44EDXPC9h3GzwMAqk8EGX0GmosQTYquVO5ITm5NggKkAopBqKUn_DWZpGHqrawj7Ll3BuhVx7-8MAJPGk7bI8FxntKxi6P20k8kDkcf2Zv9XUOiRQzYR8C8Yrq0V4V7K29xd-RHoLif7Wti6d0yd9yVQoUP46xgXYLYaz0QYy3FACP5lzQii1DzJzUvwtdgwar6Lk5mecLAqjy93wUVrDVuuucZFue5-0VAN2VJ5U6XqmIqPoCOXc1Zzxk46lVDe6MgLQ1-MbxVzYAYblcMn0BPW8hoiOe4T_1H80-yX6sp5kFO2GVlKW8B42Jdu47hWv0xBPK0z",
 ]
 
 
+@dataclass(frozen=True)
+class DomainPolicy:
+    """
+    Fetch policy for the hosts matching ``pattern``.
+
+    Fields left as None fall back to the fetcher's defaults.
+    """
+
+    pattern: str = ""
+    user_agent: str | None = None
+    accept: str | None = None
+    additional_headers: dict[str, str] = field(default_factory=dict)
+    timeout: int | None = None
+    max_concurrency: int | None = None
+    min_refresh_interval: int | None = None
+    max_body_size: int | None = None
+    http2: bool | None = None
+    notes: str = ""
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "DomainPolicy":
+        """
+        Build a policy from a decrypted config.
+
+        Raises:
+            KeyError: If the config has no "domain"
+            TypeError: If the config has unknown keys
+        """
+        config = dict(config)
+        pattern = config.pop("domain").strip().lower()
+        return cls(pattern=pattern, **config)
+
+
+DEFAULT_POLICY = DomainPolicy()
+
+
+class PolicyIndex:
+    """Precompiled lookup of the policy applying to a host."""
+
+    def __init__(self, policies: list[DomainPolicy]) -> None:
+        self._exact: dict[str, DomainPolicy] = {}
+        self._subdomains: dict[str, DomainPolicy] = {}  # "*.example.com"
+        self._suffixes: dict[str, DomainPolicy] = {}  # ".example.com"
+        for policy in policies:
+            if policy.pattern.startswith("*."):
+                self._subdomains[policy.pattern[2:]] = policy
+            elif policy.pattern.startswith("."):
+                self._suffixes[policy.pattern[1:]] = policy
+            else:
+                self._exact[policy.pattern] = policy
+
+    def lookup(self, host: str) -> DomainPolicy:
+        """Return the most specific policy for ``host``, or the default."""
+        host = host.lower().rstrip(".")
+        if host in self._exact:
+            return self._exact[host]
+
+        labels = host.split(".")
+        for i in range(len(labels)):
+            domain = ".".join(labels[i:])
+            if i > 0 and domain in self._subdomains:
+                return self._subdomains[domain]
+            if domain in self._suffixes:
+                return self._suffixes[domain]
+        return DEFAULT_POLICY
+
+
 def _get_encryption_key() -> bytes | None:
     """Get the encryption key from environment variable."""
     key = os.environ.get("CALENDAR_CONFIG_KEY")
@@ -43,13 +127,13 @@ def _get_encryption_key() -> bytes | None:
     return key.encode()
 
 
-def _decrypt_configs() -> dict[str, dict[str, Any]]:
+def _decrypt_configs() -> list[DomainPolicy]:
     """
     Decrypt all domain configurations.
 
     Returns:
-        Dictionary mapping domain names to their configuration overrides.
-        Returns empty dict if decryption fails or no key is available.
+        The decrypted policies. Configs that fail to decrypt or parse are
+        skipped; the list is empty if no key is available.
     """
     key = _get_encryption_key()
     if not key:
@@ -57,24 +141,22 @@ def _decrypt_configs() -> dict[str, dict[str, Any]]:
             "CALENDAR_CONFIG_KEY not set, domain-specific configs unavailable",
             extra={"event": "calendar_config_key_missing"},
         )
-        return {}
+        return []
 
     if not ENCRYPTED_CONFIGS:
         logger.debug(
             "No encrypted domain configs defined",
             extra={"event": "calendar_config_empty"},
         )
-        return {}
+        return []
 
-    configs = {}
+    configs = []
     fernet = Fernet(key)
 
     for i, encrypted_blob in enumerate(ENCRYPTED_CONFIGS):
         try:
             decrypted_data = fernet.decrypt(encrypted_blob.encode())
-            config = json.loads(decrypted_data)
-            domain = config.pop("domain")
-            configs[domain] = config
+            configs.append(DomainPolicy.from_config(json.loads(decrypted_data)))
             logger.debug(
                 "Loaded config for domain (index %d)",
                 i,
@@ -86,7 +168,7 @@ def _decrypt_configs() -> dict[str, dict[str, Any]]:
                 i,
                 extra={"event": "calendar_config_decrypt_error", "config_index": i},
             )
-        except (json.JSONDecodeError, KeyError):
+        except (json.JSONDecodeError, KeyError, TypeError):
             logger.exception(
                 "Failed to parse config at index %d",
                 i,
@@ -113,18 +195,20 @@ def _decrypt_configs() -> dict[str, dict[str, Any]]:
     return configs
 
 
-# Cache decrypted configs at module load time
-_DOMAIN_CONFIGS = _decrypt_configs()
+@functools.cache
+def _load_policies() -> PolicyIndex:
+    """Decrypt and index the policies once per process, on first use."""
+    return PolicyIndex(_decrypt_configs())
 
 
-def get_domain_config(domain: str) -> dict[str, Any]:
+def get_domain_policy(host: str) -> DomainPolicy:
     """
-    Get configuration overrides for a specific domain.
+    Get the fetch policy for a host.
 
     Args:
-        domain: The domain name (e.g., 'example.com')
+        host: The host name (e.g., 'calendar.example.com')
 
     Returns:
-        Dictionary of configuration overrides, or empty dict if no config exists.
+        The most specific matching policy, or ``DEFAULT_POLICY``
     """
-    return _DOMAIN_CONFIGS.get(domain, {})
+    return _load_policies().lookup(host)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 """
-Helper script to encrypt domain configurations.
+Helper script to encrypt domain fetch policies.
 
 Usage:
     python encrypt_config.py create  # Interactive mode to create new config
@@ -27,6 +27,14 @@ from rich.prompt import Confirm
 from rich.prompt import Prompt
 from rich.table import Table
 
+# Integer policy fields and their prompts
+LIMIT_FIELDS = {
+    "timeout": "Request timeout in seconds",
+    "max_concurrency": "Concurrent requests per process",
+    "min_refresh_interval": "Minimum seconds between refreshes",
+    "max_body_size": "Maximum feed size in bytes",
+}
+
 app = typer.Typer(help="Manage encrypted calendar domain configurations")
 console = Console()
 
@@ -125,6 +133,7 @@ def list_configs():
     table.add_column("Domain", style="cyan bold")
     table.add_column("User-Agent", style="green")
     table.add_column("Accept", style="magenta")
+    table.add_column("Limits", style="blue")
     table.add_column("Notes", style="yellow")
 
     ua_max_length = 50
@@ -136,20 +145,45 @@ def list_configs():
             ua_preview = (ua[:ua_max_length] + "...") if len(ua) > ua_max_length else ua
             accept_header = config.get("accept", "-")
             notes = config.get("notes", "-")
+            limits = ", ".join(
+                f"{name}={config[name]}" for name in LIMIT_FIELDS if name in config
+            )
 
-            table.add_row(str(i), domain, ua_preview, accept_header, notes)
+            table.add_row(
+                str(i),
+                domain,
+                ua_preview,
+                accept_header,
+                limits or "-",
+                notes,
+            )
         else:
             table.add_row(
                 str(i),
                 "[red]Failed to decrypt[/red]",
                 "-",
                 "-",
+                "-",
                 "[red]Invalid key or corrupted data[/red]",
             )
 
     console.print(table)
 
 
+def ask_limits() -> dict:
+    """Prompt for the optional fetch limits of a policy."""
+    limits = {}
+    for name, description in LIMIT_FIELDS.items():
+        value = Prompt.ask(f"{description} (optional)", default="")
+        if value:
+            limits[name] = int(value)
+
+    http2 = Prompt.ask("Allow HTTP/2 (yes/no, optional)", default="")
+    if http2:
+        limits["http2"] = http2.lower() in ("y", "yes", "true")
+    return limits
+
+
 @app.command()
 def create():
     """Create a new encrypted domain configuration (interactive)."""
@@ -161,6 +195,11 @@ def create():
     # Gather configuration
     console.print("\n[bold]Enter domain configuration:[/bold]")
 
+    console.print(
+        "Domain patterns: 'example.com' (exact host), "
+        "'*.example.com' (subdomains only), "
+        "'.example.com' (domain and subdomains)",
+    )
     domain = Prompt.ask("Domain (e.g., 'example.com')")
     if not domain:
         console.print("[red]Domain is required[/red]")
@@ -177,6 +216,8 @@ def create():
     if accept:
         config["accept"] = accept
 
+    config.update(ask_limits())
+
     notes = Prompt.ask("Notes/reason for this config", default="")
     if notes:
         config["notes"] = notes
@@ -0,0 +1,105 @@
+"""
+Bounded, sniffing reader for streamed feed bodies.
+
+Feeds are downloaded as a stream and fed to ``FeedBodyReader`` chunk by
+chunk, instead of being read into memory whole before anything looks at
+them:
+
+- the body may not exceed the maximum size (the host policy's
+  ``max_body_size``, else ``CALENDAR_FEED_MAX_BODY_SIZE``); a larger declared
+  ``Content-Length`` is rejected before reading, a larger stream as soon as
+  the limit is crossed
+- once the first ``SNIFF_BYTES`` have arrived they must start an iCalendar
+  object (``BEGIN:VCALENDAR``, after an optional byte order mark and
+  whitespace); anything else, typically an HTML page (login walls, error
+  pages, a website URL pasted as a feed), is rejected without downloading
+  the rest
+
+Chunks are counted after content decoding, which httpx does incrementally,
+so compressed bodies cannot expand past the limit either.
+"""
+
+from django.conf import settings
+
+from mergecalweb.calendars.exceptions import FeedTooLargeError
+from mergecalweb.calendars.exceptions import NotICalendarError
+from mergecalweb.calendars.fetching.domain_configs import DomainPolicy
+
+SNIFF_BYTES = 1024  # Leading bytes checked before the rest is downloaded
+ICALENDAR_START = b"BEGIN:VCALENDAR"
+# Only used to explain why a body was rejected
+HTML_PREFIXES = (b"<!doctype html", b"<html")
+# Skipped before sniffing: UTF-8 byte order mark and whitespace
+LEADING_BYTES = b"\xef\xbb\xbf \t\r\n"
+
+
+def max_body_size(policy: DomainPolicy) -> int | None:
+    """Largest accepted body for a host, None if unlimited."""
+    return policy.max_body_size or settings.CALENDAR_FEED_MAX_BODY_SIZE or None
+
+
+def looks_like_icalendar(prefix: bytes) -> bool:
+    """Whether the leading bytes of a body start an iCalendar object."""
+    start = prefix.lstrip(LEADING_BYTES)[: len(ICALENDAR_START)]
+    return start.upper() == ICALENDAR_START
+
+
+def looks_like_html(prefix: bytes) -> bool:
+    """Whether the leading bytes of a body are an HTML page."""
+    return prefix.lstrip(LEADING_BYTES)[:20].lower().startswith(HTML_PREFIXES)
+
+
+class FeedBodyReader:
+    """
+    Accumulate a streamed feed body, enforcing its size and content type.
+
+    Raises ``FeedTooLargeError`` or ``NotICalendarError`` as soon as a
+    violation is seen, so the caller can close the stream early.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        max_size: int | None,
+        sniff: bool = True,
+        content_length: str | None = None,
+    ) -> None:
+        self.url = url
+        self.max_size = max_size
+        self._buffer = bytearray()
+        self._sniffed = not sniff
+        if max_size and content_length and content_length.isdigit():
+            self._check_size(int(content_length))
+
+    def feed(self, chunk: bytes) -> None:
+        """Add the next decoded chunk of the body."""
+        self._buffer += chunk
+        self._check_size(len(self._buffer))
+        if not self._sniffed and len(self._buffer) >= SNIFF_BYTES:
+            self._sniff()
+
+    def finish(self) -> bytes:
+        """Return the complete body once the stream is exhausted."""
+        if not self._sniffed:
+            self._sniff()
+        return bytes(self._buffer)
+
+    def _check_size(self, size: int) -> None:
+        if self.max_size and size > self.max_size:
+            msg = (
+                f"Calendar of at least {size} bytes exceeds the "
+                f"{self.max_size} byte limit for {self.url}"
+            )
+            raise FeedTooLargeError(msg)
+
+    def _sniff(self) -> None:
+        self._sniffed = True
+        prefix = bytes(self._buffer[:SNIFF_BYTES])
+        if looks_like_icalendar(prefix):
+            return
+        if looks_like_html(prefix):
+            msg = f"{self.url} returned an HTML page instead of an iCalendar feed"
+        else:
+            msg = f"{self.url} did not return an iCalendar feed"
+        raise NotICalendarError(msg)
@@ -1,61 +1,170 @@
 import logging
 import time
+from dataclasses import dataclass
+from dataclasses import field
 from datetime import timedelta
+from http import HTTPStatus
 from urllib.parse import urlparse
 
 import requests
 from django.core.cache import cache
+from kombu.exceptions import OperationalError
 
-from mergecalweb.calendars.fetching.domain_configs import get_domain_config
+from mergecalweb.calendars.exceptions import CachedFetchError
+from mergecalweb.calendars.exceptions import CacheEnvelopeError
+from mergecalweb.calendars.exceptions import CircuitOpenError
+from mergecalweb.calendars.exceptions import FeedTooLargeError
+from mergecalweb.calendars.exceptions import HostBusyError
+from mergecalweb.calendars.exceptions import NotICalendarError
+from mergecalweb.calendars.fetching import cache_envelope
+from mergecalweb.calendars.fetching import change_rate
+from mergecalweb.calendars.fetching import circuit_breaker
+from mergecalweb.calendars.fetching import freshness
+from mergecalweb.calendars.fetching import http_client
+from mergecalweb.calendars.fetching import latency
+from mergecalweb.calendars.fetching import single_flight
+from mergecalweb.calendars.fetching.domain_configs import DEFAULT_POLICY
+from mergecalweb.calendars.fetching.domain_configs import get_domain_policy
 from mergecalweb.core.logging_events import LogEvent
 
 logger = logging.getLogger(__name__)
 
-CACHE_TIMEOUT = timedelta(minutes=2)  # Freshness threshold
+# Freshness lifetime of entries written before lifetimes were stored; new
+# entries use the upstream's Cache-Control/Expires, see ``freshness``
+CACHE_TIMEOUT = timedelta(minutes=2)
 MAX_STALE_AGE = timedelta(hours=24)  # Maximum age to keep stale cache data
 DEFAULT_TIMEOUT = 30
-CACHE_TUPLE_LENGTH = 2  # Expected length of (content, timestamp) cache tuple
+# Feeds fetched by a request within this window are kept fresh by the sweeper
+RECENT_USE_WINDOW = timedelta(minutes=15)
+# How long before going stale the sweeper refreshes a recently used feed
+REFRESH_AHEAD = timedelta(seconds=30)
+# Lifetime of the marker deduplicating queued refreshes, in case a task is lost
+REFRESH_QUEUE_TTL = timedelta(minutes=5)
+# How long a failed fetch is remembered, by error class, so sources known to
+# be broken do not cost a request (and its timeout) on every merge
+NEGATIVE_CACHE_TTLS = {
+    "not-found": timedelta(minutes=15),  # 404 Not Found, 410 Gone
+    "client-error": timedelta(minutes=5),  # Other 4xx, e.g. 401/403
+    "server-error": timedelta(minutes=1),  # 5xx
+    "timeout": timedelta(minutes=1),
+    "connection-error": timedelta(minutes=2),  # DNS, refused, TLS
+    "too-large": timedelta(minutes=15),  # Over the host's maximum body size
+    "not-calendar": timedelta(minutes=15),  # HTML page or other non-feed body
+}
+# Errors raised by our own checks of a response, and their negative cache class
+FEED_ERROR_CLASSES = (
+    (FeedTooLargeError, "too-large"),
+    (NotICalendarError, "not-calendar"),
+)
+CACHE_TUPLE_LENGTH = 3  # Older (content, timestamp, validators) cache tuple
+LEGACY_CACHE_TUPLE_LENGTH = 2  # Older (content, timestamp) cache tuple
+
+
+def _used_key(url: str) -> str:
+    return f"calendar_used_{url}"
+
+
+def _refresh_queued_key(url: str) -> str:
+    return f"calendar_refresh_queued_{url}"
+
+
+def _error_key(url: str) -> str:
+    return f"calendar_error_{url}"
+
+
+def _error_class(error: requests.RequestException) -> str | None:
+    """Classify a fetch error for negative caching, None to not cache it."""
+    if isinstance(error, CircuitOpenError):
+        # The circuit breaker already tracks the failing host
+        return None
+    for error_type, error_class in FEED_ERROR_CLASSES:
+        if isinstance(error, error_type):
+            return error_class
+    if isinstance(error, requests.HTTPError):
+        return _http_error_class(getattr(error.response, "status_code", None))
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection-error"
+    return None
+
+
+def _http_error_class(status_code: int | None) -> str | None:
+    if status_code is None or status_code < HTTPStatus.BAD_REQUEST:
+        return None
+    if status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE):
+        return "not-found"
+    if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        return "server-error"
+    return "client-error"
+
+
+@dataclass(frozen=True)
+class RemoteResponse:
+    """
+    Result of a remote fetch.
+
+    ``content`` is None when the upstream answered 304 Not Modified to a
+    conditional request, meaning the cached copy is still current.
+    ``validators`` holds the upstream ``etag``/``last_modified`` values used
+    to revalidate the cached copy later, and ``fresh_for`` how many seconds
+    the upstream allows it to be served without revalidation.
+    """
+
+    content: bytes | None
+    validators: dict[str, str] = field(default_factory=dict)
+    fresh_for: float | None = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.content is None
 
 
 class CalendarFetcher:
-    def fetch_calendar(self, url: str, timeout: int | None = None) -> str:
+    def fetch_calendar(self, url: str, timeout: int | None = None) -> bytes:
         """
         Fetch calendar data from URL with stale-while-revalidate caching.
 
         This implements a resilient caching strategy:
-        - If cache is fresh (< 2 minutes): return immediately
+        - If cache is fresh (within the lifetime the upstream declared via
+          Cache-Control/Expires, clamped to the configured bounds): return
+          immediately
         - If cache is stale but < 24 hours old: try to refetch,
           fall back to stale on error
         - If cache is too old or missing: fetch fresh data
 
+        Refetches of cached content are conditional (If-None-Match /
+        If-Modified-Since), so an unchanged feed only bumps the timestamp.
+        Stale entries are served immediately and revalidated by a background
+        task; only if the task cannot be queued is the refresh done inline.
+        Concurrent refreshes of the same URL are coalesced: one caller
+        fetches while the others serve their stale copy or wait for it.
+        Failed fetches are remembered for a short, error-dependent time, so
+        a broken source without a cached copy fails fast instead of being
+        requested again on every merge.
+
         Args:
             url: Calendar URL to fetch
             timeout: Request timeout in seconds (defaults to 30)
 
         Returns:
-            Calendar data as string
+            Raw calendar data as received from the upstream
 
         Raises:
+            CachedFetchError: If there is no stale cache and the URL failed
+                recently, so it is not requested again yet
             requests.RequestException: If fetch fails and no stale cache available
         """
         cache_key = f"calendar_data_{url}"
-        cached_data = cache.get(cache_key)
-
-        if cached_data is not None:
-            # Unpack cached data (content, timestamp) or handle legacy format
-            if (
-                isinstance(cached_data, tuple)
-                and len(cached_data) == CACHE_TUPLE_LENGTH
-            ):
-                content, cached_at = cached_data
-            else:
-                # Legacy cache format (just string) - treat as stale and refetch
-                content = cached_data
-                cached_at = 0  # Force refresh by setting to epoch
+        cached = self._unpack_cached(cache.get(cache_key))
+        # Lets the sweeper keep feeds that requests depend on fresh
+        cache.set(_used_key(url), time.time(), RECENT_USE_WINDOW.total_seconds())
 
+        if cached is not None:
+            content, cached_at, validators, fresh_for = cached
             age_seconds = time.time() - cached_at
 
-            if age_seconds < CACHE_TIMEOUT.total_seconds():
+            if age_seconds < fresh_for:
                 # Cache is fresh - return immediately
                 logger.debug(
                     "Calendar fetch cache hit (fresh)",
@@ -70,9 +179,9 @@ class CalendarFetcher:
                 return content
 
             if age_seconds < MAX_STALE_AGE.total_seconds():
-                # Cache is stale but usable - try to refetch, fall back on error
+                # Cache is stale but usable - serve it, refresh in the background
                 logger.debug(
-                    "Calendar fetch cache hit (stale), attempting refresh",
+                    "Calendar fetch cache hit (stale), scheduling refresh",
                     extra={
                         "event": LogEvent.CALENDAR_FETCH,
                         "status": "cache-hit-stale",
@@ -80,9 +189,19 @@ class CalendarFetcher:
                         "age_seconds": round(age_seconds, 2),
                     },
                 )
+                if self.schedule_refresh(url):
+                    return content
+
+                # Refresh could not be queued - try to refetch, fall back on error
                 try:
-                    fresh_content = self._fetch_from_remote(url, timeout)
-                    self._cache_content(cache_key, fresh_content)
+                    fresh_content = self._refresh(
+                        url,
+                        cache_key,
+                        timeout,
+                        content,
+                        validators,
+                        serve_stale=True,
+                    )
                 except requests.RequestException as e:
                     # Network/timeout error - fall back to stale cached content
                     logger.info(
@@ -111,9 +230,8 @@ class CalendarFetcher:
                     "age_seconds": round(age_seconds, 2),
                 },
             )
-            fresh_content = self._fetch_from_remote(url, timeout)
-            self._cache_content(cache_key, fresh_content)
-            return fresh_content
+            self.raise_if_failed_recently(url)
+            return self._refresh(url, cache_key, timeout, content, validators)
 
         # No cache - fetch fresh
         logger.debug(
@@ -124,30 +242,486 @@ class CalendarFetcher:
                 "url": url[:200],
             },
         )
-        fresh_content = self._fetch_from_remote(url, timeout)
-        self._cache_content(cache_key, fresh_content)
-        return fresh_content
+        self.raise_if_failed_recently(url)
+        return self._refresh(url, cache_key, timeout)
+
+    def raise_if_failed_recently(self, url: str) -> None:
+        """
+        Fail fast if fetching ``url`` failed recently, see ``_remember_failure``.
+
+        Only consulted when there is no usable cached copy to fall back on.
+
+        Raises:
+            CachedFetchError: With the message of the remembered error
+        """
+        failure = cache.get(_error_key(url))
+        if failure is None:
+            return
+
+        logger.debug(
+            "Calendar fetch failed recently, not retrying yet",
+            extra={
+                "event": LogEvent.CALENDAR_FETCH,
+                "status": "negative-cache-hit",
+                "url": url[:200],
+                "error_class": failure["error_class"],
+                "error_type": failure["error_type"],
+            },
+        )
+        raise CachedFetchError(failure["error"])
+
+    def _forget_failure(self, url: str) -> None:
+        """The feed answered again, stop failing fast on its remembered error."""
+        cache.delete(_error_key(url))
+
+    def _remember_failure(self, url: str, error: requests.RequestException) -> None:
+        """Remember a failed fetch for a TTL depending on the kind of error."""
+        error_class = _error_class(error)
+        if error_class is None:
+            return
+
+        ttl = NEGATIVE_CACHE_TTLS[error_class].total_seconds()
+        failure = {
+            "error": str(error),
+            "error_type": type(error).__name__,
+            "error_class": error_class,
+        }
+        cache.set(_error_key(url), failure, ttl)
+        logger.debug(
+            "Calendar fetch failure cached",
+            extra={
+                "event": LogEvent.CALENDAR_FETCH,
+                "status": "negative-cached",
+                "url": url[:200],
+                "error_class": error_class,
+                "ttl_seconds": ttl,
+            },
+        )
+
+    def schedule_refresh(self, url: str) -> bool:
+        """
+        Queue a background refresh of ``url`` unless one is already queued.
+
+        Returns:
+            False if the refresh could not be queued, so the caller should
+            refresh inline; True otherwise
+        """
+        # Import here to avoid circular imports
+        from mergecalweb.calendars.tasks import refresh_feed_task  # noqa: PLC0415
+
+        queued_key = _refresh_queued_key(url)
+        if not cache.add(queued_key, 1, REFRESH_QUEUE_TTL.total_seconds()):
+            return True
+
+        try:
+            refresh_feed_task.delay(url)
+        except OperationalError as e:
+            cache.delete(queued_key)
+            logger.warning(
+                "Could not queue background calendar refresh",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "refresh-queue-failed",
+                    "url": url[:200],
+                    "error": str(e),
+                },
+            )
+            return False
+        return True
+
+    def refresh_calendar(self, url: str, timeout: int | None = None) -> None:
+        """
+        Revalidate the cached copy of ``url``, as queued by ``schedule_refresh``.
+
+        Failures are logged and the cached copy is kept.
+        """
+        cache_key = f"calendar_data_{url}"
+        cached = self._unpack_cached(cache.get(cache_key))
+        try:
+            if cached is None:
+                self._refresh(url, cache_key, timeout)
+            else:
+                content, _, validators, _ = cached
+                self._refresh(
+                    url,
+                    cache_key,
+                    timeout,
+                    content,
+                    validators,
+                    serve_stale=True,
+                )
+        except requests.RequestException as e:
+            logger.info(
+                "Background calendar refresh failed, keeping cached copy",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "refresh-failed",
+                    "url": url[:200],
+                    "error": str(e),
+                    "error_type": type(e).__name__,
+                },
+            )
+        finally:
+            cache.delete(_refresh_queued_key(url))
+
+    def feeds_due_for_refresh(self, urls: list[str]) -> list[str]:
+        """
+        Select the recently used feeds that are about to go stale.
+
+        Only the small per-URL entries are read, never the feed bodies.
+
+        Args:
+            urls: Candidate feed URLs
+
+        Returns:
+            URLs used within ``RECENT_USE_WINDOW`` whose cached copy is
+            missing or goes stale within ``REFRESH_AHEAD``
+        """
+        used = cache.get_many([_used_key(url) for url in urls])
+        recent = [url for url in urls if _used_key(url) in used]
+        if not recent:
+            return []
+
+        entries = self.read_entries(recent)
+        refresh_at = time.time() + REFRESH_AHEAD.total_seconds()
+        return [
+            url
+            for url in recent
+            if url not in entries
+            or entries[url].fetched_at + self._fresh_for(entries[url]) <= refresh_at
+        ]
+
+    def read_entries(self, urls: list[str]) -> dict[str, cache_envelope.FeedEntry]:
+        """
+        Read the cached entries for ``urls`` without loading feed bodies.
+
+        Returns:
+            Mapping of URL to its entry, for URLs with a readable entry. The
+            entry's ``content`` is None unless it came from an older format
+            that stored the body inline.
+        """
+        cached = cache.get_many([f"calendar_data_{url}" for url in urls])
+        entries = {}
+        for url in urls:
+            entry = self._read_entry(cached.get(f"calendar_data_{url}"))
+            if entry is not None:
+                entries[url] = entry
+        return entries
+
+    def _read_entry(self, cached_data) -> cache_envelope.FeedEntry | None:
+        if cached_data is None:
+            return None
+        if cache_envelope.is_envelope(cached_data):
+            try:
+                return cache_envelope.unpack(cached_data)
+            except CacheEnvelopeError:
+                return None
+
+        unpacked = self._unpack_cached(cached_data)
+        if unpacked is None:
+            return None
+        content, cached_at, validators, _ = unpacked
+        return cache_envelope.FeedEntry(
+            content=content,
+            fetched_at=cached_at,
+            validators=validators,
+            content_hash=cache_envelope.content_hash(content),
+        )
+
+    def _fresh_for(self, entry: cache_envelope.FeedEntry) -> float:
+        """Freshness lifetime of a cached entry in seconds."""
+        if entry.fresh_for is None:
+            return CACHE_TIMEOUT.total_seconds()
+        return entry.fresh_for
+
+    def _unpack_cached(
+        self,
+        cached_data,
+    ) -> tuple[bytes, float, dict[str, str], float] | None:
+        """
+        Unpack a cached entry into (content, timestamp, validators, lifetime).
+
+        The lifetime is the number of seconds the entry is fresh for after
+        its timestamp; entries without a stored one get ``CACHE_TIMEOUT``.
+
+        Entries are pointers to a body stored under its content hash (see
+        ``cache_envelope``); a pointer whose body was evicted counts as a
+        miss. Entries written before that are still read: envelopes with the
+        body inline, (content, timestamp[, validators]) tuples, and the legacy
+        bare string format, which is treated as stale to force a refresh.
+        Tuples from before content was kept as bytes hold a str, encoded here.
+
+        Returns:
+            The unpacked entry, or None if there is none or it is unreadable
+        """
+        if cached_data is None:
+            return None
+
+        if cache_envelope.is_envelope(cached_data):
+            try:
+                entry = cache_envelope.unpack(cached_data)
+                content = entry.content
+                if content is None:
+                    content = self._load_body(entry.content_hash)
+            except CacheEnvelopeError as e:
+                logger.warning(
+                    "Unreadable calendar cache entry, ignoring it",
+                    extra={
+                        "event": LogEvent.CALENDAR_FETCH,
+                        "status": "cache-corrupt",
+                        "error": str(e),
+                    },
+                )
+                return None
+            if content is None:
+                return None
+            return content, entry.fetched_at, entry.validators, self._fresh_for(entry)
+
+        content, cached_at, validators = cached_data, 0, {}
+        if isinstance(cached_data, tuple):
+            if len(cached_data) == CACHE_TUPLE_LENGTH:
+                content, cached_at, validators = cached_data
+            elif len(cached_data) == LEGACY_CACHE_TUPLE_LENGTH:
+                content, cached_at = cached_data
+
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        return content, cached_at, validators, CACHE_TIMEOUT.total_seconds()
+
+    def _refresh(  # noqa: PLR0913
+        self,
+        url: str,
+        cache_key: str,
+        timeout: int | None,
+        content: bytes | None = None,
+        validators: dict[str, str] | None = None,
+        *,
+        serve_stale: bool = False,
+    ) -> bytes:
+        """
+        Refresh a feed from the upstream with at most one fetch in flight.
+
+        The caller that wins the fetch lock revalidates the feed. Other
+        callers return their stale copy when ``serve_stale`` is set, or wait
+        briefly for the leader's result; if none arrives they fetch themselves.
+        """
+        effective_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+
+        with single_flight.fetch_lock(url, effective_timeout) as is_leader:
+            if is_leader:
+                single_flight.record("leader")
+                return self._revalidate(url, cache_key, timeout, content, validators)
+
+        if serve_stale and content is not None:
+            single_flight.record("coalesced")
+            logger.debug(
+                "Calendar refresh in progress elsewhere, using stale cache",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "coalesced-using-stale",
+                    "url": url[:200],
+                },
+            )
+            return content
+
+        if single_flight.wait_for_leader(url, effective_timeout):
+            cached = self._unpack_cached(cache.get(cache_key))
+            if cached is not None:
+                fresh_content, cached_at, _, fresh_for = cached
+                if time.time() - cached_at < fresh_for:
+                    single_flight.record("coalesced")
+                    logger.debug(
+                        "Calendar fetched by concurrent caller, using its result",
+                        extra={
+                            "event": LogEvent.CALENDAR_FETCH,
+                            "status": "coalesced",
+                            "url": url[:200],
+                        },
+                    )
+                    return fresh_content
+
+        single_flight.record("fallback")
+        logger.debug(
+            "Concurrent calendar fetch unavailable, fetching directly",
+            extra={
+                "event": LogEvent.CALENDAR_FETCH,
+                "status": "coalesce-fallback",
+                "url": url[:200],
+            },
+        )
+        return self._revalidate(url, cache_key, timeout, content, validators)
+
+    def _revalidate(
+        self,
+        url: str,
+        cache_key: str,
+        timeout: int | None,
+        content: bytes | None = None,
+        validators: dict[str, str] | None = None,
+    ) -> bytes:
+        """
+        Refresh cached content, reusing it if the upstream reports no change.
+
+        Sends the stored validators as a conditional request; on 304 the
+        cached content is kept and only its timestamp is bumped.
+        """
+        if content is None:
+            response = self._fetch_from_remote(url, timeout)
+        else:
+            response = self._fetch_from_remote(url, timeout, validators)
+
+        if response.not_modified:
+            # Only the conditional request, sent with cached content, gets a 304
+            assert content is not None  # type guard
+            digest = self._cache_content(
+                cache_key,
+                content,
+                {**(validators or {}), **response.validators},
+                response.fresh_for,
+            )
+            change_rate.record(url, digest)
+            return content
+
+        assert response.content is not None  # type guard
+        digest = self._cache_content(
+            cache_key,
+            response.content,
+            response.validators,
+            response.fresh_for,
+        )
+        change_rate.record(url, digest)
+        return response.content
 
-    def _fetch_from_remote(self, url: str, timeout: int | None = None) -> str:
+    def _fetch_from_remote(
+        self,
+        url: str,
+        timeout: int | None = None,
+        validators: dict[str, str] | None = None,
+    ) -> RemoteResponse:
         """
         Fetch calendar data from remote URL.
 
         Args:
             url: Calendar URL to fetch
             timeout: Request timeout in seconds
+            validators: Stored ``etag``/``last_modified`` values; when given,
+                the request is made conditional
 
         Returns:
-            Calendar data as string
+            RemoteResponse with the calendar data (None if not modified)
+                and the upstream validators
 
         Raises:
+            CircuitOpenError: If the host is failing and no request was sent
             requests.RequestException: If fetch fails
         """
         start_time = time.time()
+        host = circuit_breaker.host_for(url)
+        if not circuit_breaker.allow_request(host):
+            logger.debug(
+                "Calendar host circuit open, skipping fetch",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "circuit-open",
+                    "url": url[:200],
+                    "host": host,
+                },
+            )
+            msg = f"Skipped fetch, {host} is failing (circuit open)"
+            raise CircuitOpenError(msg)
+
+        headers = self.build_headers(url, validators)
+        policy = get_domain_policy(host)
+        effective_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        if policy.timeout is not None:
+            # Hosts with a policy timeout never get longer than it
+            effective_timeout = min(effective_timeout, policy.timeout)
+
+        try:
+            response = http_client.get(
+                url,
+                headers=headers,
+                timeout=effective_timeout,
+                policy=policy,
+                sniff=True,
+            )
+        except HostBusyError:
+            # Our own per-host limit kept the request from being sent
+            raise
+        except requests.RequestException as e:
+            if isinstance(e, requests.Timeout):
+                # At least this slow; orders the source without growing its timeout
+                latency.record_timeout(url, effective_timeout)
+            self._remember_failure(url, e)
+            if circuit_breaker.is_host_failure(e):
+                circuit_breaker.record_failure(host)
+            else:
+                # The host answered, the failure is specific to this feed
+                circuit_breaker.record_success(host)
+            raise
+        circuit_breaker.record_success(host)
+        latency.record(url, time.time() - start_time)
+        self._forget_failure(url)
+        response_validators = self.extract_validators(response.headers)
+        fresh_for = self.freshness_lifetime(url, response.headers)
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            logger.debug(
+                "Calendar not modified on remote source",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "not-modified",
+                    "url": url[:200],
+                    "status_code": response.status_code,
+                    "duration_seconds": round(time.time() - start_time, 2),
+                },
+            )
+            return RemoteResponse(
+                content=None,
+                validators=response_validators,
+                fresh_for=fresh_for,
+            )
+
+        # Kept as bytes; icalendar decodes while parsing
+        calendar_data = response.content
+
+        fetch_duration = time.time() - start_time
+        logger.debug(
+            "Calendar fetched successfully from remote source",
+            extra={
+                "event": LogEvent.CALENDAR_FETCH,
+                "status": "success",
+                "url": url[:200],
+                "status_code": response.status_code,
+                "size_bytes": len(calendar_data),
+                "duration_seconds": round(fetch_duration, 2),
+            },
+        )
+        return RemoteResponse(
+            content=calendar_data,
+            validators=response_validators,
+            fresh_for=fresh_for,
+        )
+
+    def build_headers(
+        self,
+        url: str,
+        validators: dict[str, str] | None = None,
+    ) -> dict[str, str]:
+        """
+        Build the request headers for fetching ``url``.
 
-        # Get domain-specific configuration if available
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        domain_config = get_domain_config(domain)
+        Args:
+            url: Calendar URL to fetch
+            validators: Stored ``etag``/``last_modified`` values; when given,
+                the request is made conditional
+
+        Returns:
+            Default headers with any domain-specific overrides applied
+        """
+        # Get the host's policy, if it has one
+        domain = urlparse(url).hostname or ""
+        policy = get_domain_policy(domain)
 
         # Build headers with domain-specific overrides
         headers = {
@@ -157,13 +731,12 @@ class CalendarFetcher:
         }
 
         # Apply domain-specific overrides
-        if domain_config:
-            if "user_agent" in domain_config:
-                headers["User-Agent"] = domain_config["user_agent"]
-            if "accept" in domain_config:
-                headers["Accept"] = domain_config["accept"]
-            if "additional_headers" in domain_config:
-                headers.update(domain_config["additional_headers"])
+        if policy is not DEFAULT_POLICY:
+            if policy.user_agent:
+                headers["User-Agent"] = policy.user_agent
+            if policy.accept:
+                headers["Accept"] = policy.accept
+            headers.update(policy.additional_headers)
 
             logger.debug(
                 "Applied domain-specific calendar fetch configuration",
@@ -171,48 +744,162 @@ class CalendarFetcher:
                     "event": LogEvent.CALENDAR_FETCH,
                     "status": "domain-config",
                     "domain": domain,
-                    "has_custom_ua": "user_agent" in domain_config,
-                    "has_custom_accept": "accept" in domain_config,
+                    "pattern": policy.pattern,
+                    "has_custom_ua": policy.user_agent is not None,
+                    "has_custom_accept": policy.accept is not None,
                 },
             )
 
-        effective_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        # Make the request conditional so unchanged feeds answer 304
+        if validators:
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last_modified" in validators:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        return headers
 
-        response = requests.get(
-            url,
-            headers=headers,
-            timeout=effective_timeout,
+    def extract_validators(self, headers) -> dict[str, str]:
+        """Extract the cache validators from upstream response headers."""
+        validators = {}
+        if etag := headers.get("ETag"):
+            validators["etag"] = etag
+        if last_modified := headers.get("Last-Modified"):
+            validators["last_modified"] = last_modified
+        return validators
+
+    def freshness_lifetime(self, url: str, headers) -> float:
+        """
+        Seconds a response for ``url`` may be served without revalidation.
+
+        Based on the upstream's caching headers and how often the feed was
+        seen to change, but never shorter than the host policy's minimum
+        refresh interval.
+        """
+        lifetime = freshness.lifetime(
+            headers,
+            default=CACHE_TIMEOUT.total_seconds(),
+            learned=change_rate.learned_lifetime(url),
         )
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        calendar_data = response.text
+        policy = get_domain_policy(urlparse(url).hostname or "")
+        if policy.min_refresh_interval is not None:
+            lifetime = max(lifetime, policy.min_refresh_interval)
+        return lifetime
 
-        fetch_duration = time.time() - start_time
-        logger.debug(
-            "Calendar fetched successfully from remote source",
-            extra={
-                "event": LogEvent.CALENDAR_FETCH,
-                "status": "success",
-                "url": url[:200],
-                "status_code": response.status_code,
-                "size_bytes": len(calendar_data),
-                "duration_seconds": round(fetch_duration, 2),
-            },
+    def _load_body(self, digest: str) -> bytes | None:
+        """Load a feed body by content hash, or None if it was evicted."""
+        data = cache.get(cache_envelope.body_key(digest))
+        if data is None:
+            logger.debug(
+                "Calendar cache body missing for pointer",
+                extra={
+                    "event": LogEvent.CALENDAR_FETCH,
+                    "status": "cache-body-missing",
+                    "content_hash": digest,
+                },
+            )
+            return None
+        return cache_envelope.unpack_body(data)
+
+    def get_content_hash(self, url: str) -> str | None:
+        """
+        Return the content hash of the cached body for ``url``.
+
+        The hash identifies the feed body regardless of the URL it was
+        fetched from, so it tells whether work derived from a feed is
+        still current without loading the body.
+
+        Returns:
+            The SHA-256 hex digest, or None if the URL has no readable entry
+        """
+        entry = self._read_entry(cache.get(f"calendar_data_{url}"))
+        return entry.content_hash if entry else None
+
+    def store(
+        self,
+        url: str,
+        content: bytes,
+        validators: dict[str, str] | None = None,
+        fresh_for: float | None = None,
+    ) -> str:
+        """
+        Cache a freshly fetched body for ``url``.
+
+        Returns:
+            The content hash of the body
+        """
+        self._forget_failure(url)
+        return self._cache_content(
+            f"calendar_data_{url}",
+            content,
+            validators,
+            fresh_for,
         )
-        return calendar_data
 
-    def _cache_content(self, cache_key: str, content: str) -> None:
+    def store_not_modified(
+        self,
+        url: str,
+        entry: cache_envelope.FeedEntry,
+        validators: dict[str, str] | None = None,
+        fresh_for: float | None = None,
+    ) -> bool:
+        """
+        Mark the cached body for ``url`` as revalidated by a 304 response.
+
+        Returns:
+            False if the body was evicted meanwhile and nothing was updated
+        """
+        validators = {**entry.validators, **(validators or {})}
+        if entry.content is not None:
+            self.store(url, entry.content, validators, fresh_for)
+            return True
+
+        self._forget_failure(url)
+        ttl = MAX_STALE_AGE.total_seconds()
+        if not cache.touch(cache_envelope.body_key(entry.content_hash), ttl):
+            return False
+        cached_value = cache_envelope.pack(
+            entry.content_hash,
+            time.time(),
+            validators,
+            fresh_for,
+        )
+        cache.set(f"calendar_data_{url}", cached_value, ttl)
+        return True
+
+    def _cache_content(
+        self,
+        cache_key: str,
+        content: bytes,
+        validators: dict[str, str] | None = None,
+        fresh_for: float | None = None,
+    ) -> str:
         """
         Cache calendar content with current timestamp.
 
+        The body is stored once under its content hash, shared by every URL
+        serving the same bytes; the URL itself only gets a small pointer.
+
         Args:
             cache_key: Cache key to use
             content: Calendar data to cache
+            validators: Upstream ``etag``/``last_modified`` values, if any
+            fresh_for: Freshness lifetime in seconds, ``CACHE_TIMEOUT`` if None
+
+        Returns:
+            The content hash of the body
         """
-        # Store tuple of (content, timestamp) with long TTL
-        # The long TTL keeps stale data available as fallback
-        cached_value = (content, time.time())
-        cache.set(cache_key, cached_value, MAX_STALE_AGE.total_seconds())
+        # Store a pointer of (content hash, timestamp, lifetime, validators)
+        # with long TTL. The long TTL keeps stale data available as fallback
+        ttl = MAX_STALE_AGE.total_seconds()
+        digest = cache_envelope.content_hash(content)
+        body_key = cache_envelope.body_key(digest)
+        # Extend a body shared with other URLs instead of rewriting it
+        stored_body = not cache.touch(body_key, ttl)
+        if stored_body:
+            cache.set(body_key, cache_envelope.pack_body(content), ttl)
+        cached_value = cache_envelope.pack(digest, time.time(), validators, fresh_for)
+        cache.set(cache_key, cached_value, ttl)
 
         logger.debug(
             "Calendar data cached with timestamp",
@@ -220,7 +907,12 @@ class CalendarFetcher:
                 "event": LogEvent.CALENDAR_FETCH,
                 "status": "cached",
                 "cache_key": cache_key,
-                "ttl_seconds": MAX_STALE_AGE.total_seconds(),
+                "ttl_seconds": ttl,
                 "size_bytes": len(content),
+                "content_hash": digest,
+                "stored_body": stored_body,
+                "has_validators": bool(validators),
+                "fresh_for_seconds": fresh_for,
             },
         )
+        return digest
@@ -0,0 +1,93 @@
+"""
+Freshness lifetime of fetched feeds, from upstream caching headers.
+
+Upstreams declare how long a response stays fresh with ``Cache-Control``
+(``s-maxage``, then ``max-age``) or ``Expires``, minus the ``Age`` it already
+spent in caches on the way. MergeCal acts as a shared cache for its users,
+so ``s-maxage`` wins over ``max-age``, and ``no-cache``/``no-store`` mean the
+feed should be revalidated as often as allowed.
+
+The lifetime is clamped between ``CALENDAR_FEED_MIN_FRESHNESS`` and
+``CALENDAR_FEED_MAX_FRESHNESS``, so a misconfigured upstream can neither make
+us refetch constantly nor freeze a feed for days.
+"""
+
+import time
+
+from django.conf import settings
+from django.utils.http import parse_http_date_safe
+
+NO_REUSE_DIRECTIVES = ("no-cache", "no-store")
+LIFETIME_DIRECTIVES = ("s-maxage", "max-age")
+
+
+def parse_cache_control(header: str) -> dict[str, str | None]:
+    """Parse a ``Cache-Control`` header into lowercase directives."""
+    directives = {}
+    for part in header.split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else None
+    return directives
+
+
+def declared_lifetime(headers) -> float | None:
+    """
+    Seconds a response stays fresh according to its headers.
+
+    Returns:
+        The remaining lifetime (never negative), or None if the headers do
+        not declare one
+    """
+    cache_control = parse_cache_control(headers.get("Cache-Control", ""))
+    if any(directive in cache_control for directive in NO_REUSE_DIRECTIVES):
+        return 0
+
+    lifetime: float | None = None
+    for directive in LIFETIME_DIRECTIVES:
+        value = cache_control.get(directive)
+        if value is not None and value.isdigit():
+            lifetime = int(value)
+            break
+
+    if lifetime is None:
+        expires = parse_http_date_safe(headers.get("Expires", ""))
+        if expires is None:
+            return None
+        date = parse_http_date_safe(headers.get("Date", "")) or time.time()
+        lifetime = expires - date
+
+    age = headers.get("Age", "")
+    if age.isdigit():
+        lifetime -= int(age)
+    return max(lifetime, 0)
+
+
+def lifetime(headers, default: float, learned: float | None = None) -> float:
+    """
+    Freshness lifetime to store with a fetched feed.
+
+    Once the feed has a change history (see ``change_rate``), the declared
+    lifetime only acts as a minimum: a feed seen to change rarely stays
+    fresh for longer, which matters most for upstreams sending ``no-cache``
+    on feeds that change a few times a week.
+
+    Args:
+        headers: Upstream response headers
+        default: Lifetime when neither headers nor history give one
+        learned: Lifetime suggested by the feed's change history, if known
+
+    Returns:
+        Seconds, clamped to the configured bounds
+    """
+    declared = declared_lifetime(headers)
+    if learned is not None:
+        seconds = max(declared or 0, learned)
+    elif declared is not None:
+        seconds = declared
+    else:
+        seconds = default
+    return min(
+        max(seconds, settings.CALENDAR_FEED_MIN_FRESHNESS),
+        settings.CALENDAR_FEED_MAX_FRESHNESS,
+    )
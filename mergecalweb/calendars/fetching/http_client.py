@@ -0,0 +1,201 @@
+"""
+Shared, pooled HTTP client for calendar fetching.
+
+All outbound calendar requests go through a single ``httpx.Client`` per
+process so that connections to the same hosts (Google, Outlook, Meetup, ...)
+are kept alive and reused across sources and refreshes. HTTP/2 is used when
+the optional ``h2`` package is installed.
+
+The client is created lazily and recreated in forked children (gunicorn and
+Celery prefork workers), since pooled sockets must never be shared between
+processes. A per-host semaphore bounds concurrent requests to any one host.
+Hosts with a ``DomainPolicy`` can lower that limit, opt out of HTTP/2 (served
+by a second, HTTP/1.1-only client) and cap the accepted body size. Bodies are
+streamed and checked as they arrive (see ``feed_body``), so memory per fetch
+stays bounded.
+
+Errors are raised as ``requests`` exceptions so that callers keep a single
+exception contract (``requests.RequestException``) for network failures.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+from mergecalweb.calendars.exceptions import HostBusyError
+from mergecalweb.calendars.fetching.domain_configs import DEFAULT_POLICY
+from mergecalweb.calendars.fetching.domain_configs import DomainPolicy
+from mergecalweb.calendars.fetching.feed_body import FeedBodyReader
+from mergecalweb.calendars.fetching.feed_body import max_body_size
+
+MAX_CONNECTIONS = 100  # Total pooled connections per process
+MAX_KEEPALIVE_CONNECTIONS = 20  # Idle connections kept open for reuse
+KEEPALIVE_EXPIRY = 30  # Seconds an idle connection is kept open
+MAX_CONNECTIONS_PER_HOST = 6  # Concurrent requests allowed to a single host
+DEFAULT_TIMEOUT = 30
+# Headers describing the body on the wire, dropped once it has been decoded
+DECODED_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+_clients: dict[bool, httpx.Client] = {}  # Keyed by whether HTTP/2 is enabled
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+
+def _build_client(*, http2: bool) -> httpx.Client:
+    return httpx.Client(
+        http2=http2,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client(*, http2: bool = True) -> httpx.Client:
+    """
+    Return the process-wide HTTP client, creating it if needed.
+
+    Args:
+        http2: Whether the client may use HTTP/2; only has an effect when
+            the optional ``h2`` package is installed
+    """
+    global _client_pid  # noqa: PLW0603
+
+    http2 = http2 and HTTP2_ENABLED
+    pid = os.getpid()
+    if _client_pid != pid or http2 not in _clients:
+        with _client_lock:
+            if _client_pid != pid:
+                _clients.clear()
+                _client_pid = pid
+            if http2 not in _clients:
+                _clients[http2] = _build_client(http2=http2)
+    return _clients[http2]
+
+
+def _reset_after_fork() -> None:
+    """Drop the inherited client; its sockets belong to the parent process."""
+    global _client_pid, _client_lock  # noqa: PLW0603
+
+    _clients.clear()
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _host_semaphores.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_host_semaphore(host: str, limit: int) -> threading.BoundedSemaphore:
+    with _client_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+        return _host_semaphores[host]
+
+
+def get(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    policy: DomainPolicy = DEFAULT_POLICY,
+    sniff: bool = False,
+) -> httpx.Response:
+    """
+    Send a GET request using the shared client.
+
+    The body is streamed through a ``FeedBodyReader``, so oversized or (with
+    ``sniff``) non-calendar responses are abandoned early instead of being
+    downloaded whole.
+
+    Args:
+        url: URL to fetch
+        headers: Request headers
+        timeout: Time budget in seconds, shared by the wait for a host slot
+            and the request
+        policy: Policy of the URL's host, for its concurrency limit, HTTP/2
+            preference and maximum body size
+        sniff: Reject bodies that do not start an iCalendar object
+
+    Returns:
+        The response with its body read; redirects are followed and 304 is
+        returned as is
+
+    Raises:
+        HostBusyError: If no slot to the host freed up within the budget; the
+            request was not sent, so this says nothing about the host
+        requests.Timeout: If the request timed out
+        requests.HTTPError: If the response has a 4xx/5xx status code
+        FeedTooLargeError: If the body exceeds the maximum size
+        NotICalendarError: If ``sniff`` is set and the body is not iCalendar
+        requests.RequestException: For any other transport error
+    """
+    host = urlparse(url).hostname or ""
+    semaphore = _get_host_semaphore(
+        host,
+        policy.max_concurrency or MAX_CONNECTIONS_PER_HOST,
+    )
+    slot_wait_start = time.monotonic()
+    if not semaphore.acquire(timeout=timeout):
+        msg = f"Timed out waiting for a connection slot to {host}"
+        raise HostBusyError(msg)
+
+    try:
+        timeout -= time.monotonic() - slot_wait_start
+        if timeout <= 0:
+            msg = f"No time left for the request after waiting for {host}"
+            raise HostBusyError(msg)
+        client = get_client(http2=policy.http2 is not False)
+        with client.stream("GET", url, headers=headers, timeout=timeout) as response:
+            if response.status_code >= HTTPStatus.BAD_REQUEST:
+                msg = (
+                    f"{response.status_code} Error: {response.reason_phrase} "
+                    f"for url: {response.url}"
+                )
+                raise requests.HTTPError(msg, response=response)
+
+            reader = FeedBodyReader(
+                url,
+                max_size=max_body_size(policy),
+                sniff=sniff and response.status_code != HTTPStatus.NOT_MODIFIED,
+                content_length=response.headers.get("Content-Length"),
+            )
+            for chunk in response.iter_bytes():
+                reader.feed(chunk)
+            return _with_body(response, reader.finish())
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(str(e)) from e
+    except httpx.InvalidURL as e:
+        raise requests.exceptions.InvalidURL(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(str(e)) from e
+    finally:
+        semaphore.release()
+
+
+def _with_body(response: httpx.Response, content: bytes) -> httpx.Response:
+    """Copy a streamed response with its already decoded body attached."""
+    headers = [
+        (name, value)
+        for name, value in response.headers.multi_items()
+        if name.lower() not in DECODED_BODY_HEADERS
+    ]
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        content=content,
+        request=response.request,
+        extensions=response.extensions,
+        history=response.history,
+    )
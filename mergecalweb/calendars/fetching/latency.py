@@ -0,0 +1,131 @@
+"""
+Per-URL fetch latency history.
+
+Every remote fetch records how long the upstream took, in the shared cache
+so all workers contribute to and benefit from the same history. The history
+keeps an exponentially weighted moving average and the most recent samples,
+from which percentiles are computed.
+
+``SourceService`` uses it to give each source a timeout matching its own
+history instead of a share of the request budget, and to start historically
+slow sources first so they do not end up as the tail of the request.
+
+Timed-out fetches only say the upstream took at least the timeout, so they
+count towards the moving average (which orders sources) but not towards the
+samples that timeouts are derived from. Otherwise every timeout would raise
+the p95, and the next timeout would be ``TIMEOUT_HEADROOM`` times larger,
+until a dead feed used the whole request budget.
+
+Updates are read-modify-write without a lock; a sample lost to a concurrent
+update only makes the history slightly less precise.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.core.cache import cache
+
+EWMA_ALPHA = 0.3  # Weight of the newest sample in the moving average
+MAX_SAMPLES = 20  # Recent samples kept for percentiles
+MIN_SAMPLES = 3  # Samples needed before the history drives timeouts
+HISTORY_TTL = timedelta(days=7)
+# A source's timeout is its p95 latency times this, so ordinary variance
+# does not turn into spurious timeouts
+TIMEOUT_HEADROOM = 3
+
+
+def _history_key(url: str) -> str:
+    return f"calendar_latency_{url}"
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    """Fetch latency history of one URL, in seconds."""
+
+    ewma: float
+    samples: tuple[float, ...]
+
+    def percentile(self, percent: float) -> float:
+        """Nearest-rank percentile of the recent samples."""
+        ordered = sorted(self.samples)
+        rank = math.ceil(percent / 100 * len(ordered))
+        return ordered[max(rank, 1) - 1]
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> float:
+        return self.percentile(95)
+
+
+def record(url: str, duration_seconds: float) -> None:
+    """Add a fetch duration to the history of ``url``."""
+    _update(url, duration_seconds, timed_out=False)
+
+
+def record_timeout(url: str, timeout_seconds: float) -> None:
+    """Note a fetch of ``url`` that timed out, without adding a sample."""
+    _update(url, timeout_seconds, timed_out=True)
+
+
+def _update(url: str, duration_seconds: float, *, timed_out: bool) -> None:
+    key = _history_key(url)
+    history = cache.get(key)
+    if history is None:
+        ewma, samples = duration_seconds, []
+    else:
+        ewma = EWMA_ALPHA * duration_seconds + (1 - EWMA_ALPHA) * history["ewma"]
+        samples = history["samples"]
+    if not timed_out:
+        samples = [*samples, round(duration_seconds, 3)][-MAX_SAMPLES:]
+    cache.set(
+        key,
+        {"ewma": round(ewma, 3), "samples": samples},
+        HISTORY_TTL.total_seconds(),
+    )
+
+
+def get_stats(urls: list[str]) -> dict[str, LatencyStats]:
+    """
+    Read the latency history of ``urls`` in one cache round trip.
+
+    Returns:
+        Mapping of URL to its history, for URLs with at least
+        ``MIN_SAMPLES`` recorded fetches
+    """
+    histories = cache.get_many([_history_key(url) for url in urls])
+    stats = {}
+    for url in urls:
+        history = histories.get(_history_key(url))
+        if history is not None and len(history["samples"]) >= MIN_SAMPLES:
+            stats[url] = LatencyStats(
+                ewma=history["ewma"],
+                samples=tuple(history["samples"]),
+            )
+    return stats
+
+
+def timeout_for(
+    stats: LatencyStats | None,
+    *,
+    default: int,
+    minimum: int,
+    maximum: int,
+) -> int:
+    """
+    Pick a fetch timeout from a URL's latency history.
+
+    Args:
+        stats: The URL's history, None if there is not enough of it
+        default: Timeout to use without history
+        minimum: Lower bound, so fast hosts still get a reasonable timeout
+        maximum: Upper bound, usually what is left of the request budget
+
+    Returns:
+        Timeout in whole seconds
+    """
+    timeout = default if stats is None else math.ceil(stats.p95 * TIMEOUT_HEADROOM)
+    return min(max(timeout, minimum), maximum)
@@ -0,0 +1,116 @@
+"""
+Cross-process single-flight for remote calendar fetches.
+
+When a popular feed's cache entry is missing or stale, every web worker and
+Celery task that needs it would otherwise hit the upstream at the same time.
+A short-lived lock in the shared cache (Redis in production, ``SET NX`` via
+``cache.add``) elects one caller to fetch; the others either serve their
+stale copy or wait briefly for the leader's result. The generic ``lock`` and
+``wait_until_released`` helpers also guard rebuilds of merged calendars.
+
+Outcomes are counted in the cache so coalescing can be monitored:
+- "leader": the caller fetched from the upstream
+- "coalesced": the caller reused the leader's result or its stale copy
+- "fallback": the leader took too long or failed, so the caller fetched itself
+"""
+
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+LOCK_MARGIN = 5  # Seconds a lock outlives the fetch timeout it guards
+WAIT_TIMEOUT = 5  # Maximum seconds a follower waits for the leader
+POLL_INTERVAL = 0.1  # Seconds between checks while waiting for the leader
+
+OUTCOMES = ("leader", "coalesced", "fallback")
+
+
+def _lock_key(url: str) -> str:
+    return f"calendar_fetch_lock_{url}"
+
+
+def _counter_key(outcome: str) -> str:
+    return f"calendar_fetch_single_flight_{outcome}"
+
+
+@contextmanager
+def lock(key: str, ttl: float) -> Iterator[bool]:
+    """
+    Try to take the short-lived lock stored under ``key``.
+
+    Args:
+        key: Cache key of the lock
+        ttl: Seconds after which the lock expires, so a crashed holder
+            cannot block other callers forever
+
+    Yields:
+        True if this caller holds the lock
+    """
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, ttl)
+    try:
+        yield acquired
+    finally:
+        # Only release our own lock, never one taken over after expiry
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def wait_until_released(key: str, timeout: float) -> bool:
+    """
+    Wait until nobody holds the lock stored under ``key``.
+
+    Returns:
+        True if the lock was released within ``timeout`` seconds
+    """
+    deadline = time.monotonic() + timeout
+    while cache.get(key) is not None:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+    return True
+
+
+def fetch_lock(url: str, timeout: float) -> AbstractContextManager[bool]:
+    """
+    Try to become the single caller fetching ``url``.
+
+    Args:
+        url: Calendar URL being fetched
+        timeout: Fetch timeout in seconds; the lock expires shortly after it
+
+    Returns:
+        Context manager yielding True if this caller should fetch
+    """
+    return lock(_lock_key(url), timeout + LOCK_MARGIN)
+
+
+def wait_for_leader(url: str, timeout: float) -> bool:
+    """
+    Wait briefly until no caller holds the fetch lock for ``url``.
+
+    Returns:
+        True if the lock was released within ``timeout`` seconds
+    """
+    return wait_until_released(_lock_key(url), min(timeout, WAIT_TIMEOUT))
+
+
+def record(outcome: str) -> None:
+    """Increment the counter for a single-flight outcome."""
+    key = _counter_key(outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter was evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats() -> dict[str, int]:
+    """Return the single-flight outcome counters."""
+    values = cache.get_many([_counter_key(outcome) for outcome in OUTCOMES])
+    return {outcome: values.get(_counter_key(outcome), 0) for outcome in OUTCOMES}
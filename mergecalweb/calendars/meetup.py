@@ -11,6 +11,7 @@ from bs4 import BeautifulSoup
 from icalendar import Calendar as Ical
 from icalendar import Event
 
+from mergecalweb.calendars.fetching import http_client
 from mergecalweb.core.logging_events import LogEvent
 
 logger = logging.getLogger(__name__)
@@ -142,8 +143,7 @@ def fetch_and_create_meetup_calendar(meetup_url: str) -> Ical | None:
         is_meetup_url(meetup_url)
         meetup_group_name = extract_meetup_group_name(meetup_url)
         meetup_api_url = f"https://api.meetup.com/{meetup_group_name}/events"
-        response = requests.get(meetup_api_url, timeout=10)
-        response.raise_for_status()
+        response = http_client.get(meetup_api_url, timeout=10)
         meetup_events = response.json()
         return create_calendar_from_meetup_api_response(
             meetup_events,
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+TASK_NAME = "Refresh recently used feeds"
+TASK_PATH = "mergecalweb.calendars.tasks.refresh_recent_feeds_task"
+
+
+def schedule_sweeper(apps, schema_editor):
+    IntervalSchedule = apps.get_model("django_celery_beat", "IntervalSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    every_minute, _ = IntervalSchedule.objects.get_or_create(
+        every=1,
+        period="minutes",
+    )
+    PeriodicTask.objects.get_or_create(
+        name=TASK_NAME,
+        defaults={"task": TASK_PATH, "interval": every_minute},
+    )
+
+
+def unschedule_sweeper(apps, schema_editor):
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name=TASK_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0013_alter_calendar_timezone'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_sweeper, unschedule_sweeper),
+    ]
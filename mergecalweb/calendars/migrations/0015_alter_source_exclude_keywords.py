@@ -0,0 +1,19 @@
+# Generated by Django 5.0.11 on 2026-10-17 03:26
+
+import mergecalweb.calendars.services.source_rules
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0014_schedule_refresh_recent_feeds'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='source',
+            name='exclude_keywords',
+            field=models.TextField(blank=True, help_text="Enter keywords separated by commas. Events from this feed containing these keywords in their title will be excluded from the merged calendar. Use 'regex:pattern' to match titles with a regular expression, and 'before:YYYY-MM-DD' or 'after:YYYY-MM-DD' to exclude events by start date.", validators=[mergecalweb.calendars.services.source_rules.validate_exclude_keywords], verbose_name='Exclude Keywords'),
+        ),
+    ]
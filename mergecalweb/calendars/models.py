@@ -15,7 +15,9 @@ from django.utils.translation import gettext_lazy as _
 from icalendar import Calendar as Ical
 from requests.exceptions import RequestException
 
+from mergecalweb.calendars.exceptions import NotICalendarError
 from mergecalweb.calendars.fetching import CalendarFetcher
+from mergecalweb.calendars.services.source_rules import validate_exclude_keywords
 from mergecalweb.core.constants import SourceLimits
 from mergecalweb.core.logging_events import LogEvent
 from mergecalweb.core.models import TimeStampedModel
@@ -32,33 +34,40 @@ TWELVE_HOURS_IN_SECONDS = 43200
 CACHE_BYPASS_HOURS = 3  # Hours to disable CDN cache after calendar modification
 MIN_BYPASS_CACHE_TTL_SECONDS = 30  # Server cache TTL during bypass (30 sec)
 MAX_ERROR_MESSAGE_LENGTH = 200  # Maximum length for error messages shown to users
+HTML_RESPONSE_MESSAGE = "The URL returned an HTML page instead of an iCalendar feed. Please check the URL and ensure it points to a calendar feed, not a web page."
+
+
+def _validate_local_calendar_url(url) -> bool:
+    """Validate a URL of a MergeCal calendar, False if it is not one."""
+    calendar_uuid = parse_calendar_uuid(url)
+    if not calendar_uuid:
+        return False
+    if not Calendar.objects.filter(uuid=calendar_uuid).exists():
+        msg = "The specified MergeCal calendar does not exist."
+        logger.warning(
+            "Validation failed: Local calendar not found",
+            extra={
+                "event": LogEvent.VALIDATION,
+                "validation_type": "ical-url",
+                "status": "failed",
+                "error_type": "local-not-found",
+                "calendar_uuid": calendar_uuid,
+                "url": url,
+            },
+        )
+        raise ValidationError(msg)
+    logger.debug(
+        "Local calendar URL validated successfully: uuid=%s",
+        calendar_uuid,
+    )
+    return True
 
 
 def validate_ical_url(url):
     logger.debug("Validating iCal URL: %s", url)
 
-    if is_local_url(url):
-        calendar_uuid = parse_calendar_uuid(url)
-        if calendar_uuid:
-            if not Calendar.objects.filter(uuid=calendar_uuid).exists():
-                msg = "The specified MergeCal calendar does not exist."
-                logger.warning(
-                    "Validation failed: Local calendar not found",
-                    extra={
-                        "event": LogEvent.VALIDATION,
-                        "validation_type": "ical-url",
-                        "status": "failed",
-                        "error_type": "local-not-found",
-                        "calendar_uuid": calendar_uuid,
-                        "url": url,
-                    },
-                )
-                raise ValidationError(msg)
-            logger.debug(
-                "Local calendar URL validated successfully: uuid=%s",
-                calendar_uuid,
-            )
-            return  # URL is valid, exit the function
+    if is_local_url(url) and _validate_local_calendar_url(url):
+        return  # URL is valid, exit the function
 
     # if url is meetup.com, skip validation
     if "meetup.com" in url:
@@ -72,10 +81,8 @@ def validate_ical_url(url):
         response = fetcher.fetch_calendar(url, timeout=10)
 
         # Check if response looks like HTML instead of iCalendar
-        if response.lstrip().startswith("<!DOCTYPE") or response.lstrip().startswith(
-            "<html",
-        ):
-            msg = "The URL returned an HTML page instead of an iCalendar feed. Please check the URL and ensure it points to a calendar feed, not a web page."
+        if response.lstrip().startswith((b"<!DOCTYPE", b"<html")):
+            msg = HTML_RESPONSE_MESSAGE
             logger.warning(
                 "iCal URL validation failed (HTML detected)",
                 extra={
@@ -84,7 +91,10 @@ def validate_ical_url(url):
                     "status": "failed",
                     "error_type": "html-detected",
                     "url": url,
-                    "response_preview": response[:MAX_ERROR_MESSAGE_LENGTH],
+                    "response_preview": response[:MAX_ERROR_MESSAGE_LENGTH].decode(
+                        "utf-8",
+                        errors="replace",
+                    ),
                 },
             )
             raise ValidationError(msg)
@@ -99,6 +109,26 @@ def validate_ical_url(url):
                 "url": url,
             },
         )
+    except NotICalendarError as err:
+        # Bodies are rejected while downloading unless they start an iCalendar
+        # object; HTML pages get the more helpful message
+        is_html = "HTML page" in str(err)
+        logger.warning(
+            "iCal URL validation failed (not iCalendar while downloading)",
+            extra={
+                "event": LogEvent.VALIDATION,
+                "validation_type": "ical-url",
+                "status": "failed",
+                "error_type": "html-detected" if is_html else "not-calendar",
+                "url": url,
+            },
+        )
+        msg = (
+            HTML_RESPONSE_MESSAGE
+            if is_html
+            else f"Enter a valid iCalendar feed. Details: {err}"
+        )
+        raise ValidationError(msg) from err
     except RequestException as err:
         msg = f"Enter a valid URL. Details: {err}"
         logger.exception(
@@ -116,7 +146,7 @@ def validate_ical_url(url):
         # Check if the error is about HTML content
         err_str = str(err)
         if "<!DOCTYPE" in err_str or "<html" in err_str:
-            msg = "The URL returned an HTML page instead of an iCalendar feed. Please check the URL and ensure it points to a calendar feed, not a web page."
+            msg = HTML_RESPONSE_MESSAGE
             logger.warning(
                 "iCal URL validation failed (HTML in error)",
                 extra={
@@ -409,7 +439,8 @@ class Source(TimeStampedModel):
     exclude_keywords = models.TextField(
         blank=True,
         verbose_name="Exclude Keywords",
-        help_text="Enter keywords separated by commas. Events from this feed containing these keywords in their title will be excluded from the merged calendar.",
+        help_text="Enter keywords separated by commas. Events from this feed containing these keywords in their title will be excluded from the merged calendar. Use 'regex:pattern' to match titles with a regular expression, and 'before:YYYY-MM-DD' or 'after:YYYY-MM-DD' to exclude events by start date.",
+        validators=[validate_exclude_keywords],
     )
 
     def __str__(self):
@@ -1,6 +1,9 @@
 import logging
+import math
 import time
+from datetime import datetime
 from datetime import timedelta
+from typing import TYPE_CHECKING
 from typing import Final
 
 from django.core.cache import cache
@@ -9,28 +12,52 @@ from icalendar import Alarm
 from icalendar import Calendar as ICalendar
 from icalendar import Event
 from icalendar import vDuration
-from mergecal import CalendarMerger
 
+from mergecalweb.calendars.fetching import single_flight
 from mergecalweb.calendars.models import Calendar
 from mergecalweb.core.logging_events import LogEvent
 
+from .merged_calendar import MergedCalendar
+from .serialized_source import SerializedSource
+from .serialized_source import splice
 from .source_data import SourceData
+from .source_service import MAX_REQUEST_TIMEOUT
+from .source_service import SAFETY_BUFFER
 from .source_service import SourceService
 
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
 logger = logging.getLogger(__name__)
 
+# How long an expired merged calendar may still be served while it is rebuilt
+STALE_SERVE_GRACE = timedelta(hours=1)
+# A rebuild can take as long as a whole request; the lock must outlive it
+MERGE_LOCK_TIMEOUT = MAX_REQUEST_TIMEOUT
+MERGE_WAIT_TIMEOUT = MAX_REQUEST_TIMEOUT - SAFETY_BUFFER
+
 
 class CalendarMergerService:
     def __init__(
         self,
         calendar: Calendar,
         existing_uuids: set[str] | None = None,
+        *,
+        deadline: float | None = None,
+        executor: "ThreadPoolExecutor | None" = None,
     ) -> None:
         self.calendar: Final[Calendar] = calendar
         self.existing_uuids: Final[set[str] | None] = existing_uuids
+        # Set when nested in another merge, whose deadline and pool it shares
+        self.deadline: Final[float | None] = deadline
+        self.executor: Final[ThreadPoolExecutor | None] = executor
 
-    def merge(self) -> str:
-        """Merge all calendar sources into a single iCal string"""
+    def merge(self) -> bytes:
+        """Merge all calendar sources into a single serialized iCal file"""
+        return self.get_merged().content
+
+    def get_merged(self) -> MergedCalendar:
+        """Merge all calendar sources, returning content and HTTP validators"""
         start_time = time.time()
         logger.debug(
             "Starting calendar merge",
@@ -58,20 +85,41 @@ class CalendarMergerService:
                 },
             )
             ical = self._add_tier_warnings()
-            return ical.to_ical().decode("utf-8")
+            return MergedCalendar.build(ical.to_ical())
 
         cache_key = f"calendar_str_{self.calendar.uuid}"
-        cached_calendar = cache.get(cache_key)
+        lock_key = f"calendar_merge_lock_{self.calendar.uuid}"
+        cached_data = cache.get(cache_key)
+
+        if cached_data is not None:
+            cached_calendar = self._unpack_cached(cached_data)
+            if not cached_calendar.is_expired:
+                logger.debug(
+                    "Calendar merge cache hit",
+                    extra={
+                        "event": LogEvent.CALENDAR_MERGE,
+                        "status": "cache-hit",
+                        "calendar_uuid": self.calendar.uuid,
+                        "calendar_name": self.calendar.name,
+                        "size_bytes": len(cached_calendar.content),
+                    },
+                )
+                return cached_calendar
+
+            # Expired: exactly one caller rebuilds, the rest keep serving the
+            # previous output until the rebuild lands
+            with single_flight.lock(lock_key, MERGE_LOCK_TIMEOUT) as is_leader:
+                if is_leader:
+                    return self._build(cache_key, start_time, cached_calendar)
 
-        if cached_calendar is not None:
             logger.debug(
-                "Calendar merge cache hit",
+                "Calendar merge in progress elsewhere, serving previous output",
                 extra={
                     "event": LogEvent.CALENDAR_MERGE,
-                    "status": "cache-hit",
+                    "status": "stale-while-rebuilding",
                     "calendar_uuid": self.calendar.uuid,
                     "calendar_name": self.calendar.name,
-                    "size_bytes": len(cached_calendar),
+                    "size_bytes": len(cached_calendar.content),
                 },
             )
             return cached_calendar
@@ -86,12 +134,97 @@ class CalendarMergerService:
             },
         )
 
+        return self._build_coalesced(cache_key, lock_key, start_time)
+
+    def rebuild(self) -> MergedCalendar | None:
+        """
+        Rebuild and cache the merged calendar now, e.g. after a source changed.
+
+        Returns:
+            The rebuilt calendar, or None if another rebuild is in progress
+            or the owner is on the free tier, whose output is not cached
+        """
+        if self.calendar.owner.is_free_tier:
+            return None
+
+        start_time = time.time()
+        cache_key = f"calendar_str_{self.calendar.uuid}"
+        lock_key = f"calendar_merge_lock_{self.calendar.uuid}"
+        with single_flight.lock(lock_key, MERGE_LOCK_TIMEOUT) as is_leader:
+            if not is_leader:
+                return None
+            cached_data = cache.get(cache_key)
+            previous = None if cached_data is None else self._unpack_cached(cached_data)
+            return self._build(cache_key, start_time, previous)
+
+    def _build_coalesced(
+        self,
+        cache_key: str,
+        lock_key: str,
+        start_time: float,
+    ) -> MergedCalendar:
+        """Build a missing calendar once, letting concurrent callers reuse it"""
+        with single_flight.lock(lock_key, MERGE_LOCK_TIMEOUT) as is_leader:
+            if is_leader:
+                return self._build(cache_key, start_time)
+
+        if single_flight.wait_until_released(lock_key, self._wait_timeout()):
+            cached_data = cache.get(cache_key)
+            if cached_data is not None:
+                logger.debug(
+                    "Calendar merged by concurrent request, using its result",
+                    extra={
+                        "event": LogEvent.CALENDAR_MERGE,
+                        "status": "coalesced",
+                        "calendar_uuid": self.calendar.uuid,
+                        "calendar_name": self.calendar.name,
+                    },
+                )
+                return self._unpack_cached(cached_data)
+
+        return self._build(cache_key, start_time)
+
+    def _wait_timeout(self) -> float:
+        """How long to wait for a concurrent merge, within the outer deadline"""
+        if self.deadline is None:
+            return MERGE_WAIT_TIMEOUT
+        return max(min(MERGE_WAIT_TIMEOUT, self.deadline - time.monotonic()), 0)
+
+    def _unpack_cached(self, cached_data) -> MergedCalendar:
+        """
+        Unpack a cached merged calendar.
+
+        Handles older (calendar_str, expires_at) tuples, and plain strings
+        written before stale serving existed; those already expire on their
+        own, so they are treated as fresh. Entries holding str content from
+        before the output was kept as bytes are rebuilt from the encoded text.
+        """
+        if isinstance(cached_data, MergedCalendar):
+            if isinstance(cached_data.content, str):
+                return MergedCalendar.build(
+                    cached_data.content.encode("utf-8"),
+                    cached_data.expires_at,
+                    cached_data,
+                )
+            return cached_data
+        expires_at = math.inf
+        if isinstance(cached_data, tuple):
+            cached_data, expires_at = cached_data
+        return MergedCalendar.build(cached_data.encode("utf-8"), expires_at)
+
+    def _build(
+        self,
+        cache_key: str,
+        start_time: float,
+        previous: MergedCalendar | None = None,
+    ) -> MergedCalendar:
+        """Merge all sources and cache the result with a stale-serving grace"""
         processed_sources: list[SourceData] = self._process_sources()
-        valid_calendars: list[ICalendar] = [
-            s.ical for s in processed_sources if s.ical is not None
+        valid_sources: list[SerializedSource] = [
+            s.serialized for s in processed_sources if s.serialized is not None
         ]
 
-        successful_count = len(valid_calendars)
+        successful_count = len(valid_sources)
         failed_count = len([s for s in processed_sources if s.error is not None])
         logger.debug(
             "Calendar sources processed",
@@ -106,13 +239,25 @@ class CalendarMergerService:
             },
         )
 
-        merged_calendar: ICalendar = self._merge_calendars(valid_calendars)
-        self._add_error_events(merged_calendar, processed_sources)
-        self._add_refresh_interval(merged_calendar)
-
-        calendar_str = merged_calendar.to_ical().decode("utf-8")
+        header = self._calendar_header()
+        self._add_refresh_interval(header)
+        error_event = self._error_event(processed_sources)
+        # Sources are spliced in as serialized when processed (and cached
+        # with them), so only changed sources are serialized again
+        calendar_bytes = splice(
+            header,
+            valid_sources,
+            trailer=[error_event.to_ical()] if error_event is not None else [],
+        )
         cache_ttl = self.calendar.effective_cache_ttl
-        cache.set(cache_key, calendar_str, cache_ttl)
+        merged = MergedCalendar.build(
+            calendar_bytes,
+            expires_at=time.time() + cache_ttl,
+            previous=previous,
+        )
+        # Keep the entry past its logical expiry so it can be served while
+        # the next rebuild runs
+        cache.set(cache_key, merged, cache_ttl + STALE_SERVE_GRACE.total_seconds())
 
         merge_duration = time.time() - start_time
         logger.info(
@@ -124,52 +269,38 @@ class CalendarMergerService:
                 "calendar_name": self.calendar.name,
                 "owner_id": self.calendar.owner.pk,
                 "owner_username": self.calendar.owner.username,
-                "size_bytes": len(calendar_str),
+                "size_bytes": len(calendar_bytes),
                 "duration_seconds": round(merge_duration, 2),
                 "cache_ttl_seconds": cache_ttl,
                 "is_in_bypass_period": self.calendar.is_in_cache_bypass_period(),
             },
         )
 
-        return calendar_str
+        return merged
 
     def _process_sources(self) -> list[SourceData]:
         """Process all calendar sources"""
         sources = self.calendar.calendarOf.all()
-        source_service = SourceService(self.existing_uuids)
-        return source_service.process_sources(sources)
-
-    def _merge_calendars(self, calendars: list[ICalendar]) -> ICalendar:
-        prodid = f"-//{self.calendar.name}//mergecal.org//"
-        version = "2.0"
-        if len(calendars) == 0:
-            # TODO: need to return a valid calendar with at least one component
-            calendar = ICalendar()
-            calendar.add("prodid", prodid)
-            calendar.add("version", version)
-            calendar.add("x-wr-calname", self.calendar.name)
-            return calendar
-
-        """Merge calendars using CalendarMerger with appropriate settings."""
-        merger = CalendarMerger(
-            calendars,
-            prodid=prodid,
-            version=version,
+        source_service = SourceService(
+            self.existing_uuids,
+            deadline=self.deadline,
+            executor=self.executor,
         )
-        icalendar: ICalendar = merger.merge()
-        icalendar.add("x-wr-calname", self.calendar.name)
+        return source_service.process_sources(sources)
 
-        return icalendar
+    def _calendar_header(self) -> ICalendar:
+        """An empty calendar with the merged calendar's PRODID, VERSION and name"""
+        calendar = ICalendar()
+        calendar.add("prodid", f"-//{self.calendar.name}//mergecal.org//")
+        calendar.add("version", "2.0")
+        calendar.add("x-wr-calname", self.calendar.name)
+        return calendar
 
-    def _add_error_events(
-        self,
-        merged_calendar: ICalendar,
-        processed_sources: list[SourceData],
-    ) -> None:
-        """Add error events for sources that failed to process"""
+    def _error_event(self, processed_sources: list[SourceData]) -> Event | None:
+        """Build an event listing the sources that failed to process"""
         error_sources = [s for s in processed_sources if s.error is not None]
         if not error_sources:
-            return
+            return None
 
         error_event = Event()
         error_event.add("summary", "MergeCal: Source Errors")
@@ -182,9 +313,16 @@ class CalendarMergerService:
             )
 
         error_event.add("description", error_description)
-        error_event.add("dtstart", timezone.now())
-        error_event.add("dtend", timezone.now() + timedelta(hours=1))
-        merged_calendar.add_component(error_event)
+        # Anchor to the start of the day so the output, and its ETag, only
+        # changes when the errors do
+        start_of_day = self._start_of_day()
+        error_event.add("dtstart", start_of_day)
+        error_event.add("dtend", start_of_day + timedelta(hours=1))
+        return error_event
+
+    def _start_of_day(self) -> datetime:
+        """Midnight UTC today, a timestamp that is stable across merges"""
+        return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
 
     def _add_refresh_interval(self, merged_calendar: ICalendar) -> None:
         """Add refresh interval properties to the calendar"""
@@ -205,12 +343,7 @@ class CalendarMergerService:
 
     def _add_tier_warnings(self) -> ICalendar:
         """Add warning events for free tier users"""
-        prodid = f"-//{self.calendar.name}//mergecal.org//"
-        version = "2.0"
-        calendar = ICalendar()
-        calendar.add("prodid", prodid)
-        calendar.add("version", version)
-        calendar.add("x-wr-calname", self.calendar.name)
+        calendar = self._calendar_header()
 
         warning_event = Event()
         start_time = timezone.now()
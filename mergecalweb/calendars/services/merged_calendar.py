@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+
+import brotli
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9  # 10-11 are several times slower for a few percent
+# Supported content codings, in order of preference
+ENCODINGS = ("br", "gzip")
+
+
+def content_etag(content: bytes) -> str:
+    """Strong HTTP entity tag for calendar content."""
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into a {coding: qvalue} mapping."""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        qvalue = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                qvalue = float(value)
+            except ValueError:
+                qvalue = 0.0
+        codings[coding.strip().lower()] = qvalue
+    return codings
+
+
+@dataclass(frozen=True)
+class MergedCalendar:
+    """A merged calendar ready to serve, as stored in the cache."""
+
+    content: bytes
+    etag: str
+    last_modified: float
+    expires_at: float = math.inf
+    # Ready-to-serve compressed variants; None on entries cached before they
+    # were introduced
+    gzip_content: bytes | None = None
+    brotli_content: bytes | None = None
+
+    @classmethod
+    def build(
+        cls,
+        content: bytes,
+        expires_at: float = math.inf,
+        previous: "MergedCalendar | None" = None,
+    ) -> "MergedCalendar":
+        """
+        Wrap freshly merged content, keeping the previous modification time
+        when the content is byte-for-byte unchanged.
+        """
+        etag = content_etag(content)
+        if previous is not None and previous.etag == etag:
+            last_modified = previous.last_modified
+        else:
+            last_modified = time.time()
+        return cls(
+            content=content,
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at,
+            gzip_content=gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0),
+            brotli_content=brotli.compress(content, quality=BROTLI_QUALITY),
+        )
+
+    @property
+    def is_expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def encoded(self, accept_encoding: str) -> tuple[bytes, str | None, str]:
+        """
+        Pick the best representation for an Accept-Encoding header.
+
+        Returns:
+            Tuple of (body, content coding or None for identity, ETag). Each
+            representation gets its own ETag, as required for strong ETags.
+        """
+        variants = {"br": self.brotli_content, "gzip": self.gzip_content}
+        accepted = parse_accept_encoding(accept_encoding)
+        for coding in ENCODINGS:
+            body = variants[coding]
+            if body is not None and accepted.get(coding, accepted.get("*", 0)) > 0:
+                return body, coding, f'{self.etag[:-1]}-{coding}"'
+        return self.content, None, self.etag
@@ -0,0 +1,312 @@
+"""
+Pre-serialized source calendars, spliced into the merged output.
+
+Serializing the merged calendar with ``to_ical()`` walks every component of
+every source, so a rebuild costs as much as the whole calendar even when a
+single source changed. Instead, each processed source is serialized once
+into a ``SerializedSource`` (its VTIMEZONEs and VEVENTs as bytes) that is
+cached alongside the processed source, and the merged file is assembled by
+splicing the calendar header, the timezones and events of every source,
+and the trailer.
+
+``splice`` reproduces ``mergecal.CalendarMerger``: sources are converted
+with ``x_wr_timezone.to_standard``, only VTIMEZONE and VEVENT components are
+kept, the first VTIMEZONE of each TZID wins, and events are deduplicated by
+(UID, SEQUENCE, RECURRENCE-ID), or by content when they have no UID.
+
+Sources that need no transformation skip parsing altogether:
+``SerializedSource.from_bytes`` splits the raw feed into its VTIMEZONE and
+VEVENT blocks at the line level, reading only the few properties needed for
+deduplication, and passes the blocks through unchanged. Feeds it cannot
+vouch for (not UTF-8, malformed nesting or content lines, X-WR-TIMEZONE,
+TZIDs without a VTIMEZONE) are left to the full parser, which replaces
+invalid bytes so the merged calendar stays valid UTF-8.
+"""
+
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC
+from datetime import datetime
+
+from icalendar import Calendar as ICalendar
+from icalendar import Event
+from icalendar.parser import Contentline
+from icalendar.prop import vDDDTypes
+from x_wr_timezone import to_standard
+
+CALENDAR_END = b"END:VCALENDAR\r\n"
+SPLICED_COMPONENTS = (b"VEVENT", b"VTIMEZONE")
+BLOCK_DEPTH = 2  # Spliced blocks are direct children of VCALENDAR
+LEADING_BYTES = b"\xef\xbb\xbf \t\r\n"  # Byte order mark and whitespace
+
+# Raw scanner patterns, applied to feeds with \n line endings
+_FOLD = re.compile(rb"\n[ \t]")
+_BOUNDARY = re.compile(
+    rb"^(BEGIN|END):[ \t]*([A-Za-z0-9-]+)[ \t]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+# An unfolded line that is not NAME[;PARAMS]:VALUE, blank lines included
+_MALFORMED_LINE = re.compile(rb"^(?![A-Za-z0-9-]+(?:;[^\n]*)?:)", re.MULTILINE)
+_X_WR_TIMEZONE = re.compile(rb"^X-WR-TIMEZONE[;:]", re.MULTILINE | re.IGNORECASE)
+_TZID_PARAM = re.compile(rb';TZID=("[^"]*"|[^;:\n]*)', re.IGNORECASE)
+_BLOCK_PROPERTY = re.compile(
+    rb"^(UID|SEQUENCE|RECURRENCE-ID|TZID)[;:][^\n]*",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# (UID, SEQUENCE, RECURRENCE-ID), or None for events without a UID
+EventKey = tuple[str, str, str | None] | None
+
+
+def _recurrence_key(event: Event) -> str | None:
+    recurrence_id = event.get("recurrence-id")
+    if recurrence_id is None:
+        return None
+    return _instant_key(getattr(recurrence_id, "dt", recurrence_id))
+
+
+def _instant_key(dt) -> str:
+    if isinstance(dt, datetime) and dt.tzinfo is not None:
+        # Instants compare equal across timezones
+        dt = dt.astimezone(UTC)
+    return dt.isoformat() if hasattr(dt, "isoformat") else str(dt)
+
+
+def _event_key(event: Event) -> EventKey:
+    uid = event.get("uid")
+    if uid is None:
+        return None
+    return (str(uid), str(event.get("sequence", 0)), _recurrence_key(event))
+
+
+@dataclass(frozen=True)
+class SerializedSource:
+    """The timezones and events of one processed source, as iCalendar bytes."""
+
+    timezones: tuple[tuple[str, bytes], ...]
+    events: tuple[tuple[EventKey, bytes], ...]
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SerializedSource | None":
+        """
+        Split a raw feed into its blocks without parsing it.
+
+        Returns:
+            The feed's VTIMEZONE and VEVENT blocks as they are, or None if
+            the feed must go through the full parser
+        """
+        return _scan_raw(data)
+
+    @classmethod
+    def from_ical(cls, ical: ICalendar) -> "SerializedSource":
+        """Serialize the components of a processed source calendar."""
+        calendar = to_standard(ical, add_timezone_component=True)
+        return cls(
+            timezones=tuple(
+                (timezone.tz_name, timezone.to_ical())
+                for timezone in calendar.timezones
+            ),
+            events=tuple(
+                (_event_key(event), event.to_ical()) for event in calendar.events
+            ),
+        )
+
+    def dumps(self) -> bytes:
+        """Encode for the processed-source cache, see ``loads``."""
+        # latin-1 maps every byte to one code point, so chunks round-trip
+        return json.dumps(
+            {
+                "timezones": [
+                    [tzid, chunk.decode("latin-1")] for tzid, chunk in self.timezones
+                ],
+                "events": [
+                    [key, chunk.decode("latin-1")] for key, chunk in self.events
+                ],
+            },
+            separators=(",", ":"),
+        ).encode()
+
+    @classmethod
+    def loads(cls, data: bytes) -> "SerializedSource":
+        """
+        Decode a source encoded by ``dumps``.
+
+        Raises:
+            ValueError: If the data is not an encoded source
+        """
+        try:
+            decoded = json.loads(data)
+            return cls(
+                timezones=tuple(
+                    (tzid, chunk.encode("latin-1"))
+                    for tzid, chunk in decoded["timezones"]
+                ),
+                events=tuple(
+                    (None if key is None else tuple(key), chunk.encode("latin-1"))
+                    for key, chunk in decoded["events"]
+                ),
+            )
+        except (KeyError, TypeError) as e:
+            msg = "Corrupt serialized source"
+            raise ValueError(msg) from e
+
+
+def _scan_raw(data: bytes) -> SerializedSource | None:
+    """Split a raw feed into blocks, None if it must be parsed instead."""
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    data = data.strip(LEADING_BYTES)
+    if data[:15].upper() != b"BEGIN:VCALENDAR" or _X_WR_TIMEZONE.search(data):
+        return None
+    unfolded = _FOLD.sub(b"", data)
+    if _MALFORMED_LINE.search(unfolded):
+        return None
+    blocks = _split_blocks(data)
+    if blocks is None:
+        return None
+
+    timezones: list[tuple[str, bytes]] = []
+    events: list[tuple[EventKey, bytes]] = []
+    for name, block in blocks:
+        properties = _block_properties(block)
+        chunk = block.replace(b"\n", b"\r\n") + b"\r\n"
+        if name == b"VTIMEZONE":
+            timezones.append((_value(properties.get(b"TZID")) or "", chunk))
+        else:
+            events.append((_raw_event_key(properties), chunk))
+
+    used_tzids = {
+        tzid.strip(b'"').decode("utf-8", errors="replace")
+        for tzid in _TZID_PARAM.findall(unfolded)
+    }
+    if not used_tzids <= {tzid for tzid, _ in timezones}:
+        # add_missing_timezones would add a VTIMEZONE
+        return None
+    return SerializedSource(timezones=tuple(timezones), events=tuple(events))
+
+
+def _split_blocks(data: bytes) -> list[tuple[bytes, bytes]] | None:
+    """
+    Find the VTIMEZONE and VEVENT blocks of a calendar.
+
+    Returns:
+        (component name, block) pairs, or None if components do not nest
+        properly or there is content after the calendar
+    """
+    blocks = []
+    stack: list[bytes] = []
+    block_start = 0
+    for match in _BOUNDARY.finditer(data):
+        name = match.group(2).upper()
+        if match.group(1).upper() == b"BEGIN":
+            stack.append(name)
+            if len(stack) == BLOCK_DEPTH:
+                block_start = match.start()
+        elif not stack or stack.pop() != name:
+            return None
+        elif len(stack) == BLOCK_DEPTH - 1 and name in SPLICED_COMPONENTS:
+            blocks.append((name, data[block_start : match.end()]))
+        elif not stack and match.end() != len(data):
+            return None
+    return None if stack else blocks
+
+
+def _block_properties(block: bytes) -> dict[bytes, bytes]:
+    """First UID, SEQUENCE, RECURRENCE-ID and TZID lines of a block, unfolded."""
+    properties: dict[bytes, bytes] = {}
+    for match in _BLOCK_PROPERTY.finditer(_FOLD.sub(b"", block)):
+        properties.setdefault(match.group(1).upper(), match.group(0))
+    return properties
+
+
+def _value(line: bytes | None) -> str | None:
+    """Unescaped value of a content line."""
+    if line is None:
+        return None
+    head, _, value = line.partition(b":")
+    if b'"' in head:
+        # A quoted parameter may contain the ":" separator
+        try:
+            return Contentline(line.decode("utf-8")).parts()[2]
+        except ValueError:
+            pass
+    text = value.decode("utf-8", errors="replace")
+    if "\\" not in text:
+        return text
+    return (
+        text.replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\\\", "\\")
+    )
+
+
+def _raw_event_key(properties: dict[bytes, bytes]) -> EventKey:
+    uid = _value(properties.get(b"UID"))
+    if uid is None:
+        return None
+    sequence = _value(properties.get(b"SEQUENCE")) or "0"
+    if sequence.strip().isdigit():
+        sequence = str(int(sequence))
+    return (uid, sequence, _raw_recurrence_key(properties.get(b"RECURRENCE-ID")))
+
+
+def _raw_recurrence_key(line: bytes | None) -> str | None:
+    if line is None:
+        return None
+    try:
+        _, params, value = Contentline(line.decode("utf-8")).parts()
+        return _instant_key(vDDDTypes.from_ical(value, timezone=params.get("TZID")))
+    except ValueError:
+        return line.partition(b":")[2].decode("utf-8", errors="replace")
+
+
+def splice(
+    header: ICalendar,
+    sources: Iterable[SerializedSource],
+    trailer: Iterable[bytes] = (),
+) -> bytes:
+    """
+    Assemble a merged calendar from serialized sources.
+
+    Args:
+        header: Calendar with the merged properties (PRODID, VERSION, ...)
+            and no components
+        sources: Serialized sources, in merge order
+        trailer: Serialized components added after the sources' events
+
+    Returns:
+        The merged calendar, byte-for-byte what serializing the merged
+        ``ICalendar`` would produce
+    """
+    header_bytes = header.to_ical()
+    parts = [header_bytes.removesuffix(CALENDAR_END)]
+    tzids: set[str] = set()
+    event_keys: set[EventKey] = set()
+    no_uid_events: set[bytes] = set()
+
+    for source in sources:
+        for tzid, chunk in source.timezones:
+            if tzid not in tzids:
+                tzids.add(tzid)
+                parts.append(chunk)
+        for key, chunk in source.events:
+            if key is None:
+                if chunk in no_uid_events:
+                    continue
+                no_uid_events.add(chunk)
+            elif key in event_keys:
+                continue
+            else:
+                event_keys.add(key)
+            parts.append(chunk)
+
+    parts.extend(trailer)
+    parts.append(CALENDAR_END)
+    return b"".join(parts)
@@ -4,9 +4,14 @@ from icalendar import Calendar as ICalendar
 
 from mergecalweb.calendars.models import Source
 
+from .serialized_source import SerializedSource
+
 
 @dataclass
 class SourceData:
     source: Source
     ical: ICalendar | None = None
+    # Processed calendar ready for splicing; may be set without ``ical`` when
+    # loaded from the processed-source cache
+    serialized: SerializedSource | None = None
     error: str | None = None
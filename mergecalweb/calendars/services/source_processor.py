@@ -1,23 +1,42 @@
 import contextlib
+import hashlib
+import json
 import logging
+from datetime import timedelta
 from typing import Final
 
 import requests
+from django.core.cache import cache
 from icalendar import Calendar as ICalendar
-from icalendar import Event
 from requests.exceptions import RequestException
 from urllib3.exceptions import HTTPError
 
+from mergecalweb.calendars.exceptions import CachedFetchError
+from mergecalweb.calendars.exceptions import CacheEnvelopeError
 from mergecalweb.calendars.exceptions import CalendarValidationError
 from mergecalweb.calendars.exceptions import CustomizationWithoutCalendarError
 from mergecalweb.calendars.fetching import CalendarFetcher
+from mergecalweb.calendars.fetching import cache_envelope
 from mergecalweb.calendars.models import Source
 from mergecalweb.core.logging_events import LogEvent
 
+from .serialized_source import SerializedSource
 from .source_data import SourceData
+from .source_rules import CustomizationStats
+from .source_rules import SourceRules
+from .source_rules import compile_rules
 
 logger = logging.getLogger(__name__)
 
+# Parsed, customized and serialized sources are cached by URL and settings,
+# compressed and tagged with the feed's content hash, so unchanged sources
+# are not processed again on every merge and a changed feed replaces its
+# previous version instead of adding another one
+PROCESSED_CACHE_TTL = timedelta(hours=24)
+# Bump when customization or serialization changes, to stop serving results
+# of the old code
+PROCESSED_CACHE_VERSION = 3
+
 
 class SourceProcessor:
     BRANDING_URL: Final[str] = "https://mergecal.org"
@@ -29,6 +48,11 @@ class SourceProcessor:
         self.timeout: Final[int | None] = timeout
         self.fetcher: Final[CalendarFetcher] = CalendarFetcher()
         self.source_data: Final[SourceData] = SourceData(source=self.source)
+        # Set once the fetched feed is known, for the processed-source cache
+        self.content_hash: str | None = None
+        self.from_processed_cache = False
+        # Set when the parsed calendar is customized
+        self.customization_stats: CustomizationStats | None = None
 
     def fetch_and_validate(self) -> None:
         """Fetch and validate remote calendar."""
@@ -49,6 +73,15 @@ class SourceProcessor:
                 self.source.url,
                 timeout=self.timeout,
             )
+            self.content_hash = cache_envelope.content_hash(calendar_data)
+            serialized = self._load_processed()
+            if serialized is not None:
+                self.source_data.serialized = serialized
+                self.from_processed_cache = True
+                return
+            if self._pass_through(calendar_data):
+                return
+
             ical = self._validate_calendar_components(calendar_data)
 
             with contextlib.suppress(KeyError):
@@ -68,6 +101,20 @@ class SourceProcessor:
                 },
             )
 
+        except CachedFetchError as e:
+            # Known to be broken; already logged when the fetch failed
+            self.source_data.error = str(e)
+            logger.debug(
+                "Source fetch skipped, it failed recently",
+                extra={
+                    "event": LogEvent.SOURCE_FETCH,
+                    "status": "cached-error",
+                    "source_id": self.source.pk,
+                    "source_name": self.source.name,
+                    "source_url": self.source.url[:200],
+                    "calendar_uuid": self.source.calendar.uuid,
+                },
+            )
         except requests.Timeout as e:
             self.source_data.error = str(e)
             logger.info(
@@ -111,7 +158,7 @@ class SourceProcessor:
                 },
             )
 
-    def _validate_calendar_components(self, calendar_data: str) -> ICalendar:
+    def _validate_calendar_components(self, calendar_data: bytes) -> ICalendar:
         """Validate calendar components."""
         try:
             ical = ICalendar.from_ical(calendar_data)
@@ -127,12 +174,135 @@ class SourceProcessor:
         return ical
 
     def customize_calendar(self) -> None:
-        """Apply source-specific customizations to calendar"""
+        """
+        Apply source-specific customizations to calendar, and serialize it.
+
+        Results loaded from the processed-source cache or passed through
+        unparsed are already final; fresh results are stored in the cache.
+        """
+        if self.source_data.serialized is not None:
+            return
         if not self.source_data.ical:
             raise CustomizationWithoutCalendarError
 
-        ical = self.source_data.ical
-        owner_can_customize: bool = self.source.calendar.owner.can_customize_sources
+        self._apply_customizations(self.source_data.ical)
+        self.source_data.serialized = SerializedSource.from_ical(
+            self.source_data.ical,
+        )
+        self._store_processed()
+
+    def rules(self) -> SourceRules | None:
+        """Compiled customization rules, None if the owner cannot customize."""
+        source = self.source
+        if not source.calendar.owner.can_customize_sources:
+            return None
+        branded = source.calendar.show_branding
+        return compile_rules(
+            name=source.name,
+            custom_prefix=source.custom_prefix,
+            include_title=source.include_title,
+            include_description=source.include_description,
+            include_location=source.include_location,
+            exclude_keywords=source.exclude_keywords,
+            summary_suffix=f" {self.BRANDING_SUFFIX}" if branded else None,
+            description_suffix=(
+                f"\n\n{self.BRANDING_TEXT} \n{self.BRANDING_URL}" if branded else None
+            ),
+        )
+
+    def needs_customization(self) -> bool:
+        """Whether customizing would change any event of this source."""
+        rules = self.rules()
+        return rules is not None and bool(rules.exclude or rules.rewrites)
+
+    def _pass_through(self, calendar_data: bytes) -> bool:
+        """
+        Use the feed's blocks as they are when nothing would change them.
+
+        Returns:
+            True if the source was processed without parsing the feed
+        """
+        if self.needs_customization():
+            return False
+        serialized = SerializedSource.from_bytes(calendar_data)
+        if serialized is None:
+            return False
+
+        self.source_data.serialized = serialized
+        self._store_processed()
+        logger.debug(
+            "Source passed through without parsing",
+            extra={
+                "event": LogEvent.SOURCE_FETCH,
+                "status": "passthrough",
+                "source_id": self.source.pk,
+                "source_name": self.source.name,
+                "calendar_uuid": self.source.calendar.uuid,
+                "event_count": len(serialized.events),
+            },
+        )
+        return True
+
+    def customization_fingerprint(self) -> str:
+        """Hash of every setting that affects the customized calendar."""
+        source = self.source
+        settings = [
+            PROCESSED_CACHE_VERSION,
+            source.calendar.owner.can_customize_sources,
+            source.calendar.show_branding,
+            source.name,
+            source.custom_prefix,
+            source.include_title,
+            source.include_description,
+            source.include_location,
+            source.exclude_keywords,
+        ]
+        return hashlib.sha256(json.dumps(settings).encode()).hexdigest()[:32]
+
+    def _processed_key(self) -> str:
+        return (
+            f"calendar_processed_{self.customization_fingerprint()}_{self.source.url}"
+        )
+
+    def _load_processed(self) -> SerializedSource | None:
+        """Load the processed calendar for the fetched feed, if cached."""
+        cached = cache.get(self._processed_key())
+        if not isinstance(cached, tuple) or cached[0] != self.content_hash:
+            # Missing, or processed from another version of the feed
+            return None
+        try:
+            serialized = SerializedSource.loads(cache_envelope.unpack_body(cached[1]))
+        except (CacheEnvelopeError, ValueError):
+            return None
+
+        logger.debug(
+            "Source served from processed cache",
+            extra={
+                "event": LogEvent.SOURCE_FETCH,
+                "status": "processed-cache-hit",
+                "source_id": self.source.pk,
+                "source_name": self.source.name,
+                "calendar_uuid": self.source.calendar.uuid,
+                "content_hash": self.content_hash,
+            },
+        )
+        return serialized
+
+    def _store_processed(self) -> None:
+        serialized = self.source_data.serialized
+        if self.content_hash is None or serialized is None:
+            # Not fetched as a feed (local or Meetup API source), or not
+            # serialized
+            return
+        body = cache_envelope.pack_body(serialized.dumps())
+        cache.set(
+            self._processed_key(),
+            (self.content_hash, body),
+            PROCESSED_CACHE_TTL.total_seconds(),
+        )
+
+    def _apply_customizations(self, ical: ICalendar) -> None:
+        rules = self.rules()
 
         logger.debug(
             "Starting source customization",
@@ -141,13 +311,13 @@ class SourceProcessor:
                 "status": "start",
                 "source_id": self.source.pk,
                 "source_name": self.source.name,
-                "can_customize": owner_can_customize,
+                "can_customize": rules is not None,
                 "has_custom_prefix": bool(self.source.custom_prefix),
                 "has_exclude_keywords": bool(self.source.exclude_keywords),
             },
         )
 
-        if not owner_can_customize:
+        if rules is None:
             logger.debug(
                 "Source customization skipped, user lacks permission",
                 extra={
@@ -160,35 +330,8 @@ class SourceProcessor:
             )
             return
 
-        events_removed = 0
-        events_customized = 0
-
-        for event in ical.walk("VEVENT"):
-            if not self._should_include_event(event):
-                ical.subcomponents.remove(event)
-                events_removed += 1
-                continue
-
-            if not self.source.include_title:
-                event["summary"] = self.source.custom_prefix or self.source.name
-                events_customized += 1
-            elif self.source.custom_prefix:
-                event["summary"] = (
-                    f"{self.source.custom_prefix}: {event.get('summary')}"
-                )
-                events_customized += 1
-
-            if not self.source.include_description:
-                event.pop("description", None)
-                events_customized += 1
-
-            if not self.source.include_location:
-                event.pop("location", None)
-                events_customized += 1
-
-            if self.source.calendar.show_branding:
-                self._add_branding(event)
-                events_customized += 1
+        stats = rules.apply(ical)
+        self.customization_stats = stats
 
         logger.debug(
             "Source customization completed",
@@ -198,29 +341,8 @@ class SourceProcessor:
                 "source_id": self.source.pk,
                 "source_name": self.source.name,
                 "calendar_uuid": self.source.calendar.uuid,
-                "events_removed": events_removed,
-                "events_customized": events_customized,
+                "events_kept": stats.kept,
+                "events_dropped": stats.dropped,
+                "events_rewritten": stats.rewritten,
             },
         )
-
-    def _add_branding(self, event: Event) -> None:
-        """Add branding to event description and summary."""
-        description: str = event.get("description", "")
-        summary: str = event.get("summary", "")
-
-        event["description"] = (
-            f"{description}\n\n{self.BRANDING_TEXT} \n{self.BRANDING_URL}"
-        )
-        event["summary"] = f"{summary} {self.BRANDING_SUFFIX}"
-
-    def _should_include_event(self, event: Event) -> bool:
-        source = self.source
-        calendar = source.calendar
-        if not calendar.owner.can_customize_sources or not source.exclude_keywords:
-            return True
-
-        exclude_keywords = [
-            kw.strip().lower() for kw in source.exclude_keywords.split(",")
-        ]
-        event_title = event.get("summary", "").lower()
-        return not any(kw in event_title for kw in exclude_keywords)
@@ -0,0 +1,393 @@
+"""
+Compiled customization rules of a source.
+
+A source's settings (exclude keywords, prefix, included fields, branding)
+are compiled once into a ``SourceRules``: the plain keywords become a single
+case-insensitive regular expression, each ``regex:`` rule is compiled on its
+own, dates become bounds, and the summary and description rewrites become
+precomputed functions. Compiled rules are cached by the settings they were
+built from, so every version of a source is compiled once per process and
+reused across merges.
+
+``exclude_keywords`` is a comma-separated list of rules:
+
+- ``keyword``: exclude events whose title contains the keyword
+- ``regex:pattern``: exclude events whose title matches the pattern
+- ``before:YYYY-MM-DD``: exclude events starting before the date
+- ``after:YYYY-MM-DD``: exclude events starting after the date
+
+All title rules are case-insensitive. ``before:`` and ``after:`` rules whose
+value is not a date are treated as plain keywords.
+
+``regex:`` patterns run on the standard backtracking engine, so patterns
+that can backtrack exponentially are refused: nested quantifiers such as
+``(a+)+``, and alternatives inside a repeated group that can start with the
+same character, such as ``(a|a)*``. Patterns may also not set global flags,
+use backreferences or exceed ``MAX_REGEX_LENGTH``. Commas always separate
+rules, so a pattern cannot contain one (write a literal comma as ``\\x2c``)
+and ``{m,n}`` quantifiers are not available. Sources reject such patterns
+when saved, and any stored before the check are ignored rather than failing
+the merge.
+"""
+
+import functools
+import re
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from re import _constants  # type: ignore[attr-defined]
+from re import _parser  # type: ignore[attr-defined]
+
+from django.core.exceptions import ValidationError
+from icalendar import Component
+from icalendar import Event
+
+REGEX_PREFIX = "regex:"
+BEFORE_PREFIX = "before:"
+AFTER_PREFIX = "after:"
+MAX_REGEX_LENGTH = 200
+# Inline global flags such as "(?i)", and group backreferences; a backslash
+# preceded by an escaped backslash does not start a backreference
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+_BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P=")
+# A "{m," quantifier cut short by the comma separating rules
+_SPLIT_QUANTIFIER = re.compile(r"(?<!\\)\{\d*$")
+# Operators of a parsed pattern (see re._parser) repeating their subpattern
+_REPEATS = frozenset(
+    (_constants.MAX_REPEAT, _constants.MIN_REPEAT, _constants.POSSESSIVE_REPEAT),
+)
+# Position of the subpattern in the argument of operators nesting one
+_SUBPATTERN_INDEX = dict.fromkeys(_REPEATS, 2) | {
+    _constants.SUBPATTERN: 3,
+    _constants.ASSERT: 1,
+    _constants.ASSERT_NOT: 1,
+}
+# Distinct source versions kept compiled
+COMPILED_RULES_CACHE_SIZE = 1024
+
+# New value of a property from its current one (None if missing)
+Rewrite = Callable[[object], str]
+
+
+@dataclass(frozen=True)
+class ExcludeRules:
+    """Exclude rules of a source, compiled into title patterns and dates."""
+
+    # All plain keywords, combined
+    keyword_pattern: re.Pattern[str] | None = None
+    # One per regex: rule
+    title_patterns: tuple[re.Pattern[str], ...] = ()
+    before: date | None = None
+    after: date | None = None
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.keyword_pattern or self.title_patterns or self.before or self.after,
+        )
+
+    def excludes(self, event: Event) -> bool:
+        """Whether an event is excluded from the merged calendar."""
+        if self.keyword_pattern is not None or self.title_patterns:
+            summary = event.get("summary")
+            if summary is not None and self._title_matches(str(summary)):
+                return True
+        if self.before is None and self.after is None:
+            return False
+        start = _start_date(event)
+        if start is None:
+            return False
+        return (self.before is not None and start < self.before) or (
+            self.after is not None and start > self.after
+        )
+
+    def _title_matches(self, title: str) -> bool:
+        if self.keyword_pattern is not None and self.keyword_pattern.search(title):
+            return True
+        return any(pattern.search(title) for pattern in self.title_patterns)
+
+
+def _start_date(event: Event) -> date | None:
+    dtstart = event.get("dtstart")
+    start = getattr(dtstart, "dt", None)
+    if isinstance(start, datetime):
+        return start.date()
+    return start if isinstance(start, date) else None
+
+
+def _parse_date(value: str) -> date | None:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+
+def _regex_problem(pattern: str) -> str | None:
+    """Why a ``regex:`` pattern is not accepted, None if it is."""
+    if len(pattern) > MAX_REGEX_LENGTH:
+        return f"longer than {MAX_REGEX_LENGTH} characters"
+    if _GLOBAL_FLAGS.search(pattern):
+        return "inline flags such as (?i) are not supported"
+    if _BACKREFERENCE.search(pattern):
+        return "backreferences are not supported"
+    if _SPLIT_QUANTIFIER.search(pattern):
+        return "{m,n} quantifiers are not supported"
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        return str(e)
+    return _backtracking_problem(_parser.parse(pattern, re.IGNORECASE))
+
+
+def _backtracking_problem(items: Sequence, *, repeated: bool = False) -> str | None:
+    """
+    Why a parsed pattern can backtrack exponentially, None if it cannot.
+
+    Inside a repeated group, a quantifier of variable length or alternatives
+    that can start with the same character give the engine exponentially
+    many ways to split a title before it gives up on it.
+
+    Args:
+        items: (operator, argument) pairs, as parsed by ``re._parser``
+        repeated: Whether the items are inside a group repeated more than once
+    """
+    for op, av in items:
+        if repeated and op in _REPEATS and av[0] != av[1]:
+            return "nested quantifiers such as (a+)+ are not supported"
+        if repeated and op == _constants.BRANCH and not _distinct_starts(av[1]):
+            return (
+                "alternatives that can match the same text, such as (a|ab)*, "
+                "are not supported in a repeated group"
+            )
+        inner_repeated = repeated or (op in _REPEATS and av[1] > 1)
+        for subpattern in _subpatterns(op, av):
+            problem = _backtracking_problem(subpattern, repeated=inner_repeated)
+            if problem is not None:
+                return problem
+    return None
+
+
+def _subpatterns(op, av) -> list[Sequence]:
+    """Subpatterns nested in a parsed pattern item."""
+    if op == _constants.BRANCH:
+        return av[1]
+    if op == _constants.ATOMIC_GROUP:
+        return [av]
+    if op == _constants.GROUPREF_EXISTS:
+        return [branch for branch in av[1:] if branch is not None]
+    index = _SUBPATTERN_INDEX.get(op)
+    return [] if index is None else [av[index]]
+
+
+def _distinct_starts(branches: list[Sequence]) -> bool:
+    """Whether alternatives all start with different literal characters."""
+    starts = set()
+    for branch in branches:
+        if not branch or branch[0][0] != _constants.LITERAL:
+            return False
+        start = chr(branch[0][1]).lower()
+        if start in starts:
+            return False
+        starts.add(start)
+    return True
+
+
+def _rules(exclude_keywords: str) -> Iterator[str]:
+    """Yield the non-empty rules of ``exclude_keywords``, stripped."""
+    for raw_rule in exclude_keywords.split(","):
+        rule = raw_rule.strip()
+        if rule:
+            yield rule
+
+
+@functools.lru_cache(maxsize=COMPILED_RULES_CACHE_SIZE)
+def compile_exclude_rules(exclude_keywords: str) -> ExcludeRules:
+    """Compile a source's ``exclude_keywords``."""
+    keywords: list[str] = []
+    title_patterns: list[re.Pattern[str]] = []
+    before: date | None = None
+    after: date | None = None
+
+    for rule in _rules(exclude_keywords):
+        lowered = rule.lower()
+        if lowered.startswith(REGEX_PREFIX):
+            pattern = rule[len(REGEX_PREFIX) :].strip()
+            if _regex_problem(pattern) is None:
+                title_patterns.append(re.compile(pattern, re.IGNORECASE))
+            continue
+        if lowered.startswith(BEFORE_PREFIX):
+            bound = _parse_date(rule[len(BEFORE_PREFIX) :])
+            if bound is not None:
+                before = bound if before is None else max(before, bound)
+                continue
+        if lowered.startswith(AFTER_PREFIX):
+            bound = _parse_date(rule[len(AFTER_PREFIX) :])
+            if bound is not None:
+                after = bound if after is None else min(after, bound)
+                continue
+        keywords.append(re.escape(rule))
+
+    return ExcludeRules(
+        keyword_pattern=re.compile("|".join(keywords), re.IGNORECASE)
+        if keywords
+        else None,
+        title_patterns=tuple(title_patterns),
+        before=before,
+        after=after,
+    )
+
+
+def validate_exclude_keywords(value: str) -> None:
+    """Field validator for ``Source.exclude_keywords``."""
+    for rule in _rules(value):
+        if not rule.lower().startswith(REGEX_PREFIX):
+            continue
+        pattern = rule[len(REGEX_PREFIX) :].strip()
+        problem = _regex_problem(pattern)
+        if problem is not None:
+            msg = f'Invalid regular expression "{pattern}": {problem}'
+            if f"{rule}," in value:
+                # The pattern may have been cut short at a comma
+                msg += r". Commas separate rules, write a literal comma as \x2c"
+            raise ValidationError(msg)
+
+
+@dataclass(frozen=True)
+class CustomizationStats:
+    """What applying a source's rules did to its events."""
+
+    kept: int = 0
+    dropped: int = 0
+    rewritten: int = 0
+
+
+@dataclass(frozen=True)
+class SourceRules:
+    """Everything customization does to the events of one source."""
+
+    exclude: ExcludeRules
+    rewrite_summary: Rewrite | None
+    # Applied after the description is dropped
+    rewrite_description: Rewrite | None
+    drop_description: bool
+    drop_location: bool
+
+    @property
+    def rewrites(self) -> bool:
+        """Whether kept events are modified."""
+        return bool(
+            self.rewrite_summary
+            or self.rewrite_description
+            or self.drop_description
+            or self.drop_location,
+        )
+
+    def apply(self, calendar: Component) -> CustomizationStats:
+        """
+        Filter and rewrite the events of a calendar, in place.
+
+        The kept components are collected in a single pass and replace the
+        calendar's subcomponents at once, rather than removing excluded
+        events one by one (each removal being a linear search and shift).
+
+        Returns:
+            The number of events kept, dropped and rewritten
+        """
+        rewrites = self.rewrites
+        kept: list[Component] = []
+        dropped = 0
+        for component in calendar.subcomponents:
+            if component.name != "VEVENT":
+                kept.append(component)
+            elif self.exclude.excludes(component):
+                dropped += 1
+            else:
+                if rewrites:
+                    self._rewrite(component)
+                kept.append(component)
+
+        if dropped:
+            calendar.subcomponents = kept
+        events = sum(component.name == "VEVENT" for component in kept)
+        return CustomizationStats(
+            kept=events,
+            dropped=dropped,
+            rewritten=events if rewrites else 0,
+        )
+
+    def _rewrite(self, event: Component) -> None:
+        if self.rewrite_summary is not None:
+            event["summary"] = self.rewrite_summary(event.get("summary"))
+        if self.drop_description:
+            event.pop("description", None)
+        if self.drop_location:
+            event.pop("location", None)
+        if self.rewrite_description is not None:
+            event["description"] = self.rewrite_description(event.get("description"))
+
+
+@functools.lru_cache(maxsize=COMPILED_RULES_CACHE_SIZE)
+def compile_rules(  # noqa: PLR0913
+    *,
+    name: str,
+    custom_prefix: str,
+    include_title: bool,
+    include_description: bool,
+    include_location: bool,
+    exclude_keywords: str,
+    summary_suffix: str | None = None,
+    description_suffix: str | None = None,
+) -> SourceRules:
+    """
+    Compile the settings of a source version.
+
+    Args:
+        name: Source name, the title of events when titles are hidden
+        custom_prefix: Prefix added to event titles
+        include_title: Whether event titles are kept
+        include_description: Whether event descriptions are kept
+        include_location: Whether event locations are kept
+        exclude_keywords: Exclude rules, see the module docstring
+        summary_suffix: Branding appended to event titles
+        description_suffix: Branding appended to event descriptions
+
+    Returns:
+        The compiled rules, shared by every source with these settings
+    """
+    title_rewrite = _title_rewrite(name, custom_prefix, include_title=include_title)
+    rewrite_summary = title_rewrite
+    if summary_suffix is not None:
+        rewrite_summary = _suffixed(title_rewrite, summary_suffix)
+    rewrite_description = None
+    if description_suffix is not None:
+        rewrite_description = _suffixed(None, description_suffix)
+
+    return SourceRules(
+        exclude=compile_exclude_rules(exclude_keywords),
+        rewrite_summary=rewrite_summary,
+        rewrite_description=rewrite_description,
+        drop_description=not include_description,
+        drop_location=not include_location,
+    )
+
+
+def _title_rewrite(
+    name: str,
+    custom_prefix: str,
+    *,
+    include_title: bool,
+) -> Rewrite | None:
+    if not include_title:
+        title = custom_prefix or name
+        return lambda _summary: title
+    if custom_prefix:
+        return lambda summary: f"{custom_prefix}: {summary}"
+    return None
+
+
+def _suffixed(rewrite: Rewrite | None, suffix: str) -> Rewrite:
+    if rewrite is None:
+        return lambda value: f"{'' if value is None else value}{suffix}"
+    return lambda value: f"{rewrite(value)}{suffix}"
@@ -1,11 +1,17 @@
 # ruff: noqa: SLF001
 import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 
+from django.db import connections
 from icalendar import Calendar as ICalendar
 from requests.exceptions import RequestException
 from urllib3.exceptions import HTTPError
 
 from mergecalweb.calendars.exceptions import CalendarValidationError
+from mergecalweb.calendars.fetching import latency
 from mergecalweb.calendars.meetup import fetch_and_create_meetup_calendar
 from mergecalweb.calendars.meetup import is_meetup_url
 from mergecalweb.calendars.models import Calendar
@@ -14,6 +20,7 @@ from mergecalweb.core.logging_events import LogEvent
 from mergecalweb.core.utils import is_local_url
 from mergecalweb.core.utils import parse_calendar_uuid
 
+from .serialized_source import SerializedSource
 from .source_data import SourceData
 from .source_processor import SourceProcessor
 
@@ -23,28 +30,39 @@ logger = logging.getLogger(__name__)
 MAX_REQUEST_TIMEOUT = 60  # 1 minute max for the entire request
 MIN_PER_SOURCE_TIMEOUT = 5  # Minimum timeout per source in seconds
 SAFETY_BUFFER = 5  # Safety buffer in seconds to complete before gunicorn timeout
+MAX_FETCH_WORKERS = 8  # Maximum concurrent remote fetches per request
 
 
 class SourceService:
-    def __init__(self, existing_uuids=None) -> None:
+    def __init__(
+        self,
+        existing_uuids=None,
+        *,
+        deadline: float | None = None,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
         if existing_uuids is None:
             self.processed_uuids: set[str] = set()
         else:
             self.processed_uuids = existing_uuids
+        # Nested merges share the deadline and fetch pool of the outer merge
+        self.deadline = deadline
+        self.executor = executor
 
     def _calculate_per_source_timeout(self, source_count: int) -> int:
         """
         Calculate timeout per source based on total source count.
 
         With a 60-second Gunicorn timeout, we need to ensure all sources
-        can be fetched within that time. We distribute the available time
-        across all sources, with a minimum timeout per source.
+        can be fetched within that time. Sources are fetched concurrently by
+        a pool of MAX_FETCH_WORKERS threads, so they complete in "waves" of
+        at most that many fetches. The available time is distributed across
+        the waves, with a minimum timeout per source.
 
-        Note: If there are many sources (>11), each source will get the
+        Note: If there are many sources (>11 waves), each source will get the
         minimum timeout (5s), which may cause the total time to exceed
-        the Gunicorn timeout. In this case, some sources may fail due to
-        the overall request timeout, and the request should be moved to
-        a background task.
+        the Gunicorn timeout. Sources still running at the request deadline
+        are reported as timed out.
 
         Args:
             source_count: Total number of sources to fetch
@@ -58,14 +76,15 @@ class SourceService:
         # Calculate available time after safety buffer
         available_time = MAX_REQUEST_TIMEOUT - SAFETY_BUFFER
 
-        # Distribute time across all sources
-        per_source_timeout = available_time // source_count
+        # Distribute time across the waves of concurrent fetches
+        wave_count = math.ceil(source_count / MAX_FETCH_WORKERS)
+        per_source_timeout = available_time // wave_count
 
         # Ensure we don't go below minimum timeout
         effective_timeout = max(per_source_timeout, MIN_PER_SOURCE_TIMEOUT)
 
         # Warn if total estimated time exceeds max timeout
-        estimated_total_time = effective_timeout * source_count
+        estimated_total_time = effective_timeout * wave_count
         if estimated_total_time > MAX_REQUEST_TIMEOUT:
             logger.warning(
                 "Estimated fetch time exceeds Gunicorn timeout limit",
@@ -73,6 +92,7 @@ class SourceService:
                     "event": LogEvent.SOURCE_FETCH,
                     "status": "timeout-calculated",
                     "source_count": source_count,
+                    "wave_count": wave_count,
                     "per_source_timeout_seconds": effective_timeout,
                     "estimated_total_seconds": estimated_total_time,
                     "max_request_timeout_seconds": MAX_REQUEST_TIMEOUT,
@@ -86,6 +106,7 @@ class SourceService:
                     "event": LogEvent.SOURCE_FETCH,
                     "status": "timeout-calculated",
                     "source_count": source_count,
+                    "wave_count": wave_count,
                     "available_time_seconds": available_time,
                     "per_source_timeout_seconds": effective_timeout,
                     "estimated_total_seconds": estimated_total_time,
@@ -95,43 +116,212 @@ class SourceService:
 
         return effective_timeout
 
+    def _source_timeout(
+        self,
+        source: Source,
+        default_timeout: int,
+        latency_stats: dict[str, latency.LatencyStats],
+    ) -> int:
+        """
+        Timeout for one source, from its fetch latency history if it has one.
+
+        Sources without history keep the count-based ``default_timeout``.
+        """
+        if is_local_url(source.url):
+            return default_timeout
+        return latency.timeout_for(
+            latency_stats.get(source.url),
+            default=default_timeout,
+            minimum=MIN_PER_SOURCE_TIMEOUT,
+            maximum=MAX_REQUEST_TIMEOUT - SAFETY_BUFFER,
+        )
+
+    def _expected_latency(
+        self,
+        source: Source,
+        latency_stats: dict[str, latency.LatencyStats],
+    ) -> float:
+        """Typical fetch latency of a source; unknown sources count as slowest"""
+        stats = latency_stats.get(source.url)
+        return stats.ewma if stats is not None else math.inf
+
     def process_sources(self, sources: list[Source]) -> list[SourceData]:
-        """Process multiple sources, handling special source types"""
-        processed_sources = []
+        """
+        Process multiple sources concurrently, handling special source types.
+
+        Remote and Meetup sources are fetched, parsed and customized on a
+        bounded thread pool. Local sources are merged on the calling thread
+        while the remote fetches are in flight, since they query the database
+        and share ``processed_uuids`` for circular reference detection.
+
+        All sources share a single deadline derived from the Gunicorn timeout;
+        sources that have not finished by then are reported as timed out.
+        Local sources merge their calendar under the same deadline and on the
+        same thread pool, so nesting neither extends the request nor adds
+        threads, and no source gets a timeout that outlasts the deadline.
+        Remote sources with a fetch latency history get a timeout derived
+        from it and are started slowest first, so slow sources overlap with
+        the fast ones instead of being left for the end.
+
+        Returns:
+            Processed source data in the same order as ``sources``
+        """
+        deadline = self.deadline
+        if deadline is None:
+            deadline = time.monotonic() + MAX_REQUEST_TIMEOUT - SAFETY_BUFFER
+        max_timeout = max(math.ceil(deadline - time.monotonic()), 1)
+        sources = list(sources)
 
         # Calculate timeout based on source count
         source_count = len(sources)
         per_source_timeout = self._calculate_per_source_timeout(source_count)
 
-        for source in sources:
-            processor = SourceProcessor(source, timeout=per_source_timeout)
+        remote_urls = [s.url for s in sources if not is_local_url(s.url)]
+        latency_stats = latency.get_stats(remote_urls) if remote_urls else {}
+
+        processors = [
+            SourceProcessor(
+                source,
+                timeout=min(
+                    self._source_timeout(source, per_source_timeout, latency_stats),
+                    max_timeout,
+                ),
+            )
+            for source in sources
+        ]
+        local_processors = [p for p in processors if is_local_url(p.source.url)]
+        remote_processors = sorted(
+            (p for p in processors if p not in local_processors),
+            key=lambda p: self._expected_latency(p.source, latency_stats),
+            reverse=True,
+        )
+
+        # Threads are only started as fetches are submitted
+        executor = self.executor or ThreadPoolExecutor(
+            max_workers=MAX_FETCH_WORKERS,
+            thread_name_prefix="source-fetch",
+        )
+        futures = {}
+        try:
+            futures = {
+                executor.submit(self._process_remote, processor): processor
+                for processor in remote_processors
+            }
+
+            for processor in local_processors:
+                self._process_local(processor, deadline, executor)
+
+            remaining = max(deadline - time.monotonic(), 0)
+            done, not_done = wait(futures, timeout=remaining)
+        finally:
+            if executor is self.executor:
+                # The outer merge owns the pool; drop fetches not yet started
+                for future in futures:
+                    future.cancel()
+            else:
+                # Don't block on stragglers; they finish after their socket
+                # timeout
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        for future in done:
+            # Re-raise unexpected errors from the worker thread
+            future.result()
+
+        timed_out = {futures[future] for future in not_done}
+        processed_sources = []
+        for processor in processors:
+            if processor in timed_out:
+                processed_sources.append(self._timed_out_source_data(processor))
+            else:
+                processed_sources.append(processor.source_data)
+
+        return processed_sources
+
+    def _process_local(
+        self,
+        processor: SourceProcessor,
+        deadline: float,
+        executor: ThreadPoolExecutor,
+    ) -> None:
+        """
+        Merge a local source and apply customizations on this thread.
 
-            if is_local_url(source.url):
-                self._process_local_source(processor.source_data)
-            elif is_meetup_url(source.url):
+        Without customizations, the nested calendar's timezone and event
+        blocks are spliced in as they are, instead of parsing its output.
+        """
+        merged = self._process_local_source(processor.source_data, deadline, executor)
+        if merged is None:
+            return
+        if not processor.needs_customization():
+            serialized = SerializedSource.from_bytes(merged)
+            if serialized is not None:
+                processor.source_data.serialized = serialized
+                return
+        processor.source_data.ical = ICalendar.from_ical(merged)
+        processor.customize_calendar()
+
+    def _process_remote(self, processor: SourceProcessor) -> None:
+        """Fetch, validate and customize a remote or Meetup source"""
+        source = processor.source
+        try:
+            if is_meetup_url(source.url):
                 try:
                     logger.debug("Processing Meetup source: %s", source.url)
                     calendar_data = processor.fetcher.fetch_calendar(
                         source.url,
-                        timeout=per_source_timeout,
+                        timeout=processor.timeout,
                     )
                     ical = processor._validate_calendar_components(calendar_data)
                     processor.source_data.ical = ical
                 except (RequestException, HTTPError, CalendarValidationError) as e:
                     logger.debug("using api to fetch meetup calendar: %s", e)
                     self._process_meetup_source(processor.source_data)
-
             else:
                 processor.fetch_and_validate()
 
             if processor.source_data.ical:
                 processor.customize_calendar()
-            processed_sources.append(processor.source_data)
+        finally:
+            # Worker threads must not leak database connections
+            connections.close_all()
 
-        return processed_sources
+    def _timed_out_source_data(self, processor: SourceProcessor) -> SourceData:
+        """Build the result for a source that missed the request deadline"""
+        source = processor.source
+        logger.info(
+            "Source fetch exceeded request deadline",
+            extra={
+                "event": LogEvent.SOURCE_FETCH,
+                "status": "timeout",
+                "source_id": source.pk,
+                "source_name": source.name,
+                "source_url": source.url[:200],
+                "calendar_uuid": source.calendar.uuid,
+                "timeout_seconds": processor.timeout,
+            },
+        )
+        # A fresh SourceData, since the worker may still write to its own
+        return SourceData(
+            source=source,
+            error="Timed out while fetching calendar",
+        )
 
-    def _process_local_source(self, source_data: SourceData) -> None:
-        """Process a local source by using CalendarMergerService"""
+    def _process_local_source(
+        self,
+        source_data: SourceData,
+        deadline: float,
+        executor: ThreadPoolExecutor,
+    ) -> bytes | None:
+        """
+        Merge the calendar a local source refers to with CalendarMergerService.
+
+        The nested merge runs under ``deadline`` and fetches its remote sources
+        on ``executor``, both shared with the merge that includes it.
+
+        Returns:
+            The nested merged calendar, or None if it cannot be merged, with
+            the reason set as the source's error
+        """
         source = source_data.source
         uuid = parse_calendar_uuid(source.url)
 
@@ -155,7 +345,7 @@ class SourceService:
                     "calendar_uuid": source.calendar.uuid,
                 },
             )
-            return
+            return None
 
         if uuid in self.processed_uuids:
             source_data.error = "Circular calendar reference detected"
@@ -171,7 +361,7 @@ class SourceService:
                     "nested_uuid": uuid,
                 },
             )
-            return
+            return None
 
         sub_calendar = Calendar.objects.filter(uuid=uuid).first()
         if not sub_calendar:
@@ -188,7 +378,23 @@ class SourceService:
                     "nested_uuid": uuid,
                 },
             )
-            return
+            return None
+
+        if time.monotonic() >= deadline:
+            source_data.error = "Timed out while fetching calendar"
+            logger.info(
+                "Local source: Request deadline passed before merging",
+                extra={
+                    "event": LogEvent.SOURCE_FETCH,
+                    "status": "timeout",
+                    "source_type": "local",
+                    "source_id": source.pk,
+                    "source_name": source.name,
+                    "calendar_uuid": source.calendar.uuid,
+                    "nested_calendar_uuid": sub_calendar.uuid,
+                },
+            )
+            return None
 
         self.processed_uuids.add(uuid)
 
@@ -209,9 +415,13 @@ class SourceService:
             },
         )
 
-        merger = CalendarMergerService(sub_calendar, self.processed_uuids)
-        calendar_str = merger.merge()
-        source_data.ical = ICalendar.from_ical(calendar_str)
+        merger = CalendarMergerService(
+            sub_calendar,
+            self.processed_uuids,
+            deadline=deadline,
+            executor=executor,
+        )
+        merged = merger.merge()
 
         logger.info(
             "Local source: Nested calendar merged successfully",
@@ -226,6 +436,7 @@ class SourceService:
                 "nested_calendar_name": sub_calendar.name,
             },
         )
+        return merged
 
     def _process_meetup_source(self, source_data: SourceData) -> None:
         """Process a Meetup source"""
@@ -1,65 +1,198 @@
 import logging
 import time
+from collections import Counter
+from collections import defaultdict
+from collections.abc import Iterator
+from itertools import batched
+from typing import TYPE_CHECKING
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
 
 from config import celery_app
+from mergecalweb.calendars.fetching import CalendarFetcher
+from mergecalweb.calendars.fetching import crawler
 from mergecalweb.calendars.models import Calendar
-from mergecalweb.calendars.utils import combine_calendar
+from mergecalweb.calendars.models import Source
+from mergecalweb.calendars.services.calendar_merger_service import CalendarMergerService
 from mergecalweb.core.logging_events import LogEvent
+from mergecalweb.core.utils import is_local_url
+from mergecalweb.core.utils import parse_calendar_uuid
+
+if TYPE_CHECKING:
+    import uuid
 
 # Use Celery's task logger for better integration
 task_logger = get_task_logger(__name__)
 logger = logging.getLogger(__name__)
 
+SWEEP_CHUNK_SIZE = 500  # Source URLs checked per cache round trip
+# Distinct source URLs crawled per task; sized so a chunk of slow feeds
+# still finishes within the task soft time limit
+BULK_REFRESH_CHUNK_SIZE = 500
+BULK_FETCH_TIMEOUT = 10
+
+
+def _remote_source_url_chunks(chunk_size: int) -> Iterator[list[str]]:
+    """Stream the distinct remote source URLs in chunks."""
+    urls = (
+        Source.objects.order_by()
+        .values_list("url", flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in batched(urls, chunk_size):
+        yield [url for url in chunk if not is_local_url(url)]
+
+
+def _with_including_calendars(calendar_ids: list[int]) -> list[int]:
+    """
+    Add the calendars that include any of ``calendar_ids`` as a local source.
+
+    Followed transitively: a calendar including one of those changes too
+    once it is rebuilt.
+    """
+    includers: defaultdict[uuid.UUID, set[int]] = defaultdict(set)
+    local_sources = (
+        Source.objects.filter(url__contains="/calendars/")
+        .order_by()
+        .values_list("url", "calendar_id")
+    )
+    for url, calendar_id in local_sources.iterator():
+        calendar_uuid = parse_calendar_uuid(url)
+        if calendar_uuid is not None and is_local_url(url):
+            includers[calendar_uuid].add(calendar_id)
+
+    result = list(calendar_ids)
+    seen = set(calendar_ids)
+    pending = set(calendar_ids)
+    while pending and includers:
+        uuids = Calendar.objects.filter(pk__in=pending).values_list("uuid", flat=True)
+        pending = set()
+        for calendar_uuid in uuids:
+            for calendar_id in includers.get(calendar_uuid, set()) - seen:
+                seen.add(calendar_id)
+                pending.add(calendar_id)
+                result.append(calendar_id)
+    return result
+
 
 @celery_app.task()
 def combine_all_calendar_task():
-    # Fetch calendars at task execution time, not module load time
-    calendars = Calendar.objects.all()
-    total_calendars = calendars.count()
+    """
+    Refresh every distinct source feed once, then rebuild what changed.
 
+    Feeds shared by many calendars cost one upstream request per cycle.
+    Refreshes run in chunks of distinct URLs; each chunk queues rebuilds
+    for just the calendars whose feeds changed.
+    """
+    start_time = time.time()
     task_logger.info(
         "Starting bulk calendar combine task",
         extra={
-            "event": LogEvent.BULK_CALENDAR_COMBINE_START,
-            "total_calendars": total_calendars,
+            "event": LogEvent.CALENDAR_TASK,
+            "task_type": "bulk-combine",
+            "status": "start",
         },
     )
 
-    queued = 0
-    for cal in calendars:
-        combine_calendar_task.delay(cal.id)
-        queued += 1
+    queued_chunks = 0
+    total_urls = 0
+    for chunk in _remote_source_url_chunks(BULK_REFRESH_CHUNK_SIZE):
+        if chunk:
+            refresh_feeds_task.delay(chunk)
+            queued_chunks += 1
+            total_urls += len(chunk)
 
     task_logger.info(
         "Bulk calendar combine tasks queued",
         extra={
-            "event": LogEvent.BULK_CALENDAR_COMBINE_QUEUED,
-            "queued": queued,
-            "total_calendars": total_calendars,
+            "event": LogEvent.CALENDAR_TASK,
+            "task_type": "bulk-combine",
+            "status": "queued",
+            "queued": queued_chunks,
+            "total_urls": total_urls,
+            "duration_seconds": round(time.time() - start_time, 2),
         },
     )
 
 
+@shared_task
+def refresh_feeds_task(urls: list[str]) -> None:
+    """
+    Refresh a chunk of source feeds and rebuild calendars using changed ones.
+
+    Calendars including a rebuilt calendar as a local source are rebuilt too.
+    """
+    start_time = time.time()
+    results = crawler.crawl(urls, timeout=BULK_FETCH_TIMEOUT)
+    changed = [result.url for result in results if result.changed]
+
+    calendar_ids = list(
+        Source.objects.filter(url__in=changed)
+        .order_by()
+        .values_list("calendar_id", flat=True)
+        .distinct(),
+    )
+    if calendar_ids:
+        calendar_ids = _with_including_calendars(calendar_ids)
+    for calendar_id in calendar_ids:
+        combine_calendar_task.delay(calendar_id)
+
+    statuses = Counter(result.status for result in results)
+    durations = sorted(result.duration_seconds for result in results)
+    task_logger.info(
+        "Source feeds refreshed",
+        extra={
+            "event": LogEvent.CALENDAR_TASK,
+            "task_type": "feed-refresh",
+            "status": "success",
+            "total_urls": len(urls),
+            "changed_urls": len(changed),
+            "statuses": dict(statuses),
+            "total_bytes": sum(result.size_bytes for result in results),
+            "max_fetch_seconds": durations[-1] if durations else 0,
+            "queued": len(calendar_ids),
+            "duration_seconds": round(time.time() - start_time, 2),
+        },
+    )
+    for result in results:
+        if result.status == "error":
+            task_logger.info(
+                "Source feed refresh failed",
+                extra={
+                    "event": LogEvent.CALENDAR_TASK,
+                    "task_type": "feed-refresh",
+                    "status": "error",
+                    "url": result.url[:200],
+                    "status_code": result.status_code,
+                    "error": result.error,
+                    "duration_seconds": result.duration_seconds,
+                },
+            )
+
+
 @shared_task
 def combine_calendar_task(cal_id):
     start_time = time.time()
     task_logger.info(
         "Starting calendar combine task",
         extra={
-            "event": LogEvent.CALENDAR_COMBINE_TASK_START,
+            "event": LogEvent.CALENDAR_TASK,
+            "task_type": "combine",
+            "status": "start",
             "calendar_id": cal_id,
         },
     )
 
     try:
-        calendar = Calendar.objects.get(pk=cal_id)
+        calendar = Calendar.objects.select_related("owner").get(pk=cal_id)
         task_logger.debug(
             "Calendar loaded for combine task",
             extra={
-                "event": LogEvent.CALENDAR_COMBINE_LOADED,
+                "event": LogEvent.CALENDAR_TASK,
+                "task_type": "combine",
+                "status": "loaded",
                 "calendar_id": cal_id,
                 "calendar_uuid": calendar.uuid,
                 "calendar_name": calendar.name,
@@ -68,13 +201,15 @@ def combine_calendar_task(cal_id):
             },
         )
 
-        combine_calendar(calendar)
+        CalendarMergerService(calendar).rebuild()
 
         duration = time.time() - start_time
         task_logger.info(
             "Calendar combine task completed successfully",
             extra={
-                "event": LogEvent.CALENDAR_COMBINE_TASK_SUCCESS,
+                "event": LogEvent.CALENDAR_TASK,
+                "task_type": "combine",
+                "status": "success",
                 "calendar_id": cal_id,
                 "calendar_uuid": calendar.uuid,
                 "calendar_name": calendar.name,
@@ -83,24 +218,66 @@ def combine_calendar_task(cal_id):
         )
 
     except Calendar.DoesNotExist:
-        task_logger.exception(
-            "Calendar combine task failed, calendar not found",
+        # Deleted since the rebuild was queued - nothing to do
+        task_logger.warning(
+            "Calendar combine task skipped, calendar not found",
             extra={
-                "event": LogEvent.CALENDAR_COMBINE_TASK_NOT_FOUND,
+                "event": LogEvent.CALENDAR_TASK,
+                "task_type": "combine",
+                "status": "not-found",
                 "calendar_id": cal_id,
             },
         )
-        raise
 
     except Exception as e:
         duration = time.time() - start_time
         task_logger.exception(
             "Calendar combine task failed with error",
             extra={
-                "event": LogEvent.CALENDAR_COMBINE_TASK_ERROR,
+                "event": LogEvent.CALENDAR_TASK,
+                "task_type": "combine",
+                "status": "error",
                 "calendar_id": cal_id,
                 "error_type": type(e).__name__,
                 "duration_seconds": round(duration, 2),
             },
         )
         raise
+
+
+@shared_task
+def refresh_feed_task(url: str) -> None:
+    """Revalidate a cached source feed in the background."""
+    CalendarFetcher().refresh_calendar(url)
+
+
+@shared_task
+def refresh_recent_feeds_task() -> None:
+    """
+    Refresh recently used source feeds shortly before they go stale.
+
+    Meant to run every minute via django-celery-beat, so that requests
+    almost never find a stale feed and never wait on the upstream.
+    """
+    start_time = time.time()
+    fetcher = CalendarFetcher()
+
+    checked = 0
+    queued = 0
+    for remote_urls in _remote_source_url_chunks(SWEEP_CHUNK_SIZE):
+        checked += len(remote_urls)
+        for url in fetcher.feeds_due_for_refresh(remote_urls):
+            fetcher.schedule_refresh(url)
+            queued += 1
+
+    task_logger.info(
+        "Recently used feeds queued for refresh",
+        extra={
+            "event": LogEvent.CALENDAR_TASK,
+            "task_type": "feed-sweep",
+            "status": "queued",
+            "checked": checked,
+            "queued": queued,
+            "duration_seconds": round(time.time() - start_time, 2),
+        },
+    )
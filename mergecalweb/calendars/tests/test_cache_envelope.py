@@ -0,0 +1,122 @@
+import hashlib
+import json
+import struct
+import time
+import zlib
+from pathlib import Path
+
+import pytest
+
+from mergecalweb.calendars.exceptions import CacheEnvelopeError
+from mergecalweb.calendars.fetching import cache_envelope
+
+CALENDARS_DIR = Path(__file__).parent / "calendars"
+
+
+def pack_legacy(content: bytes, fetched_at: float, validators: dict) -> bytes:
+    """Build a format version 1 entry, which carried the body inline"""
+    encoded_validators = json.dumps(validators).encode()
+    header = struct.pack(
+        ">4sBd32sH",
+        cache_envelope.LEGACY_MAGIC,
+        cache_envelope.CODEC_ZLIB,
+        fetched_at,
+        hashlib.sha256(content).digest(),
+        len(encoded_validators),
+    )
+    return header + encoded_validators + zlib.compress(content)
+
+
+class TestCacheEnvelope:
+    def test_pointer_round_trip(self):
+        digest = cache_envelope.content_hash(b"BEGIN:VCALENDAR")
+        fetched_at = time.time()
+        validators = {"etag": '"abc"', "last_modified": "Mon, 01 Jan 2024"}
+
+        packed = cache_envelope.pack(digest, fetched_at, validators)
+        entry = cache_envelope.unpack(packed)
+
+        assert cache_envelope.is_envelope(packed)
+        assert entry.content is None
+        assert entry.content_hash == digest
+        assert entry.fetched_at == fetched_at
+        assert entry.validators == validators
+
+    def test_freshness_lifetime_round_trip(self):
+        digest = cache_envelope.content_hash(b"BEGIN:VCALENDAR")
+
+        with_lifetime = cache_envelope.unpack(cache_envelope.pack(digest, 1.0, {}, 600))
+        without_lifetime = cache_envelope.unpack(cache_envelope.pack(digest, 1.0))
+
+        assert with_lifetime.fresh_for == 600  # noqa: PLR2004
+        assert without_lifetime.fresh_for is None
+
+    def test_version_2_pointers_readable(self):
+        digest = cache_envelope.content_hash(b"BEGIN:VCALENDAR")
+        validators = json.dumps({"etag": '"v2"'}).encode()
+        packed = (
+            struct.pack(
+                ">4sd32sH",
+                cache_envelope.V2_MAGIC,
+                1.0,
+                bytes.fromhex(digest),
+                len(validators),
+            )
+            + validators
+        )
+
+        entry = cache_envelope.unpack(packed)
+
+        assert entry.content_hash == digest
+        assert entry.validators == {"etag": '"v2"'}
+        assert entry.fresh_for is None
+
+    def test_body_round_trip(self):
+        content = (CALENDARS_DIR / "google.ics").read_bytes()
+
+        packed = cache_envelope.pack_body(content)
+
+        assert len(packed) < len(content)
+        assert cache_envelope.unpack_body(packed) == content
+
+    def test_content_hash_tracks_body(self):
+        assert cache_envelope.content_hash(b"A") == cache_envelope.content_hash(b"A")
+        assert cache_envelope.content_hash(b"A") != cache_envelope.content_hash(b"B")
+
+    def test_zlib_bodies_readable(self, monkeypatch):
+        """Bodies written without zstd stay readable once it is installed"""
+        monkeypatch.setattr(cache_envelope, "zstandard", None)
+        packed = cache_envelope.pack_body(b"BEGIN:VCALENDAR")
+
+        assert packed[4] == cache_envelope.CODEC_ZLIB
+        assert cache_envelope.unpack_body(packed) == b"BEGIN:VCALENDAR"
+
+    def test_version_1_entries_readable(self):
+        packed = pack_legacy(b"BEGIN:VCALENDAR", 1.0, {"etag": '"v1"'})
+
+        entry = cache_envelope.unpack(packed)
+
+        assert cache_envelope.is_envelope(packed)
+        assert entry.content == b"BEGIN:VCALENDAR"
+        assert entry.validators == {"etag": '"v1"'}
+        assert entry.content_hash == cache_envelope.content_hash(b"BEGIN:VCALENDAR")
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            cache_envelope.MAGIC,
+            b"MCF\x09" + bytes(50),
+            pack_legacy(b"BODY", 1.0, {})[:-2],
+        ],
+    )
+    def test_corrupt_envelope(self, data):
+        with pytest.raises(CacheEnvelopeError):
+            cache_envelope.unpack(data)
+
+    def test_corrupt_body(self):
+        with pytest.raises(CacheEnvelopeError):
+            cache_envelope.unpack_body(cache_envelope.pack_body(b"BODY")[:-2])
+
+    def test_legacy_values_are_not_envelopes(self):
+        assert not cache_envelope.is_envelope("BEGIN:VCALENDAR")
+        assert not cache_envelope.is_envelope((b"BEGIN:VCALENDAR", 1.0, {}))
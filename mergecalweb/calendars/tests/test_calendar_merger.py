@@ -1,9 +1,14 @@
 # mergecalweb/calendars/tests/test_calendar_merger.py
+import gzip
+import time
 from http import client as http_client
 from typing import TYPE_CHECKING
 
+import brotli
 import pytest
+from django.core.cache import cache
 
+from mergecalweb.calendars.fetching import single_flight
 from mergecalweb.calendars.services.calendar_merger_service import CalendarMergerService
 
 from .factories import SourceFactory
@@ -37,7 +42,7 @@ def test_calendar_merger_with_test_files(
 
     # Create merger instance and merge calendars
     merger = CalendarMergerService(calendar)
-    merged_calendar = merger.merge()
+    merged_calendar = merger.merge().decode("utf-8")
 
     # Verify events from all test calendars are present
     assert "Basic Test Event" in merged_calendar
@@ -66,3 +71,80 @@ def test_calendar_merger_with_test_files(
     # Verify refresh interval properties are present
     assert "X-PUBLISHED-TTL:" in content
     assert "REFRESH-INTERVAL:" in content
+
+
+@pytest.mark.django_db
+def test_expired_calendar_served_while_rebuilding(calendar: "Calendar") -> None:
+    """Only the lock holder rebuilds; other callers get the previous output."""
+    cache_key = f"calendar_str_{calendar.uuid}"
+    cache.set(cache_key, ("PREVIOUS OUTPUT", time.time() - 1))
+
+    with single_flight.lock(f"calendar_merge_lock_{calendar.uuid}", 60) as is_leader:
+        assert is_leader
+        assert CalendarMergerService(calendar).merge() == b"PREVIOUS OUTPUT"
+
+    rebuilt = CalendarMergerService(calendar).merge()
+    assert rebuilt.startswith(b"BEGIN:VCALENDAR")
+    assert cache.get(cache_key).content == rebuilt
+
+
+@pytest.mark.django_db
+def test_calendar_file_conditional_get(
+    calendar: "Calendar",
+    mock_calendar_request: None,
+    client: "Client",
+) -> None:
+    """Unchanged calendars are answered with 304 and no body."""
+    SourceFactory(url="http://example.com/basic.ics", calendar=calendar)
+    url = calendar.get_calendar_file_url()
+
+    response = client.get(url)
+    etag = response["ETag"]
+    assert response.status_code == http_client.OK
+    assert response["Last-Modified"]
+
+    # Output is deterministic, so a rebuild yields the same validators
+    cache.delete(f"calendar_str_{calendar.uuid}")
+    response = client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == http_client.NOT_MODIFIED
+    assert response.content == b""
+    assert response["ETag"] == etag
+
+    response = client.head(url, headers={"if-none-match": etag})
+    assert response.status_code == http_client.NOT_MODIFIED
+
+    response = client.get(url, headers={"if-none-match": '"outdated"'})
+    assert response.status_code == http_client.OK
+    assert b"Basic Test Event" in response.content
+
+
+@pytest.mark.django_db
+def test_calendar_file_content_negotiation(
+    calendar: "Calendar",
+    mock_calendar_request: None,
+    client: "Client",
+) -> None:
+    """Pre-compressed variants are picked from Accept-Encoding."""
+    SourceFactory(url="http://example.com/basic.ics", calendar=calendar)
+    url = calendar.get_calendar_file_url()
+
+    identity = client.get(url)
+    assert not identity.has_header("Content-Encoding")
+    assert "Accept-Encoding" in identity["Vary"]
+
+    response = client.get(url, headers={"accept-encoding": "gzip, deflate, br"})
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == identity.content
+    assert response["ETag"] != identity["ETag"]
+
+    response = client.get(url, headers={"accept-encoding": "gzip, br;q=0"})
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.content) == identity.content
+
+    etag = response["ETag"]
+    response = client.get(
+        url,
+        headers={"accept-encoding": "gzip", "if-none-match": etag},
+    )
+    assert response.status_code == http_client.NOT_MODIFIED
+    assert "Accept-Encoding" in response["Vary"]
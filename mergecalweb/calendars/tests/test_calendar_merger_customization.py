@@ -58,7 +58,7 @@ def test_calendar_merger_customizations(
 
     # Create merger instance and merge calendars
     merger = CalendarMergerService(calendar)
-    merged_calendar = merger.merge()
+    merged_calendar = merger.merge().decode("utf-8")
 
     # Verify customizations are applied
     assert "[Work]: Basic Test Event" in merged_calendar
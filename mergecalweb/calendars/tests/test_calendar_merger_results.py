@@ -44,7 +44,7 @@ def test_calendar_merger_with_test_files(
 
     # Merge calendars
     merger = CalendarMergerService(calendar)
-    merged_calendar = merger.merge()
+    merged_calendar = merger.merge().decode("utf-8")
 
     # Load and compare with golden file
     golden_file = Path(__file__).parent / "calendars/golden_merged_calendar.ics"
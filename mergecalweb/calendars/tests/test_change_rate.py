@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mergecalweb.calendars.fetching import change_rate
+from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+
+# In the past, so cache expiry computed at the patched time still holds
+START = time.time() - timedelta(days=1).total_seconds()
+
+
+def record_at(url: str, digest: str, at: float) -> change_rate.ChangeHistory:
+    with patch.object(change_rate.time, "time", return_value=at):
+        return change_rate.record(url, digest)
+
+
+def record_series(url: str, digests: list[str], every: timedelta) -> None:
+    for i, digest in enumerate(digests):
+        record_at(url, digest, START + i * every.total_seconds())
+
+
+class TestChangeRate:
+    def test_no_estimate_before_minimum_observation(self):
+        url = "http://changes.example.com/new.ics"
+        record_series(url, ["a", "a", "b"], timedelta(minutes=2))
+
+        assert change_rate.learned_lifetime(url) is None
+
+    def test_rarely_changing_feed_backed_off(self):
+        url = "http://changes.example.com/weekly.ics"
+        record_series(url, ["a"] * 13, timedelta(hours=1))
+
+        history = change_rate.get_history(url)
+
+        assert history.changes == 0
+        assert history.change_interval == pytest.approx(12 * 3600, rel=0.05)
+        assert change_rate.learned_lifetime(url) == pytest.approx(
+            12 * 3600 * change_rate.POLL_FRACTION,
+            rel=0.05,
+        )
+
+    def test_volatile_feed_polled_often(self):
+        url = "http://changes.example.com/live.ics"
+        record_series(url, [str(i) for i in range(13)], timedelta(minutes=10))
+
+        assert change_rate.get_history(url).change_interval == pytest.approx(
+            600,
+            rel=0.05,
+        )
+
+    def test_old_observations_decay(self):
+        url = "http://changes.example.com/calmed-down.ics"
+        record_series(url, [str(i) for i in range(13)], timedelta(minutes=10))
+        before = change_rate.get_history(url).changes
+
+        later = START + 12 * 600 + change_rate.HALF_LIFE.total_seconds()
+        history = record_at(url, "12", later)
+
+        assert history.changes == pytest.approx(before / 2)
+
+    def test_learned_lifetime_stored_with_fetched_feed(self, settings):
+        settings.CALENDAR_FEED_MIN_FRESHNESS = 60
+        settings.CALENDAR_FEED_MAX_FRESHNESS = 7200
+        url = "http://changes.example.com/quiet.ics"
+        record_series(url, ["a"] * 13, timedelta(hours=1))
+        learned = change_rate.learned_lifetime(url)
+        response = httpx.Response(
+            200,
+            content=b"QUIET",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+        fetcher = CalendarFetcher()
+        with patch(
+            "mergecalweb.calendars.fetching.http_client.get",
+            return_value=response,
+        ):
+            fetcher.fetch_calendar(url)
+
+        entry = fetcher.read_entries([url])[url]
+        assert entry.fresh_for == pytest.approx(learned)
@@ -0,0 +1,137 @@
+import time
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from mergecalweb.calendars.exceptions import CircuitOpenError
+from mergecalweb.calendars.exceptions import HostBusyError
+from mergecalweb.calendars.fetching import circuit_breaker
+from mergecalweb.calendars.fetching import latency
+from mergecalweb.calendars.fetching.fetcher import CACHE_TIMEOUT
+from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+
+
+@pytest.fixture
+def fetcher():
+    return CalendarFetcher()
+
+
+@pytest.fixture
+def mock_requests():
+    with patch("mergecalweb.calendars.fetching.http_client.get") as mock:
+        yield mock
+
+
+def http_error(status_code: int) -> requests.HTTPError:
+    return requests.HTTPError(response=Mock(status_code=status_code))
+
+
+def trip(host: str) -> None:
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+        circuit_breaker.record_failure(host)
+
+
+def expire_reset_timeout(host: str) -> None:
+    opened_at = time.time() - circuit_breaker.RESET_TIMEOUT.total_seconds() - 1
+    cache.set(f"calendar_circuit_opened_{host}", opened_at)
+
+
+class TestCircuitBreaker:
+    def test_repeated_failures_short_circuit_fetches(self, fetcher, mock_requests):
+        url = "http://timing-out.example.com/cal.ics"
+        mock_requests.side_effect = requests.Timeout("Timed out")
+
+        for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+            with pytest.raises(requests.Timeout):
+                fetcher._fetch_from_remote(url)  # noqa: SLF001
+
+        with pytest.raises(CircuitOpenError):
+            fetcher._fetch_from_remote(url)  # noqa: SLF001
+        assert mock_requests.call_count == circuit_breaker.FAILURE_THRESHOLD
+
+    def test_feed_errors_do_not_trip_circuit(self, fetcher, mock_requests):
+        """A missing feed says nothing about the other feeds on its host"""
+        url = "http://missing.example.com/cal.ics"
+        mock_requests.side_effect = http_error(404)
+
+        for _ in range(circuit_breaker.FAILURE_THRESHOLD + 1):
+            with pytest.raises(requests.HTTPError):
+                fetcher._fetch_from_remote(url)  # noqa: SLF001
+
+        assert circuit_breaker.allow_request("missing.example.com")
+
+    def test_failures_among_successes_do_not_trip_circuit(self):
+        """A few slow feeds on a large host say nothing about the others"""
+        host = "large.example.com"
+        for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+            circuit_breaker.record_failure(host)
+            circuit_breaker.record_success(host)
+            circuit_breaker.record_success(host)
+
+        assert circuit_breaker.allow_request(host)
+
+    def test_mostly_failing_host_trips_circuit(self):
+        host = "flaky.example.com"
+        for _ in range(circuit_breaker.FAILURE_THRESHOLD - 1):
+            circuit_breaker.record_failure(host)
+        circuit_breaker.record_success(host)
+        circuit_breaker.record_failure(host)
+
+        assert not circuit_breaker.allow_request(host)
+
+    def test_host_busy_not_recorded(self, fetcher, mock_requests):
+        """Waiting for our own per-host limit says nothing about the host"""
+        url = "http://busy-slots.example.com/cal.ics"
+        mock_requests.side_effect = HostBusyError("No slot")
+
+        for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+            with pytest.raises(HostBusyError):
+                fetcher._fetch_from_remote(url)  # noqa: SLF001
+
+        assert circuit_breaker.allow_request("busy-slots.example.com")
+        assert cache.get(latency._history_key(url)) is None  # noqa: SLF001
+        fetcher.raise_if_failed_recently(url)
+
+    def test_half_open_allows_single_probe(self):
+        host = "probe.example.com"
+        trip(host)
+        assert not circuit_breaker.allow_request(host)
+
+        expire_reset_timeout(host)
+
+        assert circuit_breaker.allow_request(host)
+        assert not circuit_breaker.allow_request(host)
+
+    def test_successful_probe_closes_circuit(self):
+        host = "recovered.example.com"
+        trip(host)
+        expire_reset_timeout(host)
+        assert circuit_breaker.allow_request(host)
+
+        circuit_breaker.record_success(host)
+
+        assert circuit_breaker.allow_request(host)
+        assert circuit_breaker.allow_request(host)
+
+    def test_failed_probe_reopens_circuit(self):
+        host = "still-down.example.com"
+        trip(host)
+        expire_reset_timeout(host)
+        assert circuit_breaker.allow_request(host)
+
+        circuit_breaker.record_failure(host)
+
+        assert not circuit_breaker.allow_request(host)
+
+    def test_open_circuit_serves_stale_copy(self, fetcher, mock_requests):
+        url = "http://stale-down.example.com/cal.ics"
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        cache.set(f"calendar_data_{url}", (b"STALE DATA", cache_time, {}))
+        trip("stale-down.example.com")
+
+        with patch.object(fetcher, "schedule_refresh", return_value=False):
+            assert fetcher.fetch_calendar(url) == b"STALE DATA"
+        mock_requests.assert_not_called()
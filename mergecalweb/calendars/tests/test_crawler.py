@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from mergecalweb.calendars.fetching import CalendarFetcher
+from mergecalweb.calendars.fetching import crawler
+
+ETAG = '"v1"'
+
+
+def feed(marker: str) -> bytes:
+    return f"BEGIN:VCALENDAR\r\nX-MARKER:{marker}\r\nEND:VCALENDAR\r\n".encode()
+
+
+OLD = feed("old")
+NEW = feed("new")
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Route the crawler's client through a mock transport set by the test"""
+    state = {}
+    async_client = httpx.AsyncClient
+
+    def client(**kwargs):
+        return async_client(transport=httpx.MockTransport(state["handler"]), **kwargs)
+
+    monkeypatch.setattr(crawler.httpx, "AsyncClient", client)
+    return state
+
+
+class TestCrawler:
+    def test_statuses_reported_in_url_order(self, transport) -> None:
+        fetcher = CalendarFetcher()
+        base = "http://crawl.example.com"
+        for path in ("/not-modified.ics", "/unchanged.ics", "/error.ics"):
+            fetcher.store(f"{base}{path}", OLD, {"etag": ETAG})
+        seen_headers = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen_headers[request.url.path] = request.headers
+            match request.url.path:
+                case "/not-modified.ics":
+                    return httpx.Response(304)
+                case "/unchanged.ics":
+                    return httpx.Response(200, content=OLD)
+                case "/error.ics":
+                    return httpx.Response(500)
+            return httpx.Response(200, content=NEW)
+
+        transport["handler"] = handler
+        paths = ["/new.ics", "/not-modified.ics", "/unchanged.ics", "/error.ics"]
+        results = crawler.crawl([f"{base}{path}" for path in paths])
+
+        assert [result.url for result in results] == [f"{base}{p}" for p in paths]
+        assert [result.status for result in results] == [
+            "updated",
+            "not-modified",
+            "unchanged",
+            "error",
+        ]
+        assert seen_headers["/not-modified.ics"]["if-none-match"] == ETAG
+        assert "if-none-match" not in seen_headers["/new.ics"]
+        assert results[0].size_bytes == len(NEW)
+        assert results[3].status_code == 500  # noqa: PLR2004
+
+    def test_refreshed_feeds_served_from_cache(self, transport) -> None:
+        url = "http://crawl.example.com/cal.ics"
+        transport["handler"] = lambda request: httpx.Response(200, content=NEW)
+
+        crawler.crawl([url])
+
+        transport["handler"] = lambda request: pytest.fail("Feed should be cached")
+        assert CalendarFetcher().fetch_calendar(url) == NEW
+
+    def test_connection_errors_reported(self, transport) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            msg = "Connection refused"
+            raise httpx.ConnectError(msg, request=request)
+
+        transport["handler"] = handler
+        (result,) = crawler.crawl(["http://down.example.com/cal.ics"])
+
+        assert result.status == "error"
+        assert "ConnectError" in result.error
+
+    def test_uncached_feeds_that_failed_recently_skipped(self, transport) -> None:
+        fetcher = CalendarFetcher()
+        failed = "http://crawl.example.com/failed.ics"
+        recovered = "http://crawl.example.com/recovered.ics"
+        fetcher.store(recovered, OLD)
+        for url in (failed, recovered):
+            fetcher._remember_failure(url, requests.Timeout("Timed out"))  # noqa: SLF001
+        transport["handler"] = lambda request: httpx.Response(200, content=NEW)
+
+        skipped, refreshed = crawler.crawl([failed, recovered])
+
+        assert skipped.status == "failed-recently"
+        assert skipped.error == "Timed out"
+        assert refreshed.status == "updated"
+        fetcher.raise_if_failed_recently(recovered)
+
+    def test_html_pages_rejected(self, transport) -> None:
+        page = b"<html><body>Not found</body></html>"
+        transport["handler"] = lambda request: httpx.Response(200, content=page)
+
+        (result,) = crawler.crawl(["http://html.example.com/cal.ics"])
+
+        assert result.status == "error"
+        assert "HTML page" in result.error
+
+    def test_requests_to_one_host_are_limited(self, transport, monkeypatch) -> None:
+        monkeypatch.setattr(crawler, "MAX_CONNECTIONS_PER_HOST", 2)
+        in_flight = {"current": 0, "max": 0}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            await asyncio.sleep(0.01)
+            in_flight["current"] -= 1
+            return httpx.Response(200, content=feed(request.url.path))
+
+        transport["handler"] = handler
+        results = crawler.crawl(
+            [f"http://busy.example.com/{i}.ics" for i in range(10)],
+        )
+
+        assert all(result.changed for result in results)
+        assert in_flight["max"] == 2  # noqa: PLR2004
@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mergecalweb.calendars.exceptions import FeedTooLargeError
+from mergecalweb.calendars.fetching import http_client
+from mergecalweb.calendars.fetching.domain_configs import DEFAULT_POLICY
+from mergecalweb.calendars.fetching.domain_configs import DomainPolicy
+from mergecalweb.calendars.fetching.domain_configs import PolicyIndex
+from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+
+
+@pytest.fixture
+def policies():
+    """Replace the decrypted policies with the ones a test sets up"""
+    index = PolicyIndex([])
+    with patch(
+        "mergecalweb.calendars.fetching.domain_configs._load_policies",
+        return_value=index,
+    ):
+        yield index
+
+
+def use_policies(index: PolicyIndex, *policies: DomainPolicy) -> None:
+    index.__init__(list(policies))
+
+
+class TestPolicyIndex:
+    def test_exact_pattern_matches_only_that_host(self):
+        policy = DomainPolicy(pattern="example.com")
+        index = PolicyIndex([policy])
+
+        assert index.lookup("example.com") is policy
+        assert index.lookup("EXAMPLE.com.") is policy
+        assert index.lookup("cal.example.com") is DEFAULT_POLICY
+
+    def test_wildcard_pattern_matches_only_subdomains(self):
+        policy = DomainPolicy(pattern="*.example.com")
+        index = PolicyIndex([policy])
+
+        assert index.lookup("cal.example.com") is policy
+        assert index.lookup("a.b.example.com") is policy
+        assert index.lookup("example.com") is DEFAULT_POLICY
+        assert index.lookup("notexample.com") is DEFAULT_POLICY
+
+    def test_suffix_pattern_matches_domain_and_subdomains(self):
+        policy = DomainPolicy(pattern=".example.com")
+        index = PolicyIndex([policy])
+
+        assert index.lookup("example.com") is policy
+        assert index.lookup("cal.example.com") is policy
+
+    def test_most_specific_pattern_wins(self):
+        domain = DomainPolicy(pattern=".example.com")
+        subdomain = DomainPolicy(pattern="*.cal.example.com")
+        exact = DomainPolicy(pattern="www.cal.example.com")
+        index = PolicyIndex([domain, subdomain, exact])
+
+        assert index.lookup("www.cal.example.com") is exact
+        assert index.lookup("eu.cal.example.com") is subdomain
+        assert index.lookup("cal.example.com") is domain
+
+    def test_from_config(self):
+        policy = DomainPolicy.from_config(
+            {"domain": " Example.com ", "timeout": 10, "http2": False},
+        )
+
+        assert policy == DomainPolicy(pattern="example.com", timeout=10, http2=False)
+
+    def test_from_config_rejects_unknown_keys(self):
+        with pytest.raises(TypeError):
+            DomainPolicy.from_config({"domain": "example.com", "retries": 3})
+
+
+class TestPolicyEnforcement:
+    def test_headers_are_overridden(self, policies):
+        use_policies(
+            policies,
+            DomainPolicy(
+                pattern=".headers.example.com",
+                user_agent="Custom/1.0",
+                additional_headers={"X-Token": "abc"},
+            ),
+        )
+
+        headers = CalendarFetcher().build_headers("http://headers.example.com/a.ics")
+
+        assert headers["User-Agent"] == "Custom/1.0"
+        assert headers["X-Token"] == "abc"
+
+    def test_timeout_is_capped(self, policies):
+        url = "http://slow.example.com/cal.ics"
+        policy = DomainPolicy(pattern="slow.example.com", timeout=5)
+        use_policies(policies, policy)
+
+        with patch("mergecalweb.calendars.fetching.http_client.get") as mock_get:
+            mock_get.return_value.content = b"DATA"
+            mock_get.return_value.headers = {}
+            CalendarFetcher()._fetch_from_remote(url, timeout=30)  # noqa: SLF001
+
+        assert mock_get.call_args.kwargs["timeout"] == 5  # noqa: PLR2004
+        assert mock_get.call_args.kwargs["policy"] is policy
+
+    def test_min_refresh_interval_extends_freshness(self, policies):
+        url = "http://busy.example.com/cal.ics"
+        use_policies(
+            policies,
+            DomainPolicy(pattern="busy.example.com", min_refresh_interval=86400),
+        )
+
+        lifetime = CalendarFetcher().freshness_lifetime(url, {})
+
+        assert lifetime == 86400  # noqa: PLR2004
+
+    def test_oversized_body_is_rejected(self):
+        client = httpx.Client(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"x" * 100),
+            ),
+        )
+        policy = DomainPolicy(pattern="huge.example.com", max_body_size=10)
+
+        with (
+            patch.object(http_client, "get_client", return_value=client),
+            pytest.raises(FeedTooLargeError),
+        ):
+            http_client.get("http://huge.example.com/cal.ics", policy=policy)
@@ -1,13 +1,23 @@
 import time
+from unittest.mock import DEFAULT
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
 import requests
-
+from django.core.cache import cache
+from kombu.exceptions import OperationalError
+
+from mergecalweb.calendars.exceptions import CachedFetchError
+from mergecalweb.calendars.exceptions import CircuitOpenError
+from mergecalweb.calendars.fetching import cache_envelope
+from mergecalweb.calendars.fetching import single_flight
+from mergecalweb.calendars.fetching.domain_configs import DEFAULT_POLICY
 from mergecalweb.calendars.fetching.fetcher import CACHE_TIMEOUT
 from mergecalweb.calendars.fetching.fetcher import MAX_STALE_AGE
+from mergecalweb.calendars.fetching.fetcher import NEGATIVE_CACHE_TTLS
 from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+from mergecalweb.calendars.fetching.fetcher import RemoteResponse
 
 
 @pytest.fixture
@@ -17,13 +27,24 @@ def fetcher():
 
 @pytest.fixture
 def mock_cache():
+    def get(key, *args):
+        # Only remember fetch failures when a test sets them explicitly
+        return None if key.startswith("calendar_error_") else DEFAULT
+
     with patch("mergecalweb.calendars.fetching.fetcher.cache") as mock:
+        mock.get.side_effect = get
+        yield mock
+
+
+@pytest.fixture
+def mock_refresh_task():
+    with patch("mergecalweb.calendars.tasks.refresh_feed_task.delay") as mock:
         yield mock
 
 
 @pytest.fixture
 def mock_requests():
-    with patch("requests.get") as mock:
+    with patch("mergecalweb.calendars.fetching.http_client.get") as mock:
         yield mock
 
 
@@ -31,7 +52,7 @@ class TestCalendarFetcher:
     def test_fetch_fresh_cache_hit(self, fetcher, mock_cache):
         """Test that fresh cache returns immediately without network request"""
         url = "http://example.com/cal.ics"
-        content = "CALENDAR DATA"
+        content = b"CALENDAR DATA"
         # Cache set very recently
         cached_value = (content, time.time())
 
@@ -43,41 +64,87 @@ class TestCalendarFetcher:
             assert result == content
             mock_fetch.assert_not_called()
 
-    def test_fetch_stale_cache_refresh_success(self, fetcher, mock_cache):
-        """Test that stale cache triggers refresh and updates cache on success"""
+    def test_fetch_stale_cache_schedules_refresh(
+        self,
+        fetcher,
+        mock_cache,
+        mock_refresh_task,
+    ):
+        """Test that stale cache is served at once and refreshed in the background"""
         url = "http://example.com/cal.ics"
-        old_content = "OLD DATA"
-        new_content = "NEW DATA"
+        old_content = b"OLD DATA"
         # Cache set just over CACHE_TIMEOUT ago
         cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
-        cached_value = (old_content, cache_time)
+        mock_cache.get.return_value = (old_content, cache_time, {"etag": '"v1"'})
+
+        with patch.object(fetcher, "_fetch_from_remote") as mock_fetch:
+            result = fetcher.fetch_calendar(url)
+
+            assert result == old_content
+            mock_fetch.assert_not_called()
+            mock_refresh_task.assert_called_once_with(url)
+
+    def test_fetch_stale_cache_refresh_already_queued(
+        self,
+        fetcher,
+        mock_cache,
+        mock_refresh_task,
+    ):
+        """Test that a refresh is queued only once per URL"""
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        mock_cache.get.return_value = (b"OLD DATA", cache_time)
+        mock_cache.add.return_value = False
+
+        assert fetcher.fetch_calendar("http://example.com/cal.ics") == b"OLD DATA"
+        mock_refresh_task.assert_not_called()
+
+    def test_fetch_stale_cache_refresh_inline_success(
+        self,
+        fetcher,
+        mock_cache,
+        mock_refresh_task,
+    ):
+        """Test that stale cache is refreshed inline when no task can be queued"""
+        url = "http://example.com/cal.ics"
+        old_content = b"OLD DATA"
+        new_content = b"NEW DATA"
+        # Cache set just over CACHE_TIMEOUT ago
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        cached_value = (old_content, cache_time, {"etag": '"v1"'})
 
         mock_cache.get.return_value = cached_value
+        mock_refresh_task.side_effect = OperationalError("Broker unavailable")
 
         with patch.object(
             fetcher,
             "_fetch_from_remote",
-            return_value=new_content,
+            return_value=RemoteResponse(new_content, {"etag": '"v2"'}),
         ) as mock_fetch:
             # Should mock the cache.set call to verify it's updated
             result = fetcher.fetch_calendar(url)
 
             assert result == new_content
-            mock_fetch.assert_called_once_with(url, None)
+            mock_fetch.assert_called_once_with(url, None, {"etag": '"v1"'})
 
             # Verify cache update happened via _cache_content
             # We need to check what cache.set was called with
             assert mock_cache.set.called
 
-    def test_fetch_stale_cache_refresh_failure(self, fetcher, mock_cache):
-        """Test that stale cache is returned when refresh fails"""
+    def test_fetch_stale_cache_refresh_inline_failure(
+        self,
+        fetcher,
+        mock_cache,
+        mock_refresh_task,
+    ):
+        """Test that stale cache is returned when an inline refresh fails"""
         url = "http://example.com/cal.ics"
-        old_content = "OLD DATA"
+        old_content = b"OLD DATA"
         # Cache set just over CACHE_TIMEOUT ago
         cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
         cached_value = (old_content, cache_time)
 
         mock_cache.get.return_value = cached_value
+        mock_refresh_task.side_effect = OperationalError("Broker unavailable")
 
         with patch.object(
             fetcher,
@@ -93,7 +160,7 @@ class TestCalendarFetcher:
     def test_fetch_expired_cache(self, fetcher, mock_cache):
         """Test that expired cache (too old) forces refresh and raises on failure"""
         url = "http://example.com/cal.ics"
-        old_content = "ANCIENT DATA"
+        old_content = b"ANCIENT DATA"
         # Cache set longer than MAX_STALE_AGE ago
         cache_time = time.time() - (MAX_STALE_AGE.total_seconds() + 100)
         cached_value = (old_content, cache_time)
@@ -104,10 +171,10 @@ class TestCalendarFetcher:
         with patch.object(
             fetcher,
             "_fetch_from_remote",
-            return_value="NEW DATA",
+            return_value=RemoteResponse(b"NEW DATA"),
         ) as mock_fetch:
             result = fetcher.fetch_calendar(url)
-            assert result == "NEW DATA"
+            assert result == b"NEW DATA"
             mock_fetch.assert_called_once()
 
         # Scenario 2: Refresh fails - should raise
@@ -132,12 +199,12 @@ class TestCalendarFetcher:
         with patch.object(
             fetcher,
             "_fetch_from_remote",
-            return_value="NEW DATA",
+            return_value=RemoteResponse(b"NEW DATA"),
         ) as mock_fetch:
             result = fetcher.fetch_calendar(url)
 
             # Should treat as stale and try to refresh
-            assert result == "NEW DATA"
+            assert result == b"NEW DATA"
             mock_fetch.assert_called_once()
 
     def test_no_cache_hit(self, fetcher, mock_cache):
@@ -148,35 +215,85 @@ class TestCalendarFetcher:
         with patch.object(
             fetcher,
             "_fetch_from_remote",
-            return_value="FRESH DATA",
+            return_value=RemoteResponse(b"FRESH DATA"),
         ) as mock_fetch:
             result = fetcher.fetch_calendar(url)
 
-            assert result == "FRESH DATA"
+            assert result == b"FRESH DATA"
             mock_fetch.assert_called_once()
             assert mock_cache.set.called
 
     def test_fetch_from_remote_success(self, fetcher, mock_requests):
         """Test underlying _fetch_from_remote logic"""
         url = "http://example.com/cal.ics"
-        content = "CALENDAR CONTENT"
+        content = b"CALENDAR CONTENT"
 
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.content = content.encode("utf-8")
-        # Fix: Mock text property to return content string so len() works
-        mock_response.text = content
+        mock_response.content = content
+        mock_response.headers = {"ETag": '"abc"'}
         mock_requests.return_value = mock_response
 
         result = fetcher._fetch_from_remote(url)  # noqa: SLF001
-        assert result == content
+        assert result.content == content
+        assert result.validators == {"etag": '"abc"'}
         # Verify the actual default User-Agent used in implementation
         expected_headers = {
             "User-Agent": "MergeCal/1.0 (https://mergecal.org)",
             "Accept": "text/calendar, application/calendar+xml, application/calendar+json",  # noqa: E501
             "Accept-Language": "en-US,en;q=0.9",
         }
-        mock_requests.assert_called_with(url, headers=expected_headers, timeout=30)
+        mock_requests.assert_called_with(
+            url,
+            headers=expected_headers,
+            timeout=30,
+            policy=DEFAULT_POLICY,
+            sniff=True,
+        )
+
+    def test_stale_cache_not_modified(self, fetcher, mock_cache, mock_requests):
+        """Test that a 304 keeps the cached content and bumps its timestamp"""
+        url = "http://example.com/cal.ics"
+        validators = {"etag": '"abc"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        mock_cache.get.return_value = (b"CACHED DATA", cache_time, validators)
+
+        mock_response = Mock()
+        mock_response.status_code = 304
+        mock_response.headers = {}
+        mock_requests.return_value = mock_response
+
+        fetcher.refresh_calendar(url)
+
+        sent_headers = mock_requests.call_args.kwargs["headers"]
+        assert sent_headers["If-None-Match"] == '"abc"'
+        assert sent_headers["If-Modified-Since"] == validators["last_modified"]
+        entry = cache_envelope.unpack(mock_cache.set.call_args.args[1])
+        assert entry.content_hash == cache_envelope.content_hash(b"CACHED DATA")
+        assert entry.fetched_at > cache_time
+        assert entry.validators == validators
+
+    def test_legacy_tuple_cache_format(self, fetcher, mock_cache):
+        """Test that (content, timestamp) entries holding str are still served"""
+        url = "http://example.com/cal.ics"
+        mock_cache.get.return_value = ("OLDER FORMAT", time.time())
+
+        with patch.object(fetcher, "_fetch_from_remote") as mock_fetch:
+            assert fetcher.fetch_calendar(url) == b"OLDER FORMAT"
+            mock_fetch.assert_not_called()
+
+    def test_corrupt_cache_entry_treated_as_miss(self, fetcher, mock_cache):
+        """Test that an unreadable envelope is refetched instead of raising"""
+        url = "http://example.com/cal.ics"
+        mock_cache.get.return_value = cache_envelope.MAGIC + b"garbage"
+
+        with patch.object(
+            fetcher,
+            "_fetch_from_remote",
+            return_value=RemoteResponse(b"FRESH DATA"),
+        ) as mock_fetch:
+            assert fetcher.fetch_calendar(url) == b"FRESH DATA"
+            mock_fetch.assert_called_once()
 
     def test_fetch_from_remote_failure(self, fetcher, mock_requests):
         """Test underlying _fetch_from_remote logic on failure"""
@@ -185,3 +302,170 @@ class TestCalendarFetcher:
 
         with pytest.raises(requests.RequestException):
             fetcher._fetch_from_remote(url)  # noqa: SLF001
+
+
+class TestContentAddressedCache:
+    def test_identical_bodies_stored_once(self, fetcher):
+        """URL variants serving the same bytes share one cached body"""
+        urls = [
+            "http://shared.example.com/holidays.ics",
+            "https://shared.example.com/holidays.ics?lang=en",
+        ]
+        for url in urls:
+            fetcher._cache_content(f"calendar_data_{url}", b"HOLIDAYS")  # noqa: SLF001
+
+        digest = cache_envelope.content_hash(b"HOLIDAYS")
+        assert cache.get(cache_envelope.body_key(digest)) is not None
+        for url in urls:
+            assert fetcher.get_content_hash(url) == digest
+            with patch.object(fetcher, "_fetch_from_remote") as mock_fetch:
+                assert fetcher.fetch_calendar(url) == b"HOLIDAYS"
+                mock_fetch.assert_not_called()
+
+    def test_evicted_body_is_refetched(self, fetcher):
+        url = "http://evicted.example.com/cal.ics"
+        fetcher._cache_content(f"calendar_data_{url}", b"EVICTED")  # noqa: SLF001
+        cache.delete(cache_envelope.body_key(cache_envelope.content_hash(b"EVICTED")))
+
+        with patch.object(
+            fetcher,
+            "_fetch_from_remote",
+            return_value=RemoteResponse(b"REFETCHED"),
+        ) as mock_fetch:
+            assert fetcher.fetch_calendar(url) == b"REFETCHED"
+            mock_fetch.assert_called_once()
+
+
+class TestNegativeCache:
+    def test_failed_fetch_not_retried_within_ttl(self, fetcher, mock_requests):
+        url = "http://negative.example.com/missing.ics"
+        mock_requests.side_effect = requests.HTTPError(
+            "404 Error: Not Found",
+            response=Mock(status_code=404),
+        )
+
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch_calendar(url)
+        with pytest.raises(CachedFetchError, match="404 Error: Not Found"):
+            fetcher.fetch_calendar(url)
+
+        mock_requests.assert_called_once()
+
+    @pytest.mark.parametrize(
+        ("error", "ttl"),
+        [
+            (requests.Timeout("Timed out"), NEGATIVE_CACHE_TTLS["timeout"]),
+            (
+                requests.ConnectionError("Name or service not known"),
+                NEGATIVE_CACHE_TTLS["connection-error"],
+            ),
+            (
+                requests.HTTPError(response=Mock(status_code=403)),
+                NEGATIVE_CACHE_TTLS["client-error"],
+            ),
+            (
+                requests.HTTPError(response=Mock(status_code=503)),
+                NEGATIVE_CACHE_TTLS["server-error"],
+            ),
+        ],
+    )
+    def test_ttl_depends_on_error_class(self, fetcher, error, ttl):
+        url = f"http://negative.example.com/{type(error).__name__}.ics"
+        with patch("mergecalweb.calendars.fetching.fetcher.cache") as mock_cache:
+            fetcher._remember_failure(url, error)  # noqa: SLF001
+
+        mock_cache.set.assert_called_once()
+        assert mock_cache.set.call_args.args[2] == ttl.total_seconds()
+
+    def test_open_circuit_not_remembered(self, fetcher):
+        url = "http://negative.example.com/circuit.ics"
+
+        fetcher._remember_failure(url, CircuitOpenError("Circuit open"))  # noqa: SLF001
+
+        assert cache.get(f"calendar_error_{url}") is None
+
+    def test_stale_copy_served_despite_recent_failure(self, fetcher):
+        url = "http://negative.example.com/stale.ics"
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        cache.set(f"calendar_data_{url}", (b"STALE DATA", cache_time, {}))
+        fetcher._remember_failure(url, requests.Timeout("Timed out"))  # noqa: SLF001
+
+        with patch.object(fetcher, "schedule_refresh", return_value=True):
+            assert fetcher.fetch_calendar(url) == b"STALE DATA"
+
+    def test_success_clears_remembered_failure(self, fetcher, mock_requests):
+        url = "http://negative.example.com/recovered.ics"
+        fetcher._remember_failure(url, requests.Timeout("Timed out"))  # noqa: SLF001
+        mock_requests.return_value.status_code = 200
+        mock_requests.return_value.content = b"RECOVERED"
+        mock_requests.return_value.headers = {}
+
+        fetcher._fetch_from_remote(url)  # noqa: SLF001
+
+        # Without a cached body, the feed is fetched again instead of failing
+        assert fetcher.fetch_calendar(url) == b"RECOVERED"
+        assert mock_requests.call_count == 2  # noqa: PLR2004
+
+    def test_not_modified_clears_remembered_failure(self, fetcher):
+        url = "http://negative.example.com/revalidated.ics"
+        fetcher.store(url, b"BODY")
+        entry = fetcher._read_entry(cache.get(f"calendar_data_{url}"))  # noqa: SLF001
+        fetcher._remember_failure(url, requests.Timeout("Timed out"))  # noqa: SLF001
+
+        assert fetcher.store_not_modified(url, entry)
+        assert cache.get(f"calendar_error_{url}") is None
+
+
+class TestSingleFlight:
+    def test_follower_serves_stale_while_leader_fetches(self, fetcher):
+        """A concurrent background refresh leaves the stale copy to the leader"""
+        url = "http://single-flight.example.com/stale.ics"
+        cache_time = time.time() - (CACHE_TIMEOUT.total_seconds() + 10)
+        cache.set(f"calendar_data_{url}", (b"STALE DATA", cache_time, {}))
+        coalesced_before = single_flight.get_stats()["coalesced"]
+
+        with (
+            single_flight.fetch_lock(url, timeout=30) as is_leader,
+            patch.object(fetcher, "_fetch_from_remote") as mock_fetch,
+        ):
+            assert is_leader
+            fetcher.refresh_calendar(url)
+
+        mock_fetch.assert_not_called()
+        assert single_flight.get_stats()["coalesced"] == coalesced_before + 1
+
+    def test_follower_waits_for_leader_result(self, fetcher):
+        """A concurrent cache miss reuses the leader's freshly cached result"""
+        url = "http://single-flight.example.com/miss.ics"
+
+        def finish_leader_fetch(*args):
+            cache.set(f"calendar_data_{url}", (b"LEADER DATA", time.time(), {}))
+            cache.delete(f"calendar_fetch_lock_{url}")
+
+        cache.add(f"calendar_fetch_lock_{url}", "leader-token")
+        with (
+            patch.object(single_flight.time, "sleep", side_effect=finish_leader_fetch),
+            patch.object(fetcher, "_fetch_from_remote") as mock_fetch,
+        ):
+            result = fetcher.fetch_calendar(url)
+
+        assert result == b"LEADER DATA"
+        mock_fetch.assert_not_called()
+
+    def test_follower_fetches_itself_when_leader_times_out(self, fetcher):
+        url = "http://single-flight.example.com/slow.ics"
+        cache.add(f"calendar_fetch_lock_{url}", "leader-token")
+
+        with (
+            patch.object(single_flight, "WAIT_TIMEOUT", 0),
+            patch.object(
+                fetcher,
+                "_fetch_from_remote",
+                return_value=RemoteResponse(b"OWN DATA"),
+            ) as mock_fetch,
+        ):
+            result = fetcher.fetch_calendar(url)
+
+        assert result == b"OWN DATA"
+        mock_fetch.assert_called_once()
+        cache.delete(f"calendar_fetch_lock_{url}")
@@ -0,0 +1,112 @@
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from django.utils.http import http_date
+
+from mergecalweb.calendars.fetching import freshness
+from mergecalweb.calendars.fetching.fetcher import CalendarFetcher
+
+
+@pytest.fixture
+def mock_requests_get():
+    with patch("mergecalweb.calendars.fetching.http_client.get") as mock:
+        yield mock
+
+
+@pytest.fixture
+def freshness_bounds(settings):
+    settings.CALENDAR_FEED_MIN_FRESHNESS = 120
+    settings.CALENDAR_FEED_MAX_FRESHNESS = 3600
+
+
+class TestDeclaredLifetime:
+    @pytest.mark.parametrize(
+        ("headers", "expected"),
+        [
+            ({}, None),
+            ({"Cache-Control": "public, max-age=600"}, 600),
+            ({"Cache-Control": "max-age=600, s-maxage=60"}, 60),
+            ({"Cache-Control": "max-age=600", "Age": "100"}, 500),
+            ({"Cache-Control": "max-age=60", "Age": "100"}, 0),
+            ({"Cache-Control": "no-cache, max-age=600"}, 0),
+            ({"Cache-Control": "max-age=invalid"}, None),
+            (
+                {
+                    "Date": "Mon, 01 Jan 2024 00:00:00 GMT",
+                    "Expires": "Mon, 01 Jan 2024 00:30:00 GMT",
+                },
+                1800,
+            ),
+            ({"Expires": "0"}, None),
+        ],
+    )
+    def test_headers(self, headers, expected):
+        assert freshness.declared_lifetime(httpx.Headers(headers)) == expected
+
+    def test_max_age_wins_over_expires(self):
+        headers = httpx.Headers(
+            {"Cache-Control": "max-age=300", "Expires": http_date(time.time() + 60)},
+        )
+
+        assert freshness.declared_lifetime(headers) == 300  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("freshness_bounds")
+class TestLifetime:
+    @pytest.mark.parametrize(
+        ("cache_control", "expected"),
+        [
+            ("max-age=600", 600),
+            ("max-age=0", 120),
+            ("max-age=86400", 3600),
+            ("", 120),
+        ],
+    )
+    def test_clamped_to_settings(self, cache_control, expected):
+        headers = httpx.Headers({"Cache-Control": cache_control})
+
+        assert freshness.lifetime(headers, default=120) == expected
+
+    @pytest.mark.parametrize(
+        ("cache_control", "learned", "expected"),
+        [
+            ("no-cache", 1800, 1800),
+            ("max-age=900", 300, 900),
+            ("", 30, 120),
+        ],
+    )
+    def test_learned_lifetime_extends_declared(
+        self,
+        cache_control,
+        learned,
+        expected,
+    ):
+        headers = httpx.Headers({"Cache-Control": cache_control})
+
+        assert freshness.lifetime(headers, default=120, learned=learned) == expected
+
+    def test_declared_lifetime_keeps_feed_fresh(
+        self,
+        mock_requests_get,
+        monkeypatch,
+    ):
+        url = "http://fresh.example.com/hourly.ics"
+        mock_requests_get.return_value = httpx.Response(
+            200,
+            content=b"HOURLY",
+            headers={"Cache-Control": "max-age=1800"},
+        )
+        fetcher = CalendarFetcher()
+        fetcher.fetch_calendar(url)
+
+        # Well past the default lifetime, within the declared one
+        entry = fetcher.read_entries([url])[url]
+        ten_minutes_later = time.time() + 600
+        monkeypatch.setattr(time, "time", lambda: ten_minutes_later)
+
+        assert fetcher.fetch_calendar(url) == b"HOURLY"
+
+        assert entry.fresh_for == 1800  # noqa: PLR2004
+        mock_requests_get.assert_called_once()
@@ -0,0 +1,174 @@
+import gzip
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+
+from mergecalweb.calendars.exceptions import FeedTooLargeError
+from mergecalweb.calendars.exceptions import HostBusyError
+from mergecalweb.calendars.exceptions import NotICalendarError
+from mergecalweb.calendars.fetching import http_client
+
+
+def client_for(handler) -> httpx.Client:
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+class TestHttpClient:
+    def test_client_is_shared_within_process(self):
+        assert http_client.get_client() is http_client.get_client()
+
+    def test_client_is_rebuilt_after_fork(self):
+        """A child process must not reuse the parent's pooled connections"""
+        parent_client = http_client.get_client()
+
+        http_client._reset_after_fork()  # noqa: SLF001
+
+        assert http_client.get_client() is not parent_client
+
+    def test_not_modified_is_returned(self):
+        client = client_for(lambda request: httpx.Response(304))
+        with patch.object(http_client, "get_client", return_value=client):
+            response = http_client.get("http://example.com/cal.ics")
+
+        assert response.status_code == 304  # noqa: PLR2004
+
+    def test_error_status_raises_requests_http_error(self):
+        client = client_for(lambda request: httpx.Response(404))
+        with (
+            patch.object(http_client, "get_client", return_value=client),
+            pytest.raises(requests.HTTPError),
+        ):
+            http_client.get("http://example.com/cal.ics")
+
+    def test_timeout_raises_requests_timeout(self):
+        def handler(request):
+            msg = "timed out"
+            raise httpx.ReadTimeout(msg, request=request)
+
+        with (
+            patch.object(http_client, "get_client", return_value=client_for(handler)),
+            pytest.raises(requests.Timeout),
+        ):
+            http_client.get("http://example.com/cal.ics")
+
+    def test_busy_host_raises_host_busy_error(self):
+        semaphore = http_client._get_host_semaphore("full.example.com", 1)  # noqa: SLF001
+        semaphore.acquire()
+        try:
+            with pytest.raises(HostBusyError):
+                http_client.get("http://full.example.com/cal.ics", timeout=0.01)
+        finally:
+            semaphore.release()
+
+    def test_slot_wait_counts_against_timeout(self):
+        seen_timeouts = []
+
+        def handler(request):
+            seen_timeouts.append(request.extensions["timeout"]["read"])
+            return httpx.Response(200)
+
+        with (
+            patch.object(http_client, "get_client", return_value=client_for(handler)),
+            patch.object(http_client.time, "monotonic", side_effect=[100, 104]),
+        ):
+            http_client.get("http://slow-slot.example.com/cal.ics", timeout=10)
+
+        assert seen_timeouts == [6]
+
+    def test_connection_error_raises_request_exception(self):
+        def handler(request):
+            msg = "connection refused"
+            raise httpx.ConnectError(msg, request=request)
+
+        with (
+            patch.object(http_client, "get_client", return_value=client_for(handler)),
+            pytest.raises(requests.RequestException),
+        ):
+            http_client.get("http://example.com/cal.ics")
+
+
+class TestStreamedBody:
+    def test_html_page_rejected_when_sniffing(self):
+        page = b"\n  <!DOCTYPE html><html><body>Sign in</body></html>" + b" " * 4096
+        client = client_for(lambda request: httpx.Response(200, content=page))
+        with (
+            patch.object(http_client, "get_client", return_value=client),
+            pytest.raises(NotICalendarError),
+        ):
+            http_client.get("http://html.example.com/cal.ics", sniff=True)
+
+    def test_calendar_passes_sniffing(self):
+        body = b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nEND:VCALENDAR\r\n"
+        client = client_for(lambda request: httpx.Response(200, content=body))
+        with patch.object(http_client, "get_client", return_value=client):
+            response = http_client.get("http://ical.example.com/cal.ics", sniff=True)
+
+        assert response.content == body
+
+    @pytest.mark.parametrize(
+        "body",
+        [b'{"error": "not found"}' + b" " * 4096, b"OK", b""],
+    )
+    def test_other_bodies_rejected_when_sniffing(self, body):
+        client = client_for(lambda request: httpx.Response(200, content=body))
+        with (
+            patch.object(http_client, "get_client", return_value=client),
+            pytest.raises(NotICalendarError, match="did not return an iCalendar"),
+        ):
+            http_client.get("http://json.example.com/cal.ics", sniff=True)
+
+    def test_calendar_after_byte_order_mark_passes_sniffing(self):
+        body = b"\xef\xbb\xbf\r\nbegin:vcalendar\r\nEND:VCALENDAR\r\n"
+        client = client_for(lambda request: httpx.Response(200, content=body))
+        with patch.object(http_client, "get_client", return_value=client):
+            response = http_client.get("http://bom.example.com/cal.ics", sniff=True)
+
+        assert response.content == body
+
+    def test_declared_length_over_limit_rejected(self, settings):
+        settings.CALENDAR_FEED_MAX_BODY_SIZE = 10
+
+        def handler(request):
+            return httpx.Response(200, headers={"Content-Length": "100"})
+
+        with (
+            patch.object(http_client, "get_client", return_value=client_for(handler)),
+            pytest.raises(FeedTooLargeError),
+        ):
+            http_client.get("http://declared.example.com/cal.ics")
+
+    def test_limit_applies_to_decoded_body(self, settings):
+        """A small compressed body must not expand past the limit"""
+        settings.CALENDAR_FEED_MAX_BODY_SIZE = 1000
+        compressed = gzip.compress(b"x" * 10_000)
+
+        def handler(request):
+            return httpx.Response(
+                200,
+                headers={"Content-Encoding": "gzip"},
+                content=compressed,
+            )
+
+        with (
+            patch.object(http_client, "get_client", return_value=client_for(handler)),
+            pytest.raises(FeedTooLargeError),
+        ):
+            http_client.get("http://bomb.example.com/cal.ics")
+
+    def test_compressed_body_is_decoded(self):
+        body = b"BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n"
+
+        def handler(request):
+            return httpx.Response(
+                200,
+                headers={"Content-Encoding": "gzip", "ETag": '"v1"'},
+                content=gzip.compress(body),
+            )
+
+        with patch.object(http_client, "get_client", return_value=client_for(handler)):
+            response = http_client.get("http://gzip.example.com/cal.ics")
+
+        assert response.content == body
+        assert response.headers["ETag"] == '"v1"'
@@ -0,0 +1,60 @@
+from mergecalweb.calendars.fetching import latency
+
+
+def record_all(url: str, durations: list[float]) -> None:
+    for duration in durations:
+        latency.record(url, duration)
+
+
+class TestLatencyHistory:
+    def test_stats_need_minimum_samples(self):
+        url = "http://latency.example.com/new.ics"
+        record_all(url, [1.0] * (latency.MIN_SAMPLES - 1))
+
+        assert latency.get_stats([url]) == {}
+
+    def test_ewma_and_percentiles(self):
+        url = "http://latency.example.com/steady.ics"
+        record_all(url, [1.0, 1.0, 1.0, 1.0, 10.0])
+
+        stats = latency.get_stats([url])[url]
+
+        assert stats.p50 == 1.0
+        assert stats.p95 == 10.0  # noqa: PLR2004
+        assert 1.0 < stats.ewma < 10.0  # noqa: PLR2004
+
+    def test_only_recent_samples_kept(self):
+        url = "http://latency.example.com/recovered.ics"
+        record_all(url, [30.0] * latency.MAX_SAMPLES + [1.0] * latency.MAX_SAMPLES)
+
+        assert latency.get_stats([url])[url].p95 == 1.0
+
+    def test_timeout_follows_history_within_bounds(self):
+        fast = latency.LatencyStats(ewma=0.2, samples=(0.2, 0.3, 0.2))
+        slow = latency.LatencyStats(ewma=8.0, samples=(7.0, 8.0, 9.0))
+        bounds = {"default": 20, "minimum": 5, "maximum": 55}
+
+        assert latency.timeout_for(None, **bounds) == 20  # noqa: PLR2004
+        assert latency.timeout_for(fast, **bounds) == 5  # noqa: PLR2004
+        assert latency.timeout_for(slow, **bounds) == 27  # noqa: PLR2004
+
+    def test_repeated_timeouts_do_not_grow_timeout(self):
+        url = "http://latency.example.com/dead.ics"
+        record_all(url, [1.0, 2.0, 1.5])
+        bounds = {"default": 20, "minimum": 5, "maximum": 55}
+        timeouts = []
+
+        for _ in range(4):
+            timeout = latency.timeout_for(latency.get_stats([url])[url], **bounds)
+            timeouts.append(timeout)
+            latency.record_timeout(url, timeout)
+
+        assert timeouts == [6, 6, 6, 6]
+        assert latency.get_stats([url])[url].ewma > 2.0  # noqa: PLR2004
+
+    def test_timeouts_alone_give_no_history(self):
+        url = "http://latency.example.com/never-answered.ics"
+        for _ in range(latency.MIN_SAMPLES):
+            latency.record_timeout(url, 20)
+
+        assert latency.get_stats([url]) == {}
@@ -219,7 +219,7 @@ class TestSourceModel:
         """Test basic source creation with default values."""
         with patch("mergecalweb.calendars.models.CalendarFetcher") as mock_fetcher:
             mock_instance = mock_fetcher.return_value
-            mock_instance.fetch_calendar.return_value = """BEGIN:VCALENDAR
+            mock_instance.fetch_calendar.return_value = b"""BEGIN:VCALENDAR
 VERSION:2.0
 END:VCALENDAR"""
 
@@ -255,7 +255,7 @@ END:VCALENDAR"""
         # Test valid external URL
         with patch("mergecalweb.calendars.models.CalendarFetcher") as mock_fetcher:
             mock_instance = mock_fetcher.return_value
-            mock_instance.fetch_calendar.return_value = """BEGIN:VCALENDAR
+            mock_instance.fetch_calendar.return_value = b"""BEGIN:VCALENDAR
 VERSION:2.0
 END:VCALENDAR"""
 
@@ -302,7 +302,7 @@ END:VCALENDAR"""
 
         with patch("mergecalweb.calendars.models.CalendarFetcher") as mock_fetcher:
             mock_instance = mock_fetcher.return_value
-            mock_instance.fetch_calendar.return_value = """BEGIN:VCALENDAR
+            mock_instance.fetch_calendar.return_value = b"""BEGIN:VCALENDAR
 VERSION:2.0
 END:VCALENDAR"""
 
@@ -0,0 +1,154 @@
+from pathlib import Path
+
+import pytest
+from icalendar import Calendar as ICalendar
+from icalendar import Event
+from mergecal import CalendarMerger
+
+from mergecalweb.calendars.services.serialized_source import SerializedSource
+from mergecalweb.calendars.services.serialized_source import splice
+
+CALENDARS_DIR = Path(__file__).parent / "calendars"
+PRODID = "-//Test//mergecal.org//"
+
+
+def load(name: str) -> ICalendar:
+    return ICalendar.from_ical((CALENDARS_DIR / name).read_bytes())
+
+
+def header() -> ICalendar:
+    calendar = ICalendar()
+    calendar.add("prodid", PRODID)
+    calendar.add("version", "2.0")
+    return calendar
+
+
+def no_uid_calendar() -> ICalendar:
+    calendar = ICalendar()
+    event = Event()
+    event.add("summary", "No UID")
+    calendar.add_component(event)
+    return calendar
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["airbnb.ics", "bookinghound.ics", "google.ics", "officeholidays.ics"],
+        ["teamsnap.ics", "vrbo.ics", "recurring.ics", "with_location.ics"],
+        # The same feed twice: its events and timezones are deduplicated
+        ["google.ics", "example.ics", "google.ics"],
+    ],
+)
+def test_splice_matches_calendar_merger(names: list[str]) -> None:
+    expected = CalendarMerger(
+        [load(name) for name in names],
+        prodid=PRODID,
+        version="2.0",
+    ).merge()
+
+    spliced = splice(
+        header(),
+        [SerializedSource.from_ical(load(name)) for name in names],
+    )
+
+    assert spliced == expected.to_ical()
+
+
+def test_events_without_uid_deduplicated_by_content() -> None:
+    calendars = [no_uid_calendar(), no_uid_calendar()]
+    expected = CalendarMerger(calendars, prodid=PRODID, version="2.0").merge()
+
+    spliced = splice(
+        header(),
+        [SerializedSource.from_ical(calendar) for calendar in calendars],
+    )
+
+    assert spliced == expected.to_ical()
+    assert spliced.count(b"BEGIN:VEVENT") == 1
+
+
+def test_trailer_follows_source_events() -> None:
+    trailer = Event()
+    trailer.add("summary", "Trailer")
+
+    spliced = splice(
+        header(),
+        [SerializedSource.from_ical(load("basic.ics"))],
+        trailer=[trailer.to_ical()],
+    )
+
+    assert spliced.endswith(trailer.to_ical() + b"END:VCALENDAR\r\n")
+
+
+def test_dumps_round_trip() -> None:
+    source = SerializedSource.from_ical(load("recurring.ics"))
+    no_uid = SerializedSource.from_ical(no_uid_calendar())
+    raw = SerializedSource(timezones=(), events=((None, b"SUMMARY:Caf\xe9\r\n"),))
+
+    for original in [source, no_uid, raw]:
+        assert SerializedSource.loads(original.dumps()) == original
+
+
+class TestFromBytes:
+    @pytest.mark.parametrize(
+        "name",
+        ["airbnb.ics", "officeholidays.ics", "vrbo.ics", "recurring.ics"],
+    )
+    def test_blocks_match_parsed_feed(self, name: str) -> None:
+        data = (CALENDARS_DIR / name).read_bytes()
+
+        raw = SerializedSource.from_bytes(data)
+        parsed = SerializedSource.from_ical(ICalendar.from_ical(data))
+
+        assert raw is not None
+        assert [key for key, _ in raw.events] == [key for key, _ in parsed.events]
+        assert [tzid for tzid, _ in raw.timezones] == [
+            tzid for tzid, _ in parsed.timezones
+        ]
+        for (_, raw_chunk), (_, parsed_chunk) in zip(
+            raw.events,
+            parsed.events,
+            strict=True,
+        ):
+            assert Event.from_ical(raw_chunk) == Event.from_ical(parsed_chunk)
+
+    def test_folded_lines_and_lf_endings(self) -> None:
+        data = (
+            b"BEGIN:VCALENDAR\nVERSION:2.0\nBEGIN:VEVENT\nUID:folded-\n uid\n"
+            b"SEQUENCE:02\nSUMMARY:Folded\nEND:VEVENT\nEND:VCALENDAR\n"
+        )
+
+        raw = SerializedSource.from_bytes(data)
+
+        assert raw is not None
+        ((key, chunk),) = raw.events
+        assert key == ("folded-uid", "2", None)
+        assert chunk == (
+            b"BEGIN:VEVENT\r\nUID:folded-\r\n uid\r\nSEQUENCE:02\r\n"
+            b"SUMMARY:Folded\r\nEND:VEVENT\r\n"
+        )
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            # X-WR-TIMEZONE needs conversion
+            (CALENDARS_DIR / "google.ics").read_bytes(),
+            # TZIDs without a VTIMEZONE get one added by the parser
+            (CALENDARS_DIR / "bookinghound.ics").read_bytes(),
+            b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nEND:VCALENDAR\r\n",
+            b"<html><body>Not a calendar</body></html>",
+            # Not UTF-8, would make the merged calendar invalid
+            b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:latin-1\r\n"
+            b"SUMMARY:Caf\xe9\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n",
+            # Content lines without a value
+            b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:garbage\r\n"
+            b"GARBAGE LINE\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n",
+            b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:param-only\r\n"
+            b"DTSTART;VALUE=DATE\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n",
+            b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:blank\r\n\r\n"
+            b"END:VEVENT\r\nEND:VCALENDAR\r\n",
+        ],
+    )
+    def test_feeds_left_to_parser(self, data: bytes) -> None:
+        assert SerializedSource.from_bytes(data) is None
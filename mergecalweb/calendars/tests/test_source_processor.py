@@ -0,0 +1,188 @@
+import time
+from datetime import date
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from icalendar import Calendar as ICalendar
+from icalendar import Event
+from icalendar.prop import vDDDTypes
+from icalendar.prop import vText
+
+from mergecalweb.calendars.fetching import cache_envelope
+from mergecalweb.calendars.models import Calendar
+from mergecalweb.calendars.services.source_processor import SourceProcessor
+from mergecalweb.calendars.services.source_rules import CustomizationStats
+
+from .factories import SourceFactory
+
+CALENDARS_DIR = Path(__file__).parent / "calendars"
+BENCHMARK_EVENTS = 50_000
+# Removing excluded events one by one took minutes at this size
+BENCHMARK_SECONDS = 10
+
+
+def process(source, calendar_data: bytes) -> SourceProcessor:
+    processor = SourceProcessor(source)
+    with patch.object(
+        processor.fetcher,
+        "fetch_calendar",
+        return_value=calendar_data,
+    ):
+        processor.fetch_and_validate()
+    processor.customize_calendar()
+    return processor
+
+
+def summaries(processor: SourceProcessor) -> list[str]:
+    return [
+        str(Event.from_ical(chunk)["summary"])
+        for _, chunk in processor.source_data.serialized.events
+    ]
+
+
+def large_calendar(event_count: int) -> ICalendar:
+    """Every other event is a standup, the rest have unique titles."""
+    days = [vDDDTypes(date(2024, 1, 1) + timedelta(days=day)) for day in range(365)]
+    calendar = ICalendar()
+    calendar.subcomponents = [
+        Event(
+            uid=vText(f"{i}@benchmark.example.com"),
+            summary=vText("Standup" if i % 2 else f"Event {i}"),
+            dtstart=days[i % len(days)],
+        )
+        for i in range(event_count)
+    ]
+    return calendar
+
+
+@pytest.mark.django_db
+class TestCustomization:
+    def test_stats_are_reported(self, calendar: Calendar) -> None:
+        source = SourceFactory(
+            url="http://customized.example.com/officeholidays.ics",
+            calendar=calendar,
+            exclude_keywords="regex:warehouse|migration",
+            include_location=False,
+        )
+
+        processor = process(
+            source,
+            (CALENDARS_DIR / "officeholidays.ics").read_bytes(),
+        )
+
+        assert processor.customization_stats == CustomizationStats(
+            kept=3,
+            dropped=2,
+            rewritten=3,
+        )
+        assert len(processor.source_data.serialized.events) == 3  # noqa: PLR2004
+
+    def test_benchmark_large_feed(self, calendar: Calendar) -> None:
+        source = SourceFactory(
+            url="http://benchmark.example.com/large.ics",
+            calendar=calendar,
+            custom_prefix="[Bench]",
+            exclude_keywords="standup",
+        )
+        ical = large_calendar(BENCHMARK_EVENTS)
+        rules = SourceProcessor(source).rules()
+
+        start = time.perf_counter()
+        stats = rules.apply(ical)
+        elapsed = time.perf_counter() - start
+
+        half = BENCHMARK_EVENTS // 2
+        assert stats == CustomizationStats(kept=half, dropped=half, rewritten=half)
+        assert len(ical.subcomponents) == half
+        assert str(ical.subcomponents[0]["summary"]).startswith("[Bench]: Event")
+        assert elapsed < BENCHMARK_SECONDS, f"{elapsed:.2f}s for {BENCHMARK_EVENTS}"
+
+
+@pytest.mark.django_db
+class TestProcessedSourceCache:
+    def test_unchanged_source_skips_parsing(self, calendar: Calendar) -> None:
+        source = SourceFactory(
+            url="http://processed.example.com/basic.ics",
+            calendar=calendar,
+            custom_prefix="[Cached]",
+        )
+        calendar_data = (CALENDARS_DIR / "basic.ics").read_bytes()
+        first = process(source, calendar_data)
+
+        with patch.object(ICalendar, "from_ical") as from_ical:
+            second = process(source, calendar_data)
+
+        from_ical.assert_not_called()
+        assert not first.from_processed_cache
+        assert second.from_processed_cache
+        assert summaries(second) == summaries(first)
+        assert all(summary.startswith("[Cached]") for summary in summaries(second))
+
+    def test_changed_settings_reprocess_source(self, calendar: Calendar) -> None:
+        source = SourceFactory(
+            url="http://processed.example.com/recurring.ics",
+            calendar=calendar,
+            custom_prefix="[Before]",
+        )
+        calendar_data = (CALENDARS_DIR / "recurring.ics").read_bytes()
+        process(source, calendar_data)
+
+        source.custom_prefix = "[After]"
+        processor = process(source, calendar_data)
+
+        assert not processor.from_processed_cache
+        assert all(summary.startswith("[After]") for summary in summaries(processor))
+
+    def test_changed_feed_reprocesses_source(self, calendar: Calendar) -> None:
+        source = SourceFactory(
+            url="http://processed.example.com/feed.ics",
+            calendar=calendar,
+        )
+        process(source, (CALENDARS_DIR / "basic.ics").read_bytes())
+
+        processor = process(source, (CALENDARS_DIR / "with_location.ics").read_bytes())
+
+        assert not processor.from_processed_cache
+        # The new version replaced the old one, compressed
+        content_hash, body = cache.get(processor._processed_key())  # noqa: SLF001
+        assert content_hash == processor.content_hash
+        assert body.startswith(cache_envelope.BODY_MAGIC)
+
+    def test_uncustomized_source_passes_through(self, calendar: Calendar) -> None:
+        calendar.owner.subscription_tier = calendar.owner.SubscriptionTier.PERSONAL
+        calendar.owner.save()
+        source = SourceFactory(
+            url="http://passthrough.example.com/airbnb.ics",
+            calendar=calendar,
+            custom_prefix="[Ignored]",
+        )
+        calendar_data = (CALENDARS_DIR / "airbnb.ics").read_bytes()
+
+        with patch.object(ICalendar, "from_ical") as from_ical:
+            processor = process(source, calendar_data)
+
+        from_ical.assert_not_called()
+        assert processor.source_data.ical is None
+        crlf_data = calendar_data.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+        for _, chunk in processor.source_data.serialized.events:
+            assert chunk in crlf_data
+
+    def test_non_utf8_feed_is_parsed(self, calendar: Calendar) -> None:
+        calendar.owner.subscription_tier = calendar.owner.SubscriptionTier.PERSONAL
+        calendar.owner.save()
+        source = SourceFactory(
+            url="http://passthrough.example.com/latin-1.ics",
+            calendar=calendar,
+        )
+        calendar_data = (
+            b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\nUID:latin-1\r\n"
+            b"SUMMARY:Caf\xe9\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+        )
+
+        processor = process(source, calendar_data)
+
+        ((_, chunk),) = processor.source_data.serialized.events
+        assert "Caf\ufffd" in chunk.decode("utf-8")
@@ -0,0 +1,150 @@
+from datetime import date
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.exceptions import ValidationError
+from icalendar import Event
+
+from mergecalweb.calendars.services.source_rules import compile_exclude_rules
+from mergecalweb.calendars.services.source_rules import compile_rules
+from mergecalweb.calendars.services.source_rules import validate_exclude_keywords
+
+
+def make_event(summary: str | None = None, start=None) -> Event:
+    event = Event()
+    if summary is not None:
+        event.add("summary", summary)
+    if start is not None:
+        event.add("dtstart", start)
+    return event
+
+
+class TestExcludeRules:
+    def test_keywords_match_titles_case_insensitively(self) -> None:
+        rules = compile_exclude_rules(" Meeting , standup,,")
+
+        assert rules.excludes(make_event("Team MEETING"))
+        assert rules.excludes(make_event("Daily Standup"))
+        assert not rules.excludes(make_event("Lunch"))
+        assert not rules.excludes(make_event())
+
+    def test_keywords_are_literal(self) -> None:
+        rules = compile_exclude_rules("1+1, (draft)")
+
+        assert rules.excludes(make_event("Math 1+1"))
+        assert rules.excludes(make_event("Plan (draft)"))
+        assert not rules.excludes(make_event("Math 11"))
+
+    def test_regex_rules(self) -> None:
+        rules = compile_exclude_rules(r"regex:^sprint \d+$, holiday")
+
+        assert rules.excludes(make_event("Sprint 12"))
+        assert rules.excludes(make_event("Holiday"))
+        assert not rules.excludes(make_event("Sprint 12 review"))
+
+    @pytest.mark.parametrize(
+        "rule",
+        [
+            "regex:[unclosed",
+            "regex:(?i)standup",
+            r"regex:(a)\1",
+            "regex:" + "a" * 201,
+            "regex:(a+)+$",
+            "regex:(a|a)*b",
+            r"regex:(\w+\s?)+$",
+        ],
+    )
+    def test_rejected_regex_is_ignored(self, rule: str) -> None:
+        rules = compile_exclude_rules(f"{rule}, holiday, regex:^sprint")
+
+        assert rules.excludes(make_event("Holiday"))
+        assert rules.excludes(make_event("Sprint 1"))
+        assert not rules.excludes(make_event("standup"))
+        assert not rules.excludes(make_event(rule))
+
+    def test_regex_rules_compiled_separately(self) -> None:
+        rules = compile_exclude_rules(r"regex:(x)y, regex:(a)b\\1")
+
+        assert len(rules.title_patterns) == 2  # noqa: PLR2004
+        assert rules.excludes(make_event(r"ab\1"))
+
+    def test_date_rules(self) -> None:
+        rules = compile_exclude_rules("before:2024-01-10, after:2024-01-20")
+
+        assert rules.excludes(make_event("Early", date(2024, 1, 9)))
+        assert not rules.excludes(make_event("First", date(2024, 1, 10)))
+        assert not rules.excludes(
+            make_event("Last", datetime(2024, 1, 20, 23, tzinfo=ZoneInfo("UTC"))),
+        )
+        assert rules.excludes(make_event("Late", datetime(2024, 1, 21, 9)))  # noqa: DTZ001
+        assert not rules.excludes(make_event("Undated"))
+
+    def test_rules_that_are_not_dates_are_keywords(self) -> None:
+        rules = compile_exclude_rules("before:lunch")
+
+        assert rules.before is None
+        assert rules.excludes(make_event("Before:Lunch walk"))
+
+    def test_compiled_once_per_value(self) -> None:
+        assert compile_exclude_rules("once") is compile_exclude_rules("once")
+        assert not compile_exclude_rules(" , ")
+
+    def test_validator_rejects_invalid_regex(self) -> None:
+        validate_exclude_keywords(r"meeting, regex:^\d+$, before:2024-01-01")
+
+        for value in ["meeting, regex:(", "regex:(?i)a", r"regex:(a)\1"]:
+            with pytest.raises(ValidationError):
+                validate_exclude_keywords(value)
+
+    def test_validator_rejects_catastrophic_backtracking(self) -> None:
+        validate_exclude_keywords(r"regex:^(foo|bar)+$, regex:(\d{2}-)*x, regex:(a+)?")
+
+        for value in ["regex:(a+)+$", "regex:(a|a)*b", "regex:(a|ab)*c"]:
+            with pytest.raises(ValidationError):
+                validate_exclude_keywords(value)
+
+    def test_validator_rejects_patterns_cut_at_commas(self) -> None:
+        for value in ["regex:a{1,3}", "regex:(a, b)"]:
+            with pytest.raises(ValidationError, match="Commas separate rules"):
+                validate_exclude_keywords(value)
+
+        validate_exclude_keywords(r"regex:a\x2cb")
+        assert compile_exclude_rules(r"regex:a\x2cb").excludes(make_event("a,b"))
+
+
+class TestRewrites:
+    SETTINGS = {
+        "name": "Work",
+        "custom_prefix": "",
+        "include_title": True,
+        "include_description": True,
+        "include_location": True,
+        "exclude_keywords": "",
+    }
+
+    def test_prefix_and_branding(self) -> None:
+        rules = compile_rules(
+            **(self.SETTINGS | {"custom_prefix": "[W]"}),
+            summary_suffix=" (via)",
+            description_suffix="\n\nBranded",
+        )
+
+        assert rules.rewrite_summary("Standup") == "[W]: Standup (via)"
+        assert rules.rewrite_description(None) == "\n\nBranded"
+        assert rules.rewrites
+
+    def test_hidden_title_uses_prefix_or_name(self) -> None:
+        hidden = self.SETTINGS | {"include_title": False}
+
+        assert compile_rules(**hidden).rewrite_summary("Secret") == "Work"
+        prefixed = compile_rules(**(hidden | {"custom_prefix": "[Busy]"}))
+        assert prefixed.rewrite_summary("Secret") == "[Busy]"
+
+    def test_unchanged_source_has_no_rewrites(self) -> None:
+        rules = compile_rules(**self.SETTINGS)
+
+        assert rules.rewrite_summary is None
+        assert rules.rewrite_description is None
+        assert not rules.rewrites
+        assert rules is compile_rules(**self.SETTINGS)
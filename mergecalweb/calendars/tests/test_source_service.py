@@ -0,0 +1,184 @@
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+
+from mergecalweb.calendars.fetching import latency
+from mergecalweb.calendars.models import Calendar
+from mergecalweb.calendars.services.source_service import SourceService
+
+from .factories import SourceFactory
+
+CALENDARS_DIR = Path(__file__).parent / "calendars"
+FETCH_DELAY_SECONDS = 0.3
+
+
+def slow_fetch(url: str, timeout: int | None = None) -> bytes:
+    time.sleep(FETCH_DELAY_SECONDS)
+    return (CALENDARS_DIR / Path(url).name).read_bytes()
+
+
+@pytest.mark.django_db
+class TestSourceService:
+    def test_sources_fetched_concurrently_in_order(self, calendar: Calendar) -> None:
+        """Latency tracks the slowest source and results keep source order"""
+        filenames = ["basic.ics", "recurring.ics", "with_location.ics", "google.ics"]
+        sources = [
+            SourceFactory(
+                url=f"http://concurrent.example.com/{name}",
+                calendar=calendar,
+            )
+            for name in filenames
+        ]
+
+        with patch(
+            "mergecalweb.calendars.fetching.fetcher.CalendarFetcher.fetch_calendar",
+            side_effect=slow_fetch,
+        ):
+            start = time.monotonic()
+            results = SourceService().process_sources(sources)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < FETCH_DELAY_SECONDS * len(sources)
+        assert [r.source for r in results] == sources
+        assert all(r.serialized is not None and r.error is None for r in results)
+
+    def test_sources_past_deadline_time_out(self, calendar: Calendar) -> None:
+        """Sources still running at the request deadline are reported as errors"""
+        source = SourceFactory(
+            url="http://deadline.example.com/basic.ics",
+            calendar=calendar,
+        )
+
+        with (
+            patch(
+                "mergecalweb.calendars.fetching.fetcher.CalendarFetcher.fetch_calendar",
+                side_effect=slow_fetch,
+            ),
+            patch(
+                "mergecalweb.calendars.services.source_service.MAX_REQUEST_TIMEOUT",
+                0,
+            ),
+            patch(
+                "mergecalweb.calendars.services.source_service.SAFETY_BUFFER",
+                0,
+            ),
+        ):
+            (result,) = SourceService().process_sources([source])
+
+        assert result.ical is None
+        assert result.error == "Timed out while fetching calendar"
+
+    def test_recently_failed_source_reported_without_fetch(
+        self,
+        calendar: Calendar,
+    ) -> None:
+        url = "http://broken.example.com/basic.ics"
+        source = SourceFactory(url=url, calendar=calendar)
+        cache.set(
+            f"calendar_error_{url}",
+            {
+                "error": "404 Error: Not Found",
+                "error_type": "HTTPError",
+                "error_class": "not-found",
+            },
+        )
+
+        with patch("mergecalweb.calendars.fetching.http_client.get") as mock_get:
+            (result,) = SourceService().process_sources([source])
+
+        mock_get.assert_not_called()
+        assert result.ical is None
+        assert result.error == "404 Error: Not Found"
+
+    def test_slow_sources_started_first_with_adapted_timeouts(
+        self,
+        calendar: Calendar,
+    ) -> None:
+        fast_url = "http://fast.example.com/basic.ics"
+        slow_url = "http://slow.example.com/recurring.ics"
+        sources = [
+            SourceFactory(url=url, calendar=calendar) for url in (fast_url, slow_url)
+        ]
+        for _ in range(latency.MIN_SAMPLES):
+            latency.record(fast_url, 0.1)
+            latency.record(slow_url, 12.0)
+        started = []
+
+        def fetch(url: str, timeout: int | None = None) -> bytes:
+            started.append((url, timeout))
+            return (CALENDARS_DIR / Path(url).name).read_bytes()
+
+        with (
+            patch(
+                "mergecalweb.calendars.fetching.fetcher.CalendarFetcher.fetch_calendar",
+                side_effect=fetch,
+            ),
+            patch(
+                "mergecalweb.calendars.services.source_service.MAX_FETCH_WORKERS",
+                1,
+            ),
+        ):
+            results = SourceService().process_sources(sources)
+
+        assert started == [(slow_url, 36), (fast_url, 5)]
+        assert [r.source for r in results] == sources
+
+    def test_local_source_spliced_without_parsing(self, calendar: Calendar) -> None:
+        site = Site.objects.get_current()
+        calendar.remove_branding = True
+        calendar.save()
+        nested = Calendar.objects.create(name="Nested", owner=calendar.owner)
+        SourceFactory(url="http://nested.example.com/basic.ics", calendar=nested)
+        local_url = f"https://{site.domain}/calendars/{nested.uuid}.ical"
+        plain = SourceFactory(url=local_url, calendar=calendar)
+        prefixed = SourceFactory(url=local_url, calendar=calendar, custom_prefix="N")
+
+        with patch(
+            "mergecalweb.calendars.fetching.fetcher.CalendarFetcher.fetch_calendar",
+            side_effect=slow_fetch,
+        ):
+            (result,) = SourceService().process_sources([plain])
+            (customized,) = SourceService().process_sources([prefixed])
+
+        assert result.ical is None
+        assert [key for key, _ in result.serialized.events] == [
+            key for key, _ in customized.serialized.events
+        ]
+        assert customized.ical is not None
+        assert all(b"SUMMARY:N: " in chunk for _, chunk in customized.serialized.events)
+
+    def test_local_sources_merged_within_outer_deadline(
+        self,
+        calendar: Calendar,
+    ) -> None:
+        site = Site.objects.get_current()
+        calendar.remove_branding = True
+        calendar.save()
+        nested = Calendar.objects.create(name="Nested", owner=calendar.owner)
+        SourceFactory(url="http://late.example.com/basic.ics", calendar=nested)
+        local_url = f"https://{site.domain}/calendars/{nested.uuid}.ical"
+        source = SourceFactory(url=local_url, calendar=calendar)
+        timeouts = []
+
+        def fetch(url: str, timeout: int | None = None) -> bytes:
+            timeouts.append(timeout)
+            return (CALENDARS_DIR / Path(url).name).read_bytes()
+
+        with patch(
+            "mergecalweb.calendars.fetching.fetcher.CalendarFetcher.fetch_calendar",
+            side_effect=fetch,
+        ):
+            (expired,) = SourceService(deadline=time.monotonic()).process_sources(
+                [source],
+            )
+            (result,) = SourceService(deadline=time.monotonic() + 2).process_sources(
+                [source],
+            )
+
+        assert expired.error == "Timed out while fetching calendar"
+        assert result.error is None
+        assert timeouts == [2]
@@ -0,0 +1,153 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+
+from mergecalweb.calendars.fetching import CalendarFetcher
+from mergecalweb.calendars.fetching.crawler import CrawlResult
+from mergecalweb.calendars.fetching.fetcher import CACHE_TIMEOUT
+from mergecalweb.calendars.models import Calendar
+from mergecalweb.calendars.tasks import combine_all_calendar_task
+from mergecalweb.calendars.tasks import combine_calendar_task
+from mergecalweb.calendars.tasks import refresh_feeds_task
+from mergecalweb.calendars.tasks import refresh_recent_feeds_task
+
+from .factories import CalendarFactory
+from .factories import SourceFactory
+
+
+@pytest.mark.django_db
+class TestRefreshRecentFeeds:
+    def test_queues_recently_used_feeds_about_to_go_stale(
+        self,
+        calendar: Calendar,
+    ) -> None:
+        fetcher = CalendarFetcher()
+        due_url = "http://sweep.example.com/due.ics"
+        fresh_url = "http://sweep.example.com/fresh.ics"
+        unused_url = "http://sweep.example.com/unused.ics"
+        for url in (due_url, fresh_url, unused_url):
+            SourceFactory(url=url, calendar=calendar)
+            fetcher._cache_content(f"calendar_data_{url}", b"FEED")  # noqa: SLF001
+            cache.set(f"calendar_used_{url}", time.time())
+        cache.delete(f"calendar_used_{unused_url}")
+
+        # Make the due feed look like it was fetched almost a window ago
+        almost_stale = time.time() - CACHE_TIMEOUT.total_seconds() + 5
+        with patch("time.time", return_value=almost_stale):
+            fetcher._cache_content(f"calendar_data_{due_url}", b"FEED")  # noqa: SLF001
+
+        with patch("mergecalweb.calendars.tasks.refresh_feed_task.delay") as delay:
+            refresh_recent_feeds_task()
+
+        delay.assert_called_once_with(due_url)
+        cache.delete(f"calendar_refresh_queued_{due_url}")
+
+    def test_refresh_clears_queued_marker(self) -> None:
+        url = "http://sweep.example.com/refresh.ics"
+        cache.set(f"calendar_refresh_queued_{url}", 1)
+
+        with patch.object(
+            CalendarFetcher,
+            "_revalidate",
+            return_value=b"FEED",
+        ) as mock_revalidate:
+            CalendarFetcher().refresh_calendar(url)
+
+        mock_revalidate.assert_called_once()
+        assert cache.get(f"calendar_refresh_queued_{url}") is None
+
+
+@pytest.mark.django_db
+class TestBulkRefresh:
+    def test_each_distinct_url_queued_once(self, calendar: Calendar) -> None:
+        site = Site.objects.get_current()
+        shared_url = "http://bulk.example.com/holidays.ics"
+        SourceFactory(url=shared_url, calendar=calendar)
+        SourceFactory(url=shared_url, calendar=CalendarFactory())
+        SourceFactory(url="http://bulk.example.com/team.ics", calendar=calendar)
+        SourceFactory(
+            url=f"https://{site.domain}/calendars/{calendar.uuid}.ical",
+            calendar=CalendarFactory(),
+        )
+
+        with patch("mergecalweb.calendars.tasks.refresh_feeds_task.delay") as delay:
+            combine_all_calendar_task()
+
+        queued_urls = [url for call in delay.call_args_list for url in call.args[0]]
+        assert sorted(queued_urls) == [
+            "http://bulk.example.com/holidays.ics",
+            "http://bulk.example.com/team.ics",
+        ]
+
+    def test_only_calendars_with_changed_feeds_rebuilt(self) -> None:
+        changed_url = "http://bulk.example.com/changed.ics"
+        unchanged_url = "http://bulk.example.com/unchanged.ics"
+        changed_calendar = CalendarFactory()
+        SourceFactory(url=changed_url, calendar=changed_calendar)
+        SourceFactory(url=unchanged_url, calendar=CalendarFactory())
+        results = [
+            CrawlResult(url=changed_url, status="updated", duration_seconds=0.1),
+            CrawlResult(url=unchanged_url, status="unchanged", duration_seconds=0.1),
+        ]
+
+        with (
+            patch("mergecalweb.calendars.tasks.crawler.crawl", return_value=results),
+            patch("mergecalweb.calendars.tasks.combine_calendar_task.delay") as delay,
+        ):
+            refresh_feeds_task([changed_url, unchanged_url])
+
+        delay.assert_called_once_with(changed_calendar.pk)
+
+    def test_calendars_including_rebuilt_calendars_rebuilt(self) -> None:
+        site = Site.objects.get_current()
+        changed_url = "http://bulk.example.com/included.ics"
+        included = CalendarFactory()
+        SourceFactory(url=changed_url, calendar=included)
+        including = CalendarFactory()
+        SourceFactory(
+            url=f"https://{site.domain}/calendars/{included.uuid}.ical",
+            calendar=including,
+        )
+        including_including = CalendarFactory()
+        SourceFactory(
+            url=f"https://{site.domain}/calendars/{including.uuid}.ical",
+            calendar=including_including,
+        )
+        SourceFactory(
+            url=f"https://{site.domain}/calendars/{CalendarFactory().uuid}.ical",
+            calendar=CalendarFactory(),
+        )
+        results = [
+            CrawlResult(url=changed_url, status="updated", duration_seconds=0.1),
+        ]
+
+        with (
+            patch("mergecalweb.calendars.tasks.crawler.crawl", return_value=results),
+            patch("mergecalweb.calendars.tasks.combine_calendar_task.delay") as delay,
+        ):
+            refresh_feeds_task([changed_url])
+
+        assert [call.args[0] for call in delay.call_args_list] == [
+            included.pk,
+            including.pk,
+            including_including.pk,
+        ]
+
+    def test_combine_calendar_task_rebuilds_cached_calendar(
+        self,
+        calendar: Calendar,
+        mock_calendar_request: None,
+    ) -> None:
+        SourceFactory(url="http://example.com/basic.ics", calendar=calendar)
+        cache_key = f"calendar_str_{calendar.uuid}"
+        cache.set(cache_key, ("PREVIOUS OUTPUT", time.time() + 3600))
+
+        combine_calendar_task(calendar.pk)
+
+        assert b"Basic Test Event" in cache.get(cache_key).content
+
+    def test_combine_calendar_task_ignores_deleted_calendar(self) -> None:
+        combine_calendar_task(0)
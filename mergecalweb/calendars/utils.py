@@ -11,6 +11,7 @@ from icalendar import Calendar
 from icalendar import Timezone
 from icalendar import TimezoneStandard
 
+from mergecalweb.calendars.fetching import http_client
 from mergecalweb.calendars.meetup import fetch_and_create_meetup_calendar
 from mergecalweb.calendars.meetup import is_meetup_url
 from mergecalweb.core.logging_events import LogEvent
@@ -130,16 +131,12 @@ def fetch_calendar_data(url):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",  # noqa: E501
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",  # noqa: E501
             "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
             "DNT": "1",  # Do Not Track Request Header
             "Upgrade-Insecure-Requests": "1",
         }
 
-        response = requests.get(url, headers=headers, timeout=20)
-        response.encoding = "utf-8"
-        response.raise_for_status()
-        return Calendar.from_ical(response.text)
+        response = http_client.get(url, headers=headers, timeout=20)
+        return Calendar.from_ical(response.content)
     except requests.exceptions.HTTPError:
         logger.exception(
             "Deprecated: HTTP error fetching URL",
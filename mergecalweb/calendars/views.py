@@ -15,6 +15,9 @@ from django.shortcuts import redirect
 from django.shortcuts import render
 from django.urls import reverse
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
 from django.views import View
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.decorators.http import require_POST
@@ -347,9 +350,8 @@ class CalendarFileView(View):
         )
 
         merger = CalendarMergerService(calendar)
-        calendar_str = merger.merge()
-
-        if not calendar_str:
+        merged = merger.get_merged()
+        if not merged.content:
             logger.error(
                 "Calendar merge failed during file access",
                 extra={
@@ -366,8 +368,18 @@ class CalendarFileView(View):
                 content_type="text/plain",
             )
 
-        response = HttpResponse(calendar_str, content_type="text/calendar")
+        # Serve a pre-compressed variant picked from Accept-Encoding
+        body, content_encoding, etag = merged.encoded(
+            request.headers.get("accept-encoding", ""),
+        )
+
+        response = HttpResponse(content_type="text/calendar")
         response["Content-Disposition"] = f'attachment; filename="{uuid}.ics"'
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(merged.last_modified)
+        if content_encoding:
+            response["Content-Encoding"] = content_encoding
+        patch_vary_headers(response, ("Accept-Encoding",))
 
         # Set cache headers based on user's update frequency preference
         # Optimized for Cloudflare CDN
@@ -381,6 +393,31 @@ class CalendarFileView(View):
             cache_ttl = calendar.effective_update_frequency
             response["Cache-Control"] = f"public, max-age={cache_ttl}"
 
+        # Calendar clients poll all day; answer unchanged calendars with 304
+        if request.method in ("GET", "HEAD"):
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(merged.last_modified),
+                response=response,
+            )
+            if not_modified is not response:
+                logger.info(
+                    "Calendar file not modified",
+                    extra={
+                        "event": LogEvent.CALENDAR_FILE_SUCCESS,
+                        "status": "not-modified",
+                        "calendar_uuid": uuid,
+                        "calendar_name": calendar.name,
+                        "owner_id": calendar.owner.pk,
+                        "owner_username": calendar.owner.username,
+                        "duration_seconds": round(time.time() - start_time, 2),
+                    },
+                )
+                return not_modified
+
+        response.content = body
+
         request_duration = time.time() - start_time
         logger.info(
             "Calendar file served successfully",
@@ -391,7 +428,8 @@ class CalendarFileView(View):
                 "owner_id": calendar.owner.pk,
                 "owner_username": calendar.owner.username,
                 "owner_tier": calendar.owner.subscription_tier,
-                "file_size_bytes": len(calendar_str),
+                "file_size_bytes": len(body),
+                "content_encoding": content_encoding,
                 "duration_seconds": round(request_duration, 2),
                 "is_free_tier": calendar.owner.is_free_tier,
             },
@@ -19,10 +19,15 @@ from mergecalweb.users.tests.factories import UserFactory
 class MockResponse:
     """Mock response for calendar requests"""
 
-    def __init__(self, text: str, status_code: int = 200) -> None:
-        self.text = text
+    def __init__(self, content: bytes, status_code: int = 200) -> None:
+        self.content = content
         self.status_code = status_code
         self.encoding = "utf-8"
+        self.headers: dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding)
 
     def raise_for_status(self) -> None:
         if self.status_code >= http_client.BAD_REQUEST:  # 400
@@ -45,9 +50,12 @@ def mock_calendar_request() -> Iterator[None]:
         calendar_path = (
             Path(__file__).parent / "calendars" / "tests" / "calendars" / filename
         )
-        return MockResponse(calendar_path.read_text(encoding="utf-8"))
+        return MockResponse(calendar_path.read_bytes())
 
-    with patch("requests.get", side_effect=mock_get) as _:
+    with patch(
+        "mergecalweb.calendars.fetching.http_client.get",
+        side_effect=mock_get,
+    ) as _:
         yield
 
 
@@ -80,17 +80,25 @@ class LogEvent:
 
     # Calendar Fetching (external source fetching - use with "status" parameter)
     # Use with "status": "cache-hit"/"cache-miss"/"success"/"failed"/
-    # "domain-config"/"cached"
+    # "domain-config"/"cached"/"not-modified"/"coalesced"/
+    # "coalesced-using-stale"/"coalesce-fallback"/"cache-corrupt"/
+    # "cache-body-missing"/"refresh-queue-failed"/"refresh-failed"/
+    # "crawl-updated"/"crawl-unchanged"/"crawl-not-modified"/"crawl-error"/
+    # "crawl-circuit-open"/"crawl-failed-recently"/"circuit-open"/
+    # "circuit-opened"/"circuit-closed"/"negative-cached"/"negative-cache-hit"/
+    # "content-changed"
     CALENDAR_FETCH = "calendar-fetch"
 
     # Calendar Merging (use with "status" parameter)
     # Use with "status": "start"/"cache-hit"/"cache-miss"/
-    # "sources-processed"/"success"/"free-tier-warning"
+    # "sources-processed"/"success"/"free-tier-warning"/
+    # "stale-while-rebuilding"/"coalesced"
     CALENDAR_MERGE = "calendar-merge"
 
     # Source Processing (use with "status" and optionally "source_type")
     # Use with "status": "start"/"success"/"timeout"/"network-error"/
-    # "validation-error"/"meetup-error"/"timeout-calculated"
+    # "validation-error"/"meetup-error"/"timeout-calculated"/"cached-error"/
+    # "processed-cache-hit"/"passthrough"
     # Optionally "source_type": "remote"/"local"/"meetup"
     SOURCE_FETCH = "source-fetch"
 
@@ -105,7 +113,7 @@ class LogEvent:
     SOURCE_CUSTOMIZATION = "source-customization"
 
     # Calendar Background Tasks (use with "status" parameter)
-    # Use with "task_type": "combine"/"bulk-combine"
+    # Use with "task_type": "combine"/"bulk-combine"/"feed-refresh"/"feed-sweep"
     # "status": "start"/"queued"/"loaded"/"success"/"not-found"/"error"
     CALENDAR_TASK = "calendar-task"
 
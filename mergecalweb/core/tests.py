@@ -3,6 +3,7 @@
 import datetime
 
 import pytest
+from django.contrib.sites.models import Site
 from django.core import mail
 from django.utils import timezone
 
@@ -10,6 +11,7 @@ from mergecalweb.billing.emails import downgrade_subscription_email
 from mergecalweb.billing.emails import send_trial_ending_email
 from mergecalweb.billing.emails import upgrade_subscription_email
 from mergecalweb.core.emails import send_email
+from mergecalweb.core.utils import is_local_url
 from mergecalweb.users.models import User
 
 
@@ -149,3 +151,17 @@ class TestEmailSystem:
         # Check logo image is present
         assert "favicon-no-boarder.png" in html_content
         assert 'alt="MergeCal"' in html_content
+
+
+@pytest.mark.django_db
+class TestIsLocalUrl:
+    """Test detection of URLs served by this site."""
+
+    def test_hostnames_compared_case_insensitively(self):
+        site = Site.objects.get_current()
+        site.domain = "Mergecal.org"
+        site.save()
+
+        assert is_local_url("https://mergecal.org/calendars/abc.ical")
+        assert is_local_url("https://WWW.MERGECAL.ORG/calendars/abc.ical")
+        assert not is_local_url("https://example.com/calendars/abc.ical")
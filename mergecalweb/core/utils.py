@@ -51,9 +51,9 @@ def is_local_url(url: str) -> bool:
     parsed_url = urlparse(url)
     url_domain = parsed_url.netloc
 
-    # Remove 'www.' from both domains for comparison
-    current_site_domain = current_site_domain.removeprefix("www.")
-    url_domain = url_domain.removeprefix("www.")
+    # Hostnames are case-insensitive; remove 'www.' from both for comparison
+    current_site_domain = current_site_domain.lower().removeprefix("www.")
+    url_domain = url_domain.lower().removeprefix("www.")
     return url_domain == current_site_domain
 
 